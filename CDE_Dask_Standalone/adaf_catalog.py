@@ -0,0 +1,386 @@
+"""
+Catalog of the meta data in many ADAF files.
+
+The selection steps of the CDE, sort_adafs, vehical_config, filter_file and
+create_subsets, only look at meta columns such as VIN_Number, MDF_date,
+MDF_time and the FILENAME fields. The catalog extracts those once per file
+into a single SQLite database, together with an inventory of the systems,
+rasters and signals, so that files can be selected, grouped and ordered
+without opening them:
+
+    files    path, mtime and size of each indexed file
+    columns  name, dtype, length and first value of each meta and res column
+    rasters  length and time range of the basis of each raster
+    signals  name, dtype and unit of each signal
+
+Files are only extracted again when their modification time or size has
+changed since they were indexed.
+
+Run as a script to index a directory of .sydata files:
+
+    python adaf_catalog.py <catalog file> <directory>
+"""
+import os
+import sys
+import fnmatch
+import sqlite3
+import datetime
+import collections
+
+import numpy as np
+
+from sympathy.api import adaf
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS columns (
+    file INTEGER NOT NULL,
+    grp TEXT NOT NULL,
+    name TEXT NOT NULL,
+    dtype TEXT NOT NULL,
+    length INTEGER NOT NULL,
+    value);
+CREATE INDEX IF NOT EXISTS columns_name ON columns (grp, name, value);
+CREATE INDEX IF NOT EXISTS columns_file ON columns (file);
+CREATE TABLE IF NOT EXISTS rasters (
+    file INTEGER NOT NULL,
+    system TEXT NOT NULL,
+    raster TEXT NOT NULL,
+    length INTEGER NOT NULL,
+    start,
+    stop);
+CREATE INDEX IF NOT EXISTS rasters_file ON rasters (file);
+CREATE TABLE IF NOT EXISTS signals (
+    file INTEGER NOT NULL,
+    system TEXT NOT NULL,
+    raster TEXT NOT NULL,
+    name TEXT NOT NULL,
+    dtype TEXT NOT NULL,
+    unit TEXT);
+CREATE INDEX IF NOT EXISTS signals_name ON signals (name);
+CREATE INDEX IF NOT EXISTS signals_file ON signals (file);
+"""
+TABLES = ['columns', 'rasters', 'signals']
+# Format of MDF_date + MDF_time, as parsed by sort_adafs.
+MDF_DATETIME_FORMAT = "%d:%m:%Y%H:%M:%S"
+
+
+def _scalar(value):
+    """Return numpy scalar value as a value that SQLite can store."""
+    if isinstance(value, np.datetime64):
+        return unicode(value.astype('datetime64[us]'))
+    if isinstance(value, np.timedelta64):
+        return value.astype('timedelta64[us]').astype(np.int64).item()
+    if isinstance(value, bytes):
+        return value.decode('latin1')
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def _time_range(basis):
+    """Return smallest and largest value of basis or None, None."""
+    if basis.dtype.kind == 'f':
+        basis = basis[~np.isnan(basis)]
+    if not len(basis) or basis.dtype.kind not in 'iufmM':
+        return None, None
+    return _scalar(basis.min()), _scalar(basis.max())
+
+
+def extract(filename):
+    """
+    Return the catalog entries of an ADAF file as a dict of table name to
+    list of rows, without the file column. Only the first row of meta and
+    res columns and the basis of each raster are read.
+    """
+    result = {table: [] for table in TABLES}
+    with adaf.File(filename=filename, mode='r') as adaf_obj:
+        for group_name in ['meta', 'res']:
+            group = getattr(adaf_obj, group_name).to_table()
+            length = group.number_of_rows()
+            for name in group.column_names():
+                value = None
+                if length:
+                    value = _scalar(
+                        group.get_column_to_array(name, slice(0, 1))[0])
+                result['columns'].append(
+                    (group_name, name, group.column_type(name).str, length,
+                     value))
+
+        for system_name, system in adaf_obj.sys.items():
+            for raster_name, raster in system.items():
+                table = raster.to_table()
+                try:
+                    start, stop = _time_range(raster.basis_column().value())
+                except KeyError:
+                    start, stop = None, None
+                result['rasters'].append(
+                    (system_name, raster_name, raster.number_of_rows(),
+                     start, stop))
+                for name, signal in raster.items():
+                    result['signals'].append(
+                        (system_name, raster_name, name,
+                         table.column_type(name).str, signal.unit()))
+    return result
+
+
+def find_files(directory, pattern='*.sydata'):
+    """Return sorted list of files in directory matching pattern."""
+    result = []
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        result.extend(os.path.join(root, name)
+                      for name in sorted(fnmatch.filter(files, pattern)))
+    return result
+
+
+class Catalog(object):
+    """
+    SQLite catalog of ADAF files.
+
+    Paths are stored as absolute paths and all queries return absolute
+    paths. Conditions on meta and res columns are compared with the first
+    value of the column, which is how the CDE uses them.
+    """
+
+    def __init__(self, filename=':memory:'):
+        self._conn = sqlite3.connect(filename)
+        self._conn.executescript(SCHEMA)
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _file_id(self, path):
+        row = self._conn.execute(
+            'SELECT id FROM files WHERE path = ?', (path,)).fetchone()
+        return row and row[0]
+
+    def _remove(self, file_id):
+        for table in TABLES:
+            self._conn.execute(
+                'DELETE FROM {} WHERE file = ?'.format(table), (file_id,))
+        self._conn.execute('DELETE FROM files WHERE id = ?', (file_id,))
+
+    def update(self, filenames):
+        """
+        Index the files that are new or have changed since they were last
+        indexed. Files that can not be read as ADAF are left out of the
+        catalog.
+
+        :return: tuple of lists with updated and failed paths
+        """
+        updated = []
+        failed = []
+        for filename in filenames:
+            path = os.path.abspath(filename)
+            stat = os.stat(path)
+            row = self._conn.execute(
+                'SELECT id, mtime, size FROM files WHERE path = ?',
+                (path,)).fetchone()
+            if row and row[1:] == (stat.st_mtime, stat.st_size):
+                continue
+            try:
+                entries = extract(path)
+            except Exception:
+                entries = None
+            with self._conn:
+                if row:
+                    self._remove(row[0])
+                if entries is None:
+                    failed.append(path)
+                    continue
+                file_id = self._conn.execute(
+                    'INSERT INTO files (path, mtime, size) VALUES (?, ?, ?)',
+                    (path, stat.st_mtime, stat.st_size)).lastrowid
+                for table, rows in entries.items():
+                    if rows:
+                        self._conn.executemany(
+                            'INSERT INTO {} VALUES ({})'.format(
+                                table, ', '.join(['?'] * (len(rows[0]) + 1))),
+                            [(file_id,) + row for row in rows])
+            updated.append(path)
+        return updated, failed
+
+    def update_directory(self, directory, pattern='*.sydata'):
+        """
+        Index the files in directory matching pattern and remove the files
+        under directory that no longer exist from the catalog.
+
+        :return: tuple of lists with updated and failed paths
+        """
+        filenames = find_files(directory, pattern)
+        directory = os.path.join(os.path.abspath(directory), '')
+        existing = set(os.path.abspath(filename) for filename in filenames)
+        self.remove([path for path in self.paths()
+                     if path.startswith(directory) and path not in existing])
+        return self.update(filenames)
+
+    def remove(self, filenames):
+        """Remove files from the catalog."""
+        with self._conn:
+            for filename in filenames:
+                file_id = self._file_id(os.path.abspath(filename))
+                if file_id is not None:
+                    self._remove(file_id)
+
+    def paths(self):
+        """Return sorted list of all paths in the catalog."""
+        return [row[0] for row in self._conn.execute(
+            'SELECT path FROM files ORDER BY path')]
+
+    def files(self, where=None, group='meta', order_by=None, signals=None,
+              time_range=None):
+        """
+        Return list of paths of the files that match all conditions.
+
+        :param where: dict of column name to value, or to a list of
+            accepted values, compared with the first value of the column.
+        :param group: 'meta' or 'res', the group of the where and order_by
+            columns.
+        :param order_by: list of column names to order the result by,
+            files without the column come first. Ties are ordered by path.
+        :param signals: list of signal names that must all exist in the file.
+        :param time_range: tuple (start, stop), the basis of at least one
+            raster must overlap the range.
+        """
+        joins = []
+        conditions = []
+        args = []
+        for i, name in enumerate(order_by or []):
+            joins.append(
+                'LEFT JOIN columns o{0} ON o{0}.file = f.id AND '
+                'o{0}.grp = ? AND o{0}.name = ?'.format(i))
+            args.extend([group, name])
+        for name, value in (where or {}).items():
+            if isinstance(value, (list, tuple, set, frozenset)):
+                value = list(value)
+                test = 'value IN ({})'.format(', '.join(['?'] * len(value)))
+            else:
+                value = [value]
+                test = 'value = ?'
+            conditions.append(
+                'f.id IN (SELECT file FROM columns WHERE grp = ? AND '
+                'name = ? AND {})'.format(test))
+            args.extend([group, name] + [_scalar(v) for v in value])
+        for name in signals or []:
+            conditions.append(
+                'f.id IN (SELECT file FROM signals WHERE name = ?)')
+            args.append(name)
+        if time_range is not None:
+            conditions.append(
+                'f.id IN (SELECT file FROM rasters WHERE start <= ? AND '
+                'stop >= ?)')
+            args.extend([_scalar(time_range[1]), _scalar(time_range[0])])
+
+        query = ['SELECT f.path FROM files f'] + joins
+        if conditions:
+            query.append('WHERE ' + ' AND '.join(conditions))
+        query.append('ORDER BY ' + ', '.join(
+            ['o{}.value'.format(i) for i in range(len(order_by or []))] +
+            ['f.path']))
+        return [row[0] for row in self._conn.execute(' '.join(query), args)]
+
+    def values(self, name, group='meta', paths=None):
+        """
+        Return OrderedDict of path to the first value of column name, for
+        paths or for all files. Files without the column are left out.
+        """
+        rows = self._conn.execute(
+            'SELECT f.path, c.value FROM files f JOIN columns c ON '
+            'c.file = f.id WHERE c.grp = ? AND c.name = ? ORDER BY f.path',
+            (group, name))
+        result = collections.OrderedDict(rows)
+        if paths is not None:
+            result = collections.OrderedDict(
+                (path, result[path]) for path in
+                (os.path.abspath(path) for path in paths) if path in result)
+        return result
+
+    def group_by(self, name, group='meta', **kwargs):
+        """
+        Return OrderedDict of the first value of column name to the list of
+        paths with that value. Files without the column are grouped under
+        None. The keyword arguments select and order the files as in files.
+        """
+        values = self.values(name, group)
+        result = collections.OrderedDict()
+        for path in self.files(group=group, **kwargs):
+            result.setdefault(values.get(path), []).append(path)
+        return result
+
+    def columns(self, path, group='meta'):
+        """
+        Return list of (name, dtype, length, first value) of the columns in
+        group of path, ordered by name. The order in which the columns are
+        stored in the file is not kept, it depends on the hdf5 version.
+        """
+        return self._conn.execute(
+            'SELECT c.name, c.dtype, c.length, c.value FROM columns c JOIN '
+            'files f ON c.file = f.id WHERE f.path = ? AND c.grp = ? ORDER '
+            'BY c.name', (os.path.abspath(path), group)).fetchall()
+
+    def rasters(self, path):
+        """
+        Return list of (system, raster, length, start, stop) of the rasters
+        in path, ordered by system and raster name.
+        """
+        return self._conn.execute(
+            'SELECT r.system, r.raster, r.length, r.start, r.stop FROM '
+            'rasters r JOIN files f ON r.file = f.id WHERE f.path = ? ORDER '
+            'BY r.system, r.raster', (os.path.abspath(path),)).fetchall()
+
+    def signals(self, path):
+        """
+        Return list of (system, raster, name, dtype, unit) of the signals in
+        path, ordered by system, raster and signal name.
+        """
+        return self._conn.execute(
+            'SELECT s.system, s.raster, s.name, s.dtype, s.unit FROM '
+            'signals s JOIN files f ON s.file = f.id WHERE f.path = ? ORDER '
+            'BY s.system, s.raster, s.name',
+            (os.path.abspath(path),)).fetchall()
+
+
+def mdf_datetime(catalog, paths=None):
+    """
+    Return OrderedDict of path to the datetime from MDF_date and MDF_time,
+    the key used by sort_adafs.
+    """
+    dates = catalog.values('MDF_date', paths=paths)
+    times = catalog.values('MDF_time', paths=paths)
+    return collections.OrderedDict(
+        (path, datetime.datetime.strptime(date + times[path],
+                                          MDF_DATETIME_FORMAT))
+        for path, date in dates.items() if path in times)
+
+
+def subsets(catalog, paths=None):
+    """
+    Return list of lists of paths, grouped by FILENAME_field_0 like
+    create_subsets and ordered by date like sort_adafs, without opening
+    any file.
+    """
+    dates = mdf_datetime(catalog, paths)
+    fields = catalog.values('FILENAME_field_0', paths=dates.keys())
+    result = collections.OrderedDict()
+    for path in sorted(fields, key=lambda path: dates[path]):
+        result.setdefault(fields[path], []).append(path)
+    return result.values()
+
+
+if __name__ == '__main__':
+    with Catalog(sys.argv[1]) as catalog:
+        updated, failed = catalog.update_directory(sys.argv[2])
+    print("Updated {} files".format(len(updated)))
+    for path in failed:
+        print("Can't index sydata file {}".format(path))
@@ -0,0 +1,405 @@
+"""
+Dask execution of the CDE pipeline.
+
+Every .dat file becomes its own chain of delayed tasks:
+
+    import -> resample -> write -> describe
+
+and one task groups the descriptions of all files into the subsets, which
+only needs their meta data. Each subset is then evaluated by its own task:
+sorting, vehical_config, the filter and subset meta data and eval_flow, as
+in cde_start. Since the subsets are only known once the files have been
+written, run computes the graph in two steps.
+
+In the first step, the distribution statistics of the used files are also
+computed, one task per file, and merged into statistics for each subset in
+a tree of tasks. run writes them to STATISTICS_NAME in the output dir.
+
+Tasks hand filenames, descriptions and accumulators to each other, never
+more than one adaf.File, so that the graph can run on both the threaded and
+the process scheduler: linear chains of tasks are fused into one task
+before execution since adaf.File can not be pickled.
+
+The statistics are also used by bench to check that the schedulers compute
+the same data as the plain Python loop.
+
+Run as a script to benchmark against the plain Python pipeline:
+
+    python cde_dask.py <input dir> <output dir> [workers]
+"""
+import os
+import sys
+import json
+import time
+import collections
+
+import numpy as np
+import dask
+import dask.threaded
+import dask.local
+from dask.base import collections_to_dsk
+from dask.optimization import fuse
+
+from sympathy.api import adaf
+import mdf_importer
+from dat_adaf_processer import process_dat_adaf
+from update_meta import update_file_path_meta
+from cde_functions_new import ExtractVIN
+from vehical_config import vehical_config
+from filter_file import do_filter, add_filter_meta, write_log
+from create_subsets import add_subset_meta
+from eval_flow import eval_flow, get_selected_raster
+from cde_plot import REDUCE_FUNCTION
+from cde_start import sort_adafs
+
+# Same signal, range and bins as the distribution plot in eval_flow.
+SIGNAL_NAME = 'OxiCat_facHCCnvRat'
+BINS = 120
+BINS_RANGE = (-1.0, 3.0)
+# Number of partial results merged by each task in the statistics tree.
+SPLIT_EVERY = 8
+STATISTICS_NAME = 'B_KatDiagnos_statistics.json'
+
+
+Description = collections.namedtuple(
+    'Description', ['filename', 'used', 'subset', 'data_name', 'output_dir'])
+
+
+def get_data(input_dir):
+    dat_list = []
+    for root, dirs, files in os.walk(input_dir):
+        for file_ in files:
+            if file_.endswith(".dat"):
+                dat_list.append(os.path.join(root, file_))
+    return sorted(dat_list)
+
+
+class SignalStatistics(object):
+    """
+    Distribution statistics for one signal, mergeable across files.
+
+    Median is left out since MedianAccumulator keeps all of the data and
+    would move the whole signal through the reduction.
+    """
+
+    def __init__(self, bins=BINS, bins_range=BINS_RANGE):
+        self.bins_range = bins_range
+        self.histogram = np.zeros(bins, dtype=np.int64)
+        self.accumulators = collections.OrderedDict(
+            (name, cls()) for name, cls in REDUCE_FUNCTION.items()
+            if name != 'Median')
+
+    def add_data(self, data):
+        data = data[~np.isnan(data)]
+        for accumulator in self.accumulators.values():
+            accumulator.add_data(data)
+        self.histogram += np.histogram(
+            data, bins=len(self.histogram), range=self.bins_range)[0]
+
+    def merge(self, other):
+        for name, accumulator in self.accumulators.items():
+            accumulator.merge(other.accumulators[name])
+        self.histogram += other.histogram
+
+    def value(self):
+        result = collections.OrderedDict(
+            (name, accumulator.value())
+            for name, accumulator in self.accumulators.items())
+        result['Histogram'] = self.histogram
+        return result
+
+
+def import_dat(dat):
+    """
+    Import dat and return the new adaf.File, None if it could not be
+    imported.
+    """
+    importer = mdf_importer.MdfImporter("latin1", None)
+    try:
+        adaf_obj = adaf.File()
+        importer.run(dat, adaf_obj)
+    except:
+        print("Can't import dat file {}".format(dat))
+        return None
+    ExtractVIN(adaf_obj)
+    return adaf_obj
+
+
+def resample(adaf_obj, dat, input_dir, output_dir):
+    """Remove bad signals and resample, return the new adaf.File."""
+    if adaf_obj is None:
+        return None
+    try:
+        adaf_obj = process_dat_adaf(adaf_obj)
+    except:
+        print("Interpolate error {}".format(dat))
+        return None
+    update_file_path_meta(adaf_obj, dat, input_dir, output_dir)
+    return adaf_obj
+
+
+def write(adaf_obj, output_dir):
+    """Write adaf_obj as .sydata to output_dir, return the filename."""
+    if adaf_obj is None:
+        return None
+    out_name = adaf_obj.meta["DATA_Name"].value()[0]
+    out_name = out_name.split(".")[0] + ".sydata"
+    filename = os.path.join(output_dir, out_name)
+    with adaf.File(filename=filename, mode='w', source=adaf_obj):
+        pass
+    return filename
+
+
+def filter_sydata(filename):
+    """Return filename if the file is used by the evaluation, else None."""
+    if filename is None:
+        return None
+    if do_filter(adaf.File(filename=filename)):
+        return filename
+    return None
+
+
+def describe(filename):
+    """
+    Return Description of the written file with the meta data needed to
+    create the subsets, None if the file was not written.
+    """
+    if filename is None:
+        return None
+    adaf_obj = adaf.File(filename=filename)
+    meta = adaf_obj.meta
+    return Description(
+        filename, do_filter(adaf_obj), meta["FILENAME_field_0"].value()[0],
+        meta["DATA_Name"].value()[0], meta["DATASET_Output_Path"].value()[0])
+
+
+def group(descriptions):
+    """
+    Write the filter log and return the subsets as lists of filenames,
+    in the same order as the descriptions, and the number of used and
+    written files.
+    """
+    written = [description for description in descriptions
+               if description is not None]
+    used = [description for description in written if description.used]
+    if used:
+        write_log([description.data_name for description in used],
+                  used[0].output_dir)
+    subsets = collections.OrderedDict()
+    for description in used:
+        subsets.setdefault(description.subset, []).append(
+            description.filename)
+    return list(subsets.values()), len(used), len(written)
+
+
+def evaluate(filenames, filter_filecount, total_filecount, output_dir):
+    """
+    Add the meta data from sorting, vehical_config, the filter and the
+    subset to the files of one subset and evaluate it with eval_flow.
+    Subsets can be evaluated in parallel, only the drawing in eval_flow is
+    done by one thread at a time.
+    """
+    adaf_objs = [adaf.File(filename=filename) for filename in filenames]
+    sort_adafs(adaf_objs)
+    vehical_config(adaf_objs)
+    for adaf_obj in adaf_objs:
+        do_filter(adaf_obj)
+        add_filter_meta(adaf_obj, filter_filecount, total_filecount)
+        add_subset_meta(adaf_obj, adaf_obj.meta["FILENAME_field_0"].value()[0])
+    eval_flow(adaf_objs, output_dir)
+
+
+def statistics(filename):
+    """
+    Return dict of subset name to SignalStatistics for the file, the
+    same subsets as create_subsets.
+    """
+    if filename is None:
+        return {}
+    adaf_obj = adaf.File(filename=filename)
+    raster_names = ["Resampled raster {}".format(r)
+                    for r in get_selected_raster()]
+    subset = adaf_obj.meta["FILENAME_field_0"].value()[0]
+    signal_statistics = SignalStatistics()
+    for system_name, system in adaf_obj.sys.items():
+        for raster_name, raster in system.items():
+            if raster_name in raster_names and SIGNAL_NAME in raster:
+                signal_statistics.add_data(
+                    raster[SIGNAL_NAME].y.astype(float))
+    return {subset: signal_statistics}
+
+
+def merge_statistics(partials):
+    """Merge a list of results from statistics into a new dict."""
+    result = {}
+    for partial in partials:
+        for subset, signal_statistics in partial.items():
+            if subset not in result:
+                result[subset] = SignalStatistics(
+                    len(signal_statistics.histogram),
+                    signal_statistics.bins_range)
+            result[subset].merge(signal_statistics)
+    return result
+
+
+def write_statistics(subset_statistics, output_dir):
+    """
+    Write the result of merge_statistics as json to STATISTICS_NAME in
+    output_dir, ordered by subset name, and return the filename.
+    """
+    result = collections.OrderedDict()
+    for subset, signal_statistics in sorted(subset_statistics.items()):
+        value = collections.OrderedDict(
+            (name, np.asarray(item).tolist())
+            for name, item in signal_statistics.value().items())
+        value['Range'] = list(signal_statistics.bins_range)
+        result[subset] = value
+    filename = os.path.join(output_dir, STATISTICS_NAME)
+    with open(filename, 'w') as f:
+        json.dump(result, f, indent=2)
+    return filename
+
+
+def tree_reduce(values, function, split_every=SPLIT_EVERY):
+    """
+    Reduce the delayed values with function, which takes a list of at
+    most split_every values, in a tree of depth log(len(values)).
+    """
+    values = list(values)
+    if not values:
+        return dask.delayed(function)([])
+    while len(values) > 1:
+        values = [dask.delayed(function)(values[i:i + split_every])
+                  for i in range(0, len(values), split_every)]
+    return values[0]
+
+
+def build_files(dat_list, input_dir, output_dir):
+    """Return list of delayed written filenames for dat_list."""
+    filenames = []
+    for dat in dat_list:
+        adaf_obj = dask.delayed(import_dat)(dat)
+        adaf_obj = dask.delayed(resample)(
+            adaf_obj, dat, input_dir, output_dir)
+        filenames.append(dask.delayed(write)(adaf_obj, output_dir))
+    return filenames
+
+
+def build_statistics(filenames):
+    """Return delayed statistics for the delayed filenames."""
+    return tree_reduce(
+        [dask.delayed(statistics)(dask.delayed(filter_sydata)(filename))
+         for filename in filenames],
+        merge_statistics)
+
+
+def build_subsets(filenames):
+    """Return delayed result of group for the delayed filenames."""
+    return dask.delayed(group)(
+        [dask.delayed(describe)(filename) for filename in filenames])
+
+
+def build_evaluation(subsets, filter_filecount, total_filecount,
+                     output_dir):
+    """Return list of delayed evaluations, one for each subset."""
+    return [dask.delayed(evaluate)(
+        filenames, filter_filecount, total_filecount, output_dir)
+        for filenames in subsets]
+
+
+def optimize(values):
+    """
+    Return the task graph and keys of the list of delayed values, with
+    linear chains fused so that adaf.File objects stay inside one task.
+    """
+    dsk = collections_to_dsk(values)
+    keys = [value.key for value in values]
+    # Keep the keys, renaming adds an alias task for each fused chain.
+    dsk, _ = fuse(dsk, keys, rename_keys=False)
+    return dsk, keys
+
+
+def compute(values, scheduler='threads', num_workers=None):
+    """
+    Compute the list of delayed values with the local threaded, process or
+    synchronous scheduler.
+    """
+    dsk, keys = optimize(values)
+    kwargs = {}
+    if scheduler == 'threads':
+        get = dask.threaded.get
+    elif scheduler == 'processes':
+        # Imported here since it requires cloudpickle.
+        from dask import multiprocessing
+        get = multiprocessing.get
+    elif scheduler == 'sync':
+        get = dask.local.get_sync
+    else:
+        raise ValueError('Unknown scheduler: {}'.format(scheduler))
+    if num_workers and scheduler != 'sync':
+        kwargs['num_workers'] = num_workers
+    return get(dsk, keys, **kwargs)
+
+
+def run_plain(dat_list, input_dir, output_dir):
+    """
+    The per file steps of the task graph as a plain Python loop, returns
+    filenames and statistics.
+    """
+    filenames = []
+    partials = []
+    for dat in dat_list:
+        adaf_obj = resample(import_dat(dat), dat, input_dir, output_dir)
+        filename = write(adaf_obj, output_dir)
+        filenames.append(filename)
+        partials.append(statistics(filter_sydata(filename)))
+    return filenames, merge_statistics(partials)
+
+
+def run(input_dir, output_dir, scheduler='threads', num_workers=None):
+    """
+    Run the whole pipeline, return the subsets as lists of filenames and
+    the dict of subset name to SignalStatistics.
+    """
+    filenames = build_files(get_data(input_dir), input_dir, output_dir)
+    (subsets, filter_filecount, total_filecount), subset_statistics = compute(
+        [build_subsets(filenames), build_statistics(filenames)],
+        scheduler=scheduler, num_workers=num_workers)
+    write_statistics(subset_statistics, output_dir)
+    compute(build_evaluation(subsets, filter_filecount, total_filecount,
+                             output_dir),
+            scheduler=scheduler, num_workers=num_workers)
+    return subsets, subset_statistics
+
+
+def bench(input_dir, output_dir, num_workers=None):
+    """
+    Time the per file steps with the plain Python loop and with the
+    threaded and process schedulers.
+    :return: dict of method to seconds
+    """
+    dat_list = get_data(input_dir)
+    result = collections.OrderedDict()
+
+    t0 = time.time()
+    _, expected = run_plain(dat_list, input_dir, output_dir)
+    result['plain'] = time.time() - t0
+
+    for scheduler in ['threads', 'processes']:
+        t0 = time.time()
+        [subset_statistics] = compute(
+            [build_statistics(build_files(dat_list, input_dir, output_dir))],
+            scheduler=scheduler, num_workers=num_workers)
+        result[scheduler] = time.time() - t0
+        assert sorted(subset_statistics) == sorted(expected)
+        for subset, signal_statistics in subset_statistics.items():
+            assert np.array_equal(signal_statistics.histogram,
+                                  expected[subset].histogram)
+    return result
+
+
+if __name__ == "__main__":
+    num_workers = int(sys.argv[3]) if len(sys.argv) > 3 else None
+    for method, seconds in bench(sys.argv[1], sys.argv[2],
+                                 num_workers).items():
+        print("%-40s%s" % (method, seconds))
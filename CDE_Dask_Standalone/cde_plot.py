@@ -3,6 +3,7 @@ import os
 import json
 import warnings
 import operator
+import threading
 import collections
 
 import numpy as np
@@ -21,6 +22,9 @@ cmap = cmaps.viridis
 
 ALPHA_LIMIT = 0.1  # Allowed risk of rejecting a correct distribution
 
+# Held while drawing with pyplot, which is not thread-safe.
+PYPLOT_LOCK = threading.Lock()
+
 FONTSIZE = 8
 
 DEBOUNCE_TYPES = collections.OrderedDict((
@@ -66,6 +70,10 @@ class IHeatMapAccumulator(object):
     def value(self):
         raise NotImplementedError
 
+    def merge(self, other):
+        """Add the data accumulated by other, of the same type."""
+        raise NotImplementedError
+
 
 class CountAccumulator(IHeatMapAccumulator):
     def __init__(self):
@@ -77,6 +85,9 @@ class CountAccumulator(IHeatMapAccumulator):
     def value(self):
         return self._count
 
+    def merge(self, other):
+        self._count += other._count
+
 
 class MinAccumulator(IHeatMapAccumulator):
     def __init__(self):
@@ -93,6 +104,11 @@ class MinAccumulator(IHeatMapAccumulator):
     def value(self):
         return self._min
 
+    def merge(self, other):
+        if other._min is None:
+            return
+        self.add_data(np.array([other._min]))
+
 
 class MaxAccumulator(IHeatMapAccumulator):
     def __init__(self):
@@ -102,13 +118,18 @@ class MaxAccumulator(IHeatMapAccumulator):
         if not data.size:
             return
         if self._max is None:
-            self._max = data.min()
+            self._max = data.max()
         else:
             self._max = max(self._max, data.max())
 
     def value(self):
         return self._max
 
+    def merge(self, other):
+        if other._max is None:
+            return
+        self.add_data(np.array([other._max]))
+
 
 class MeanAccumulator(IHeatMapAccumulator):
     def __init__(self):
@@ -116,12 +137,18 @@ class MeanAccumulator(IHeatMapAccumulator):
         self._counts = []
 
     def add_data(self, data):
+        if not data.size:
+            return
         self._means.append(data.mean())
         self._counts.append(data.size)
 
     def value(self):
-        return (np.sum(m * c for m, c in zip(self._means, self._counts)) /
-                np.sum(self._means))
+        return (np.sum([m * c for m, c in zip(self._means, self._counts)]) /
+                np.sum(self._counts))
+
+    def merge(self, other):
+        self._means.extend(other._means)
+        self._counts.extend(other._counts)
 
 
 class MedianAccumulator(IHeatMapAccumulator):
@@ -137,6 +164,9 @@ class MedianAccumulator(IHeatMapAccumulator):
         else:
             return np.nan
 
+    def merge(self, other):
+        self._values.extend(other._values)
+
 
 REDUCE_FUNCTION = collections.OrderedDict((
     ('Count', CountAccumulator),
@@ -531,7 +561,11 @@ def single_dist_fit(signal, dist_name):
     with warnings.catch_warnings():
         # Suppress any warnings during fitting.
         warnings.simplefilter('ignore')
-        dist = dist_class(*dist_class.fit(signal))
+        if signal.size:
+            dist = dist_class(*dist_class.fit(signal))
+        else:
+            # Zero-length data can not be fitted, use undefined parameters.
+            dist = dist_class(*[np.nan] * (dist_class.numargs + 2))
 
     # kstest is sensitive to zero-length data
     if signal.size:
@@ -575,167 +609,172 @@ def distribution_plot_subsets(subsets, out_dir):
         for p in [""]
         if p.strip()]
 
-    ax11 = ax12 = ax21 = ax22 = None
-    good_dist = None
-
-    if dist_fit == 'None':
-        # Set up one subplot.
-        ax11 = figure.subplots(1, 1)[0][0]
-        draw_base_histogram(ax11, signal, bins, x_range, x_range,
-                            logy, signal_label, fault_limits)
-    else:
+    # Fitting does not use pyplot and is done before taking the lock.
+    if dist_fit != 'None':
         # Returns one distribution on success or four on failure.
         distributions = find_dist_fit(signal, dist_fit)
 
-        # For each returned distribution, set up two or four subplots
-        # depending on whether there are any fault limits.
-        if len(distributions) == 1:
-            good_dist = distributions[0]
-            if fault_limits:
-                f, ((ax11, ax21),
-                 (ax12, ax22)) = figure.subplots(2, 2)
-                f.subplots_adjust(wspace=0.2, hspace=0.5)
-                f.set_size_inches(25, 17)
-                ax11_list = [ax11]
-                ax21_list = [ax21]
-                ax12_list = [ax12]
-                ax22_list = [ax22]
-            else:
-                f, ((ax11,),
-                 (ax12,)) = figure.subplots(2, 1)
-                f.subplots_adjust(wspace=0.2, hspace=0.5)
-                f.set_size_inches(25, 17)
-                ax11_list = [ax11]
-                ax21_list = [None]
-                ax12_list = [ax12]
-                ax22_list = [None]
-        elif len(distributions) == 4:
-            if fault_limits:
-                f, ((ax111, ax211, ax112, ax212),
-                 (ax121, ax221, ax122, ax222),
-                 (ax113, ax213, ax114, ax214),
-                 (ax123, ax223, ax124, ax224)) = figure.subplots(4, 4)
-                f.subplots_adjust(wspace=0.2, hspace=0.5)
-                f.set_size_inches(25, 17)
-                ax11_list = [ax111, ax112, ax113, ax114]
-                ax21_list = [ax211, ax212, ax213, ax214]
-                ax12_list = [ax121, ax122, ax123, ax124]
-                ax22_list = [ax221, ax222, ax223, ax224]
-            else:
-                f, ((ax111, ax112),
-                 (ax121, ax122),
-                 (ax113, ax114),
-                 (ax123, ax124)) = figure.subplots(4, 2)
-                f.subplots_adjust(wspace=0.2, hspace=0.5)
-                f.set_size_inches(25, 17)
-                ax11_list = [ax111, ax112, ax113, ax114]
-                ax21_list = [None,  None,  None,  None]
-                ax12_list = [ax121, ax122, ax123, ax124]
-                ax22_list = [None,  None,  None,  None]
+    # pyplot keeps the current figure in global state, so drawing and
+    # saving is done by one thread at a time.
+    with PYPLOT_LOCK:
+        ax11 = ax12 = ax21 = ax22 = None
+        good_dist = None
+
+        if dist_fit == 'None':
+            # Set up one subplot.
+            ax11 = figure.subplots(1, 1)[0][0]
+            draw_base_histogram(ax11, signal, bins, x_range, x_range,
+                                logy, signal_label, fault_limits)
         else:
-            # self.find_dist_fit returned something other than one or four
-            # distributions. Panic mode.
-            raise ValueError(
-                'Incorrect return value from self.find_dist_fit()')
-
-        # Draw all subplots for each distribution.
-        for ax11, ax12, ax21, ax22, (dist, dist_name, p) in zip(
-                ax11_list, ax12_list, ax21_list, ax22_list, distributions):
-
-            # Draw left-most subplots
-            if signal.size:
-                ax11_x_range = grow_range(
-                    (signal.min(), signal.max()), 1.6)
+            # For each returned distribution, set up two or four subplots
+            # depending on whether there are any fault limits.
+            if len(distributions) == 1:
+                good_dist = distributions[0]
+                if fault_limits:
+                    f, ((ax11, ax21),
+                     (ax12, ax22)) = figure.subplots(2, 2)
+                    f.subplots_adjust(wspace=0.2, hspace=0.5)
+                    f.set_size_inches(25, 17)
+                    ax11_list = [ax11]
+                    ax21_list = [ax21]
+                    ax12_list = [ax12]
+                    ax22_list = [ax22]
+                else:
+                    f, ((ax11,),
+                     (ax12,)) = figure.subplots(2, 1)
+                    f.subplots_adjust(wspace=0.2, hspace=0.5)
+                    f.set_size_inches(25, 17)
+                    ax11_list = [ax11]
+                    ax21_list = [None]
+                    ax12_list = [ax12]
+                    ax22_list = [None]
+            elif len(distributions) == 4:
+                if fault_limits:
+                    f, ((ax111, ax211, ax112, ax212),
+                     (ax121, ax221, ax122, ax222),
+                     (ax113, ax213, ax114, ax214),
+                     (ax123, ax223, ax124, ax224)) = figure.subplots(4, 4)
+                    f.subplots_adjust(wspace=0.2, hspace=0.5)
+                    f.set_size_inches(25, 17)
+                    ax11_list = [ax111, ax112, ax113, ax114]
+                    ax21_list = [ax211, ax212, ax213, ax214]
+                    ax12_list = [ax121, ax122, ax123, ax124]
+                    ax22_list = [ax221, ax222, ax223, ax224]
+                else:
+                    f, ((ax111, ax112),
+                     (ax121, ax122),
+                     (ax113, ax114),
+                     (ax123, ax124)) = figure.subplots(4, 2)
+                    f.subplots_adjust(wspace=0.2, hspace=0.5)
+                    f.set_size_inches(25, 17)
+                    ax11_list = [ax111, ax112, ax113, ax114]
+                    ax21_list = [None,  None,  None,  None]
+                    ax12_list = [ax121, ax122, ax123, ax124]
+                    ax22_list = [None,  None,  None,  None]
             else:
-                ax11_x_range = (0, 1)
-            draw_base_histogram(
-                ax11, signal, bins, x_range, ax11_x_range, logy,
-                signal_label, fault_limits)
-            draw_pdf(
-                ax11, signal, bins, dist, ax11_x_range, percentiles, logy)
-            draw_prob_plot(
-                ax12, signal, dist, ax11_x_range, dist_name, p,
-                signal_label)
-
-            # Rightmost subplots only exist in some circumstances:
-            if ax21 is not None:
+                # self.find_dist_fit returned something other than one or four
+                # distributions. Panic mode.
+                raise ValueError(
+                    'Incorrect return value from self.find_dist_fit()')
+
+            # Draw all subplots for each distribution.
+            for ax11, ax12, ax21, ax22, (dist, dist_name, p) in zip(
+                    ax11_list, ax12_list, ax21_list, ax22_list, distributions):
+
+                # Draw left-most subplots
+                if signal.size:
+                    ax11_x_range = grow_range(
+                        (signal.min(), signal.max()), 1.6)
+                else:
+                    ax11_x_range = (0, 1)
                 draw_base_histogram(
-                    ax21, signal, bins, x_range, x_range, logy,
+                    ax11, signal, bins, x_range, ax11_x_range, logy,
                     signal_label, fault_limits)
                 draw_pdf(
-                    ax21, signal, bins, dist, x_range, percentiles, logy)
-            if ax22 is not None:
-                draw_alpha_beta_plot(ax22, dist, fault_limits)
-
-        # Set up the meta data to be shown on the side of the plot.
-        texts = [outside_range_text(x=(signal, x_range))]
-
-        # Descriptive statistics
-        if signal.size:
-            if good_dist is not None:
+                    ax11, signal, bins, dist, ax11_x_range, percentiles, logy)
+                draw_prob_plot(
+                    ax12, signal, dist, ax11_x_range, dist_name, p,
+                    signal_label)
+
+                # Rightmost subplots only exist in some circumstances:
+                if ax21 is not None:
+                    draw_base_histogram(
+                        ax21, signal, bins, x_range, x_range, logy,
+                        signal_label, fault_limits)
+                    draw_pdf(
+                        ax21, signal, bins, dist, x_range, percentiles, logy)
+                if ax22 is not None:
+                    draw_alpha_beta_plot(ax22, dist, fault_limits)
+
+            # Set up the meta data to be shown on the side of the plot.
+            texts = [outside_range_text(x=(signal, x_range))]
+
+            # Descriptive statistics
+            if signal.size:
+                if good_dist is not None:
+                    dist = good_dist[0]
+                    desc_stat_text = (
+                        "<b>Descriptive statistics:</b><br>\n"
+                        "<b>Mean:</b> {mean:.3f} (dist)<br>\n"
+                        "<b>Std:</b> {std:.3f} (dist)<br>\n"
+                        "<b>Min:</b> {min:.3f}<br>\n"
+                        "<b>Max:</b> {max:.3f}<br>\n").format(
+                        mean=dist.mean(), min=signal.min(), max=signal.max(),
+                        std=dist.std())
+                    texts.append(desc_stat_text)
+                else:
+                    desc_stat_text = (
+                        "<b>Descriptive statistics:</b><br>\n"
+                        "<b>Mean:</b> {:.3f}<br>\n"
+                        "<b>Std:</b> {:.3f}<br>\n"
+                        "<b>Min:</b> {:.3f}<br>\n"
+                        "<b>Max:</b> {:.3f}<br>\n").format(
+                        signal.mean(), signal.min(), signal.max(),
+                        signal.std())
+                    texts.append(desc_stat_text)
+
+            # Percentiles
+            if good_dist is not None and percentiles:
                 dist = good_dist[0]
-                desc_stat_text = (
-                    "<b>Descriptive statistics:</b><br>\n"
-                    "<b>Mean:</b> {mean:.3f} (dist)<br>\n"
-                    "<b>Std:</b> {std:.3f} (dist)<br>\n"
-                    "<b>Min:</b> {min:.3f}<br>\n"
-                    "<b>Max:</b> {max:.3f}<br>\n").format(
-                    mean=dist.mean(), min=signal.min(), max=signal.max(),
-                    std=dist.std())
-                texts.append(desc_stat_text)
-            else:
-                desc_stat_text = (
-                    "<b>Descriptive statistics:</b><br>\n"
-                    "<b>Mean:</b> {:.3f}<br>\n"
-                    "<b>Std:</b> {:.3f}<br>\n"
-                    "<b>Min:</b> {:.3f}<br>\n"
-                    "<b>Max:</b> {:.3f}<br>\n").format(
-                    signal.mean(), signal.min(), signal.max(),
-                    signal.std())
-                texts.append(desc_stat_text)
-
-        # Percentiles
-        if good_dist is not None and percentiles:
-            dist = good_dist[0]
-            percentiles_texts = "<br>\n".join([
-                                                  "<b>{}:</b> {:.4f}".format(
-                                                      percentile, dist.ppf(percentile/100.))
-                                                  for percentile in percentiles])
-            percentiles_text = "<b>Percentiles:</b><br>{}<br>\n".format(
-                percentiles_texts)
-            texts.append(percentiles_text)
-
-        # Fault limits
-        if fault_limits:
-            fault_limits_lines = []
-            for fl in fault_limits:
-                # TODO: distributions isn't always initialized here
-                for dist, dist_name, p in distributions:
-                    line = "<b>{}:</b> {:.4f} / {:.4f} ({})".format(
-                        fl, dist.cdf(fl), dist.sf(fl), dist_name)
-                    fault_limits_lines.append(line)
-            fault_limits_text = "<b>Fault limits:</b><br>{}<br>\n".format(
-                "<br>\n".join(fault_limits_lines))
-            texts.append(fault_limits_text)
-
-        # Warning if no distribution fits
-        if good_dist is None:
-            texts.append("<i><b>Warning:</b> All tested distributions were "
-                         "rejected at &alpha; &lt; {}. The four best fitting "
-                         "distributions are shown instead.</i>".format(
-                ALPHA_LIMIT))
-
-        text = "<br>\n".join(texts)
-        missing_text = missing_signals_text(data_adafs, (signal_name,))
-        alias_text = aliases_text(data_adafs, (signal_name,))
-
-        for i, data_adaf in enumerate(data_adafs):
-            add_dataset_meta(data_adaf, 'missing_text', missing_text)
-            add_dataset_meta(data_adaf, 'alias_text', alias_text)
-            add_dataset_meta(data_adaf, 'extra_text', text)
-
-        # save plots
-        plots_name = "B_KatDiagnos_Dist fit_input.png"
-        file_path = os.path.join(out_dir, plots_name)
-        figure.savefig(file_path, dpi=100)
+                percentiles_texts = "<br>\n".join([
+                                                      "<b>{}:</b> {:.4f}".format(
+                                                          percentile, dist.ppf(percentile/100.))
+                                                      for percentile in percentiles])
+                percentiles_text = "<b>Percentiles:</b><br>{}<br>\n".format(
+                    percentiles_texts)
+                texts.append(percentiles_text)
+
+            # Fault limits
+            if fault_limits:
+                fault_limits_lines = []
+                for fl in fault_limits:
+                    # TODO: distributions isn't always initialized here
+                    for dist, dist_name, p in distributions:
+                        line = "<b>{}:</b> {:.4f} / {:.4f} ({})".format(
+                            fl, dist.cdf(fl), dist.sf(fl), dist_name)
+                        fault_limits_lines.append(line)
+                fault_limits_text = "<b>Fault limits:</b><br>{}<br>\n".format(
+                    "<br>\n".join(fault_limits_lines))
+                texts.append(fault_limits_text)
+
+            # Warning if no distribution fits
+            if good_dist is None:
+                texts.append("<i><b>Warning:</b> All tested distributions were "
+                             "rejected at &alpha; &lt; {}. The four best fitting "
+                             "distributions are shown instead.</i>".format(
+                    ALPHA_LIMIT))
+
+            text = "<br>\n".join(texts)
+            missing_text = missing_signals_text(data_adafs, (signal_name,))
+            alias_text = aliases_text(data_adafs, (signal_name,))
+
+            for i, data_adaf in enumerate(data_adafs):
+                add_dataset_meta(data_adaf, 'missing_text', missing_text)
+                add_dataset_meta(data_adaf, 'alias_text', alias_text)
+                add_dataset_meta(data_adaf, 'extra_text', text)
+
+            # save plots
+            plots_name = "B_KatDiagnos_Dist fit_input.png"
+            file_path = os.path.join(out_dir, plots_name)
+            figure.savefig(file_path, dpi=100)
 
@@ -13,6 +13,10 @@ def create_subsets(adaf_objs):
     subsets_list = []
     for field0, subset in subsets.items():
         for adaf_obj in subset:
-            adaf_obj.meta.create_column("DATASET_subgroup", np.array(["FILENAME_field_0: {}".format(field0)]))
+            add_subset_meta(adaf_obj, field0)
         subsets_list.append(subset)
     return subsets_list
+
+
+def add_subset_meta(adaf_obj, field0):
+    adaf_obj.meta.create_column("DATASET_subgroup", np.array(["FILENAME_field_0: {}".format(field0)]))
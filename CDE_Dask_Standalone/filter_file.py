@@ -14,26 +14,34 @@ def filter_file(adaf_objs):
 
     ## update meta
     for adaf_obj in filterd_adafs:
-        adaf_obj.meta.create_column("DATASET_filter_filecount", np.array([len(filterd_adafs)]))
-        adaf_obj.meta.create_column("DATASET_total_filecount", np.array([len(adaf_objs)]))
+        add_filter_meta(adaf_obj, len(filterd_adafs), len(adaf_objs))
 
     ## output filter log to output dir
     log(filterd_adafs)
     return filterd_adafs
 
 
+def add_filter_meta(adaf_obj, filter_filecount, total_filecount):
+    adaf_obj.meta.create_column("DATASET_filter_filecount", np.array([filter_filecount]))
+    adaf_obj.meta.create_column("DATASET_total_filecount", np.array([total_filecount]))
+
+
 def log(filterd_adafs):
+    if not filterd_adafs:
+        return
+    data_name_list = [adaf_obj.meta["DATA_Name"].value()[0] for adaf_obj in filterd_adafs]
+    output_dir = filterd_adafs[0].meta["DATASET_Output_Path"].value()[0]
+    write_log(data_name_list, output_dir)
+
+
+def write_log(data_name_list, output_dir):
     log_msg = \
 """Selected Meta Filter:
 AllData
 *********************************
 Running CDE for files:
 {}"""
-    if not filterd_adafs:
-        return
-    data_name_list = [adaf_obj.meta["DATA_Name"].value()[0] for adaf_obj in filterd_adafs]
     log_content = log_msg.format("\n".join(data_name_list))
-    output_dir = filterd_adafs[0].meta["DATASET_Output_Path"].value()[0]
     log_path = os.path.join(os.path.abspath(output_dir), "FilterInfo.txt")
     with open(log_path, 'w') as f:
         f.write(log_content)
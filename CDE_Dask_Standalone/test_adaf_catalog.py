@@ -0,0 +1,120 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+import adaf_catalog
+from sympathy.api import adaf
+
+
+def create_adaf(vin, date, time, field0, start=0.0, engine=True):
+    adaf_obj = adaf.File()
+    adaf_obj.meta.create_column('VIN_Number', np.array([vin]))
+    adaf_obj.meta.create_column('MDF_date', np.array([date]))
+    adaf_obj.meta.create_column('MDF_time', np.array([time]))
+    adaf_obj.meta.create_column('FILENAME_field_0', np.array([field0]))
+    adaf_obj.res.create_column('count', np.array([3], dtype=np.int64))
+
+    raster = adaf_obj.sys.create('system0').create('raster0')
+    raster.create_basis(np.arange(5, dtype=float) + start, {'unit': 's'})
+    raster.create_signal('float', np.linspace(0, 1, 5), {'unit': 'V'})
+    if engine:
+        raster.create_signal('CoEng_st', np.array([0, 3, 3, 3, 0]))
+    return adaf_obj
+
+
+class CatalogTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.catalog = adaf_catalog.Catalog(
+            os.path.join(self.directory, 'catalog.db'))
+        self.paths = [
+            self.write('a.sydata', create_adaf(
+                'YV1A', '02:01:2016', '10:00:00', 'x')),
+            self.write('b.sydata', create_adaf(
+                'YV1B', '01:01:2016', '10:00:00', 'y', start=10.0,
+                engine=False)),
+            self.write('c.sydata', create_adaf(
+                'YV1A', '01:01:2016', '09:00:00', 'x', start=20.0))]
+
+    def tearDown(self):
+        self.catalog.close()
+        shutil.rmtree(self.directory)
+
+    def write(self, name, adaf_obj):
+        filename = os.path.join(self.directory, name)
+        with adaf.File(filename=filename, mode='w', source=adaf_obj):
+            pass
+        return filename
+
+    def test_inventory(self):
+        updated, failed = self.catalog.update_directory(self.directory)
+        self.assertEqual(updated, self.paths)
+        self.assertEqual(failed, [])
+        self.assertEqual(
+            self.catalog.columns(self.paths[0]),
+            [('FILENAME_field_0', '|S1', 1, 'x'),
+             ('MDF_date', '|S10', 1, '02:01:2016'),
+             ('MDF_time', '|S8', 1, '10:00:00'),
+             ('VIN_Number', '|S4', 1, 'YV1A')])
+        self.assertEqual(self.catalog.columns(self.paths[0], 'res'),
+                         [('count', '<i8', 1, 3)])
+        self.assertEqual(self.catalog.rasters(self.paths[1]),
+                         [('system0', 'raster0', 5, 10.0, 14.0)])
+        self.assertEqual(
+            self.catalog.signals(self.paths[0]),
+            [('system0', 'raster0', 'CoEng_st', np.dtype(int).str, ''),
+             ('system0', 'raster0', 'float', '<f8', 'V')])
+
+    def test_queries(self):
+        self.catalog.update(self.paths)
+        a, b, c = self.paths
+        self.assertEqual(self.catalog.files({'VIN_Number': 'YV1A'}), [a, c])
+        self.assertEqual(
+            self.catalog.files({'VIN_Number': ['YV1A', 'YV1B']},
+                               order_by=['MDF_time', 'MDF_date']),
+            [c, b, a])
+        self.assertEqual(self.catalog.files(signals=['CoEng_st']), [a, c])
+        self.assertEqual(self.catalog.files(time_range=(12, 21)), [b, c])
+        self.assertEqual(self.catalog.files({'count': 3}, group='res'),
+                         [a, b, c])
+        self.assertEqual(
+            self.catalog.group_by('FILENAME_field_0').items(),
+            [('x', [a, c]), ('y', [b])])
+        self.assertEqual(adaf_catalog.subsets(self.catalog), [[c, a], [b]])
+        self.assertEqual(adaf_catalog.subsets(self.catalog, [a, b]),
+                         [[b], [a]])
+
+    def test_incremental(self):
+        self.catalog.update(self.paths)
+        self.assertEqual(self.catalog.update(self.paths), ([], []))
+
+        a = self.paths[0]
+        self.write('a.sydata', create_adaf(
+            'YV1C', '02:01:2016', '10:00:00', 'x'))
+        stat = os.stat(a)
+        os.utime(a, (stat.st_atime, stat.st_mtime + 10))
+        self.assertEqual(self.catalog.update(self.paths), ([a], []))
+        self.assertEqual(self.catalog.values('VIN_Number').values(),
+                         ['YV1C', 'YV1B', 'YV1A'])
+
+        os.remove(self.paths[1])
+        self.catalog.update_directory(self.directory)
+        self.assertEqual(self.catalog.paths(),
+                         [self.paths[0], self.paths[2]])
+
+    def test_invalid(self):
+        filename = os.path.join(self.directory, 'invalid.sydata')
+        with open(filename, 'w') as f:
+            f.write('invalid')
+        updated, failed = self.catalog.update_directory(self.directory)
+        self.assertEqual(updated, self.paths)
+        self.assertEqual(failed, [filename])
+        self.assertNotIn(filename, self.catalog.paths())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,186 @@
+import os
+import json
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+import dask
+
+import cde_dask
+import vehical_config
+from sympathy.api import adaf
+
+
+def create_adaf(data_name, field0, output_dir):
+    adaf_obj = adaf.File()
+    adaf_obj.meta.create_column('DATA_Name', np.array([data_name]))
+    adaf_obj.meta.create_column('FILENAME_field_0', np.array([field0]))
+    adaf_obj.meta.create_column('DATASET_Output_Path', np.array([output_dir]))
+    return adaf_obj
+
+
+def create_data_adaf(data_name, field0, output_dir, vin, time, data):
+    adaf_obj = create_adaf(data_name, field0, output_dir)
+    adaf_obj.meta.create_column('VIN_Number', np.array([vin]))
+    adaf_obj.meta.create_column('MDF_date', np.array(['01:02:2016']))
+    adaf_obj.meta.create_column('MDF_time', np.array([time]))
+    raster = adaf_obj.sys.create('system0').create('Resampled raster 0.1')
+    raster.create_basis(np.arange(len(data)) * 0.1)
+    raster.create_signal(cde_dask.SIGNAL_NAME, data)
+    raster.create_signal('CoEng_st', np.full(len(data), 3))
+    return adaf_obj
+
+
+class ExcelFile(object):
+    """Stands in for pd.ExcelFile, so that no Excel reader is needed."""
+
+    def __init__(self, filename):
+        pass
+
+    def parse(self, sheet):
+        return pd.DataFrame({
+            'VIN': ['YV1A000001'], 'date': [pd.Timestamp('2016-01-01')],
+            'engine': ['D4'], 'transmission': ['manual'],
+            'Reg No': ['ABC123']})
+
+
+def partial(subset, data):
+    signal_statistics = cde_dask.SignalStatistics()
+    signal_statistics.add_data(data)
+    return {subset: signal_statistics}
+
+
+class GraphTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, data_name, field0):
+        filename = os.path.join(self.directory, data_name + '.sydata')
+        with adaf.File(filename=filename, mode='w', source=create_adaf(
+                data_name, field0, self.directory)):
+            pass
+        return filename
+
+    def test_files(self):
+        dat_list = [os.path.join(self.directory, name)
+                    for name in ['a.dat', 'b.dat', 'c.dat']]
+        subsets = cde_dask.build_subsets(
+            cde_dask.build_files(dat_list, self.directory, self.directory))
+        dsk, keys = cde_dask.optimize([subsets])
+        # One fused task for each file and one grouping them.
+        self.assertEqual(len(dsk), len(dat_list) + 1)
+        # None of the files can be imported.
+        [result] = cde_dask.compute([subsets], scheduler='sync')
+        self.assertEqual(result, ([], 0, 0))
+
+    def test_subsets(self):
+        a = self.write('a', 'x')
+        b = self.write('b', 'y')
+        c = self.write('c', 'x')
+        for scheduler in ['sync', 'threads']:
+            [result] = cde_dask.compute([cde_dask.build_subsets(
+                [dask.delayed(a), None, b, dask.delayed(c)])],
+                scheduler=scheduler)
+            self.assertEqual(result, ([[a, c], [b]], 3, 3))
+        with open(os.path.join(self.directory, 'FilterInfo.txt')) as f:
+            self.assertEqual(f.read().splitlines()[-3:], ['a', 'b', 'c'])
+
+    def test_evaluation(self):
+        evaluations = cde_dask.build_evaluation(
+            [['a', 'c'], ['b']], 3, 3, self.directory)
+        dsk, keys = cde_dask.optimize(evaluations)
+        # One task for each subset.
+        self.assertEqual(len(dsk), 2)
+        self.assertEqual(sorted(dsk), sorted(keys))
+
+    def test_evaluate(self):
+        config_filename = os.path.join(self.directory, 'vehicle_config.xlsx')
+        with open(config_filename, 'w'):
+            pass
+        excel_file = pd.ExcelFile
+        config_file = vehical_config.vehical_config_file
+        pd.ExcelFile = ExcelFile
+        vehical_config.vehical_config_file = config_filename
+        try:
+            subsets = []
+            for field0 in ['x', 'y']:
+                output_dir = os.path.join(self.directory, field0)
+                os.mkdir(output_dir)
+                filenames = []
+                for time in ['11:00:00', '10:00:00']:
+                    data_name = field0 + time.replace(':', '')
+                    filename = os.path.join(output_dir, data_name + '.sydata')
+                    with adaf.File(filename=filename, mode='w',
+                                   source=create_data_adaf(
+                                       data_name, field0, output_dir,
+                                       'YV1A??????', time,
+                                       np.linspace(0, 1, 50))):
+                        pass
+                    filenames.append(filename)
+                subsets.append(filenames)
+            # Each subset to its own directory, evaluated in parallel.
+            evaluations = [
+                dask.delayed(cde_dask.evaluate)(
+                    filenames, 4, 4, os.path.dirname(filenames[0]))
+                for filenames in subsets]
+            cde_dask.compute(evaluations, scheduler='threads',
+                             num_workers=2)
+        finally:
+            pd.ExcelFile = excel_file
+            vehical_config.vehical_config_file = config_file
+            vehical_config._config_cache.clear()
+        for filenames in subsets:
+            self.assertTrue(os.path.isfile(os.path.join(
+                os.path.dirname(filenames[0]),
+                'B_KatDiagnos_Dist fit_input.png')))
+
+    def test_write_statistics(self):
+        statistics = cde_dask.merge_statistics([
+            partial('y', np.array([0.5, np.nan, 1.5])),
+            partial('x', np.array([-0.5])),
+            partial('y', np.array([2.5]))])
+        filename = cde_dask.write_statistics(statistics, self.directory)
+        self.assertEqual(
+            filename,
+            os.path.join(self.directory, cde_dask.STATISTICS_NAME))
+        with open(filename) as f:
+            result = json.load(f)
+        self.assertEqual(sorted(result), ['x', 'y'])
+        self.assertEqual(result['y']['Count'], 3)
+        self.assertEqual(result['y']['Min'], 0.5)
+        self.assertEqual(result['y']['Max'], 2.5)
+        self.assertAlmostEqual(result['y']['Mean'], 1.5)
+        self.assertEqual(result['y']['Range'], list(cde_dask.BINS_RANGE))
+        self.assertEqual(sum(result['y']['Histogram']), 3)
+        self.assertEqual(len(result['x']['Histogram']), cde_dask.BINS)
+
+    def test_statistics(self):
+        data = [np.linspace(-2, 4, 100 + i) for i in range(20)]
+        partials = [dask.delayed(partial)('xy'[i % 2], d)
+                    for i, d in enumerate(data)]
+        statistics = cde_dask.tree_reduce(
+            partials, cde_dask.merge_statistics, split_every=8)
+        dsk, keys = cde_dask.optimize([statistics])
+        # 20 partials merged by 3 and then by 1 task.
+        self.assertEqual(len(dsk), 20 + 3 + 1)
+        [result] = cde_dask.compute([statistics], scheduler='sync')
+        for subset, start in [('x', 0), ('y', 1)]:
+            expected = partial(
+                subset, np.concatenate(data[start::2]))[subset].value()
+            value = result[subset].value()
+            self.assertEqual(list(value), list(expected))
+            for name in ['Count', 'Min', 'Max']:
+                self.assertEqual(value[name], expected[name])
+            self.assertAlmostEqual(value['Mean'], expected['Mean'])
+            self.assertTrue(np.array_equal(value['Histogram'],
+                                           expected['Histogram']))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+
+import numpy as np
+
+import cde_plot
+
+
+class AccumulatorTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.chunks = [np.array([3.0, -1.0, 4.0]), np.array([]),
+                       np.array([1.0, 5.0, 9.0, 2.0, 6.0]), np.array([5.0])]
+        self.data = np.concatenate(self.chunks)
+
+    def accumulate(self, cls, chunks):
+        accumulator = cls()
+        for chunk in chunks:
+            accumulator.add_data(chunk)
+        return accumulator
+
+    def test_values(self):
+        values = dict(
+            (name, self.accumulate(cls, self.chunks).value())
+            for name, cls in cde_plot.REDUCE_FUNCTION.items()
+            if name != 'Median')
+        self.assertEqual(values['Count'], self.data.size)
+        self.assertEqual(values['Min'], self.data.min())
+        # The first chunk seeds the maximum with its maximum.
+        self.assertEqual(values['Max'], self.data.max())
+        # Weighted by the number of samples in each chunk.
+        self.assertAlmostEqual(values['Mean'], self.data.mean())
+
+    def test_max_first_chunk(self):
+        accumulator = self.accumulate(
+            cde_plot.MaxAccumulator, [np.array([1.0, 7.0])])
+        self.assertEqual(accumulator.value(), 7.0)
+
+    def test_empty(self):
+        self.assertEqual(
+            self.accumulate(cde_plot.CountAccumulator, [np.array([])])
+            .value(), 0)
+        self.assertIsNone(
+            self.accumulate(cde_plot.MinAccumulator, [np.array([])]).value())
+        self.assertIsNone(
+            self.accumulate(cde_plot.MaxAccumulator, [np.array([])]).value())
+
+    def test_merge(self):
+        for name, cls in cde_plot.REDUCE_FUNCTION.items():
+            if name == 'Median':
+                continue
+            merged = self.accumulate(cls, self.chunks[:2])
+            merged.merge(self.accumulate(cls, self.chunks[2:]))
+            merged.merge(cls())
+            self.assertAlmostEqual(
+                merged.value(), self.accumulate(cls, self.chunks).value(),
+                msg=name)
+
+    def test_merge_median(self):
+        chunks = [np.array([3.0, 1.0]), np.array([4.0, 2.0]),
+                  np.array([9.0, 5.0])]
+        merged = self.accumulate(cde_plot.MedianAccumulator, chunks[:1])
+        merged.merge(self.accumulate(cde_plot.MedianAccumulator, chunks[1:]))
+        self.assertEqual(merged.value(), 3.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,9 +1,15 @@
+import os
 import datetime
 import numpy as np
 import pandas as pd
 import time
 vehical_config_file = "vehicle_config.xlsx"
 
+# Parsed config files by path, with the mtime they were parsed at.
+_config_cache = {}
+# Last config and the VinMatcher built for it.
+_matcher_cache = [None, None]
+
 
 def vehical_config(adaf_objs):
 
@@ -16,9 +22,19 @@ def vehical_config(adaf_objs):
 
 
 
-def get_config():
+def get_config(filename=None):
+    """
+    Return the parsed config, the file is only parsed again when its mtime
+    has changed since it was last parsed.
+    """
+    filename = os.path.abspath(filename or vehical_config_file)
+    mtime = os.path.getmtime(filename)
+    cached = _config_cache.get(filename)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
     # load the config file
-    xls_config = pd.ExcelFile(vehical_config_file)
+    xls_config = pd.ExcelFile(filename)
     config = xls_config.parse('Sheet1')
 
     # convert datatime to date
@@ -32,6 +48,7 @@ def get_config():
         new_groups.append(group_)
     config = pd.concat(new_groups)
     config = config.sort_values(by='date')
+    _config_cache[filename] = (mtime, config)
     return config
 
 
@@ -65,21 +82,70 @@ def update_meta(adaf_objs, matched_list):
 
 
 def look_up(adaf_objs, config):
+    matcher = get_matcher(config)
     matched_list = []
     for adaf_obj in adaf_objs:
         adaf_vin = adaf_obj.meta["VIN_Number"].value()[0]
-        found = False
-        for index, row in config.iterrows():
-            config_vin = row["VIN"]
-            if is_vin_match(adaf_vin, config_vin):
-                matched_list.append(row)
-                found = True
-                break
-        if not found:
-            matched_list.append(None)
+        matched_list.append(match_row(matcher, adaf_vin, config))
     return matched_list
 
 
+def match_row(matcher, adaf_vin, config):
+    """Return the first config row matching adaf_vin or None."""
+    position = matcher.match(adaf_vin)
+    if position is None:
+        return None
+    return config.iloc[position]
+
+
+def get_matcher(config):
+    """Return VinMatcher for config, reusing the one built last time."""
+    if _matcher_cache[0] is not config:
+        _matcher_cache[:] = [config, VinMatcher(config["VIN"])]
+    return _matcher_cache[1]
+
+
+class VinMatcher(object):
+    """
+    Compiled lookup of VINs against the VIN column of the config.
+
+    As in is_vin_match, '?' in the looked up VIN matches any character and
+    the looked up VIN is compared with the start of the config VIN. The config
+    VINs are indexed once per wildcard pattern, the positions that are not
+    '?', by their characters at those positions. After the first VIN with a
+    given pattern, a lookup is a single dict lookup. Only the first matching
+    row is kept for each key, so the config order decides between rows that
+    match the same VIN. Config VINs that are too short to compare are never
+    matched.
+    """
+
+    def __init__(self, config_vins):
+        self._config_vins = [str(config_vin) for config_vin in config_vins]
+        self._indices = {}
+
+    def _build_index(self, positions):
+        index = {}
+        for position, config_vin in enumerate(self._config_vins):
+            if positions and positions[-1] >= len(config_vin):
+                continue
+            key = ''.join(config_vin[i] for i in positions)
+            index.setdefault(key, position)
+        return index
+
+    def match(self, adaf_vin):
+        """
+        Return the position of the first config row matching adaf_vin or
+        None.
+        """
+        positions = tuple(
+            i for i, char in enumerate(adaf_vin) if char != '?')
+        index = self._indices.get(positions)
+        if index is None:
+            index = self._build_index(positions)
+            self._indices[positions] = index
+        return index.get(''.join(adaf_vin[i] for i in positions))
+
+
 def is_vin_match(adaf_vin, config_vin):
     adaf_vin_list = list(adaf_vin)
     config_vin_list = list(str(config_vin))
@@ -0,0 +1,266 @@
+"""
+Compact columnar wire format for ADAF objects.
+
+Used to pass ADAFs between Spark stages without pickling the object graph of
+adaf.File. An encoded ADAF is a single byte string:
+
+    magic (8 bytes) | header length (uint64, little endian) | header (JSON)
+    | padding | column buffers
+
+The header describes meta, res and, for each system and raster, the basis
+and signals: names, attributes, dtypes, lengths and the offset of each
+column in the buffer section. Every column buffer is the raw contiguous
+array data, aligned to 8 bytes, so decoding only creates numpy views into the
+byte string.
+"""
+import json
+import struct
+import datetime
+import cPickle
+import time
+
+import numpy as np
+
+from sympathy.api import adaf
+
+MAGIC = b'SYADAFC1'
+VERSION = 1
+_prefix = struct.Struct('<8sQ')
+_align = 8
+
+
+def _json_default(value):
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError('Can not encode attribute: {!r}'.format(value))
+
+
+class _Writer(object):
+    """Collects column buffers and returns their header entries."""
+
+    def __init__(self):
+        self.chunks = []
+        self.offset = 0
+
+    def column(self, name, array, attributes):
+        array = np.ascontiguousarray(array)
+        if array.dtype.hasobject:
+            raise ValueError(
+                'Can not encode object column: {}'.format(name))
+        data = array.tobytes()
+        entry = {'name': name,
+                 'dtype': array.dtype.str,
+                 'length': len(array),
+                 'offset': self.offset,
+                 'attr': attributes}
+        self.chunks.append(data)
+        self.offset += len(data)
+        padding = -self.offset % _align
+        if padding:
+            self.chunks.append(b'\0' * padding)
+            self.offset += padding
+        return entry
+
+
+def _encode_group(writer, group):
+    return {'attr': group.get_attributes(),
+            'columns': [
+                writer.column(name, group[name].value(),
+                              dict(group[name].attr.items()))
+                for name in group.keys()]}
+
+
+def _encode_raster(writer, name, raster):
+    try:
+        basis = raster.basis_column()
+    except KeyError:
+        basis = None
+    if basis is not None:
+        basis = writer.column(
+            None, basis.value(), dict(basis.attr.items()))
+
+    return {'name': name,
+            'attr': dict(raster.attr.items()),
+            'basis': basis,
+            'signals': [
+                writer.column(signal_name, signal.y, signal.get_attributes())
+                for signal_name, signal in raster.items()]}
+
+
+def dumps(adaf_obj):
+    """
+    Encode adaf_obj and return the byte string.
+    :param adaf_obj: adaf.File
+    :return: str
+    """
+    writer = _Writer()
+    header = {
+        'version': VERSION,
+        'meta': _encode_group(writer, adaf_obj.meta),
+        'res': _encode_group(writer, adaf_obj.res),
+        'sys': [{'name': system_name,
+                 'rasters': [
+                     _encode_raster(writer, raster_name, raster)
+                     for raster_name, raster in system.items()]}
+                for system_name, system in adaf_obj.sys.items()]}
+
+    header = json.dumps(header, default=_json_default,
+                        separators=(',', ':')).encode('utf8')
+    header += b' ' * (-(_prefix.size + len(header)) % _align)
+    return b''.join([_prefix.pack(MAGIC, len(header)), header] +
+                    writer.chunks)
+
+
+def _read_header(data):
+    magic, length = _prefix.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError('Not an encoded ADAF')
+    start = _prefix.size
+    header = json.loads(data[start:start + length].decode('utf8'))
+    if header['version'] != VERSION:
+        raise ValueError(
+            'Unsupported version: {}'.format(header['version']))
+    return header, start + length
+
+
+def _array(data, base, entry):
+    # Views into data, no copy is made.
+    return np.frombuffer(data, dtype=np.dtype(str(entry['dtype'])),
+                         count=entry['length'],
+                         offset=base + entry['offset'])
+
+
+def _decode_group(data, base, header, group):
+    for entry in header['columns']:
+        group.create_column(entry['name'], _array(data, base, entry),
+                            entry['attr'] or None)
+    for key, value in header['attr'].items():
+        group.set_attribute(key, value)
+
+
+def _decode(data, adaf_obj):
+    header, base = _read_header(data)
+    _decode_group(data, base, header['meta'], adaf_obj.meta)
+    _decode_group(data, base, header['res'], adaf_obj.res)
+
+    for system_header in header['sys']:
+        system = adaf_obj.sys.create(system_header['name'])
+        for raster_header in system_header['rasters']:
+            raster = system.create(raster_header['name'])
+            basis = raster_header['basis']
+            if basis is not None:
+                raster.create_basis(_array(data, base, basis),
+                                    basis['attr'] or None)
+            for entry in raster_header['signals']:
+                raster.create_signal(entry['name'], _array(data, base, entry),
+                                     entry['attr'] or None)
+            for key, value in raster_header['attr'].items():
+                raster.attr.set(key, value)
+    return adaf_obj
+
+
+def loads(data):
+    """
+    Decode data into a new in-memory adaf.File.
+    :param data: str, as returned by dumps
+    :return: adaf.File
+    """
+    return _decode(data, adaf.File())
+
+
+def write(data, filename):
+    """
+    Decode data straight into a new ADAF file.
+    :param data: str, as returned by dumps
+    :param filename: output filename
+    """
+    with adaf.File(filename=filename, mode='w') as adaf_obj:
+        _decode(data, adaf_obj)
+
+
+def meta(data):
+    """
+    Return the meta columns as a dict of arrays, without decoding the rest.
+    :param data: str, as returned by dumps
+    :return: dict
+    """
+    header, base = _read_header(data)
+    return {entry['name']: _array(data, base, entry)
+            for entry in header['meta']['columns']}
+
+
+def _plain(adaf_obj):
+    """
+    Return adaf_obj as nested dicts of arrays and attributes, the structure
+    that a pickle based transport would ship since adaf.File itself can not
+    be pickled.
+    """
+    def group(group_obj):
+        return {name: (group_obj[name].value(),
+                       dict(group_obj[name].attr.items()))
+                for name in group_obj.keys()}
+
+    def raster(raster_obj):
+        return {'basis': raster_obj.basis_column().value(),
+                'signals': {name: (signal.y, signal.get_attributes())
+                            for name, signal in raster_obj.items()}}
+
+    return {'meta': group(adaf_obj.meta),
+            'res': group(adaf_obj.res),
+            'sys': {system_name: {raster_name: raster(raster_obj)
+                                  for raster_name, raster_obj
+                                  in system.items()}
+                    for system_name, system in adaf_obj.sys.items()}}
+
+
+def bench(adaf_obj, repeat=10):
+    """
+    Compare encoding and decoding adaf_obj with pickling the same content.
+    :param adaf_obj: adaf.File
+    :param repeat: number of repetitions
+    :return: dict of method to seconds per dump and load, and size
+    """
+    def timeit(func, arg):
+        t0 = time.time()
+        for _ in range(repeat):
+            result = func(arg)
+        return (time.time() - t0) / repeat, result
+
+    result = {}
+    dump_time, data = timeit(dumps, adaf_obj)
+    load_time, _ = timeit(loads, data)
+    result['columnar'] = {'dump': dump_time, 'load': load_time,
+                          'size': len(data)}
+
+    dump_time, data = timeit(
+        lambda x: cPickle.dumps(_plain(x), cPickle.HIGHEST_PROTOCOL),
+        adaf_obj)
+    load_time, _ = timeit(cPickle.loads, data)
+    result['pickle'] = {'dump': dump_time, 'load': load_time,
+                        'size': len(data)}
+    return result
+
+
+def _bench_adaf(n_rasters=20, n_signals=50, n_rows=100000):
+    adaf_obj = adaf.File()
+    adaf_obj.meta.create_column('VIN_Number', np.array(['YV1?????????']))
+    system = adaf_obj.sys.create('system0')
+    for i in range(n_rasters):
+        raster = system.create('raster{}'.format(i))
+        raster.create_basis(np.arange(n_rows, dtype=float),
+                            {'unit': 's'})
+        for j in range(n_signals):
+            raster.create_signal('signal{}_{}'.format(i, j),
+                                 np.random.random(n_rows),
+                                 {'unit': 'V', 'description': ''})
+    return adaf_obj
+
+
+if __name__ == '__main__':
+    for method, values in sorted(bench(_bench_adaf()).items()):
+        print('{:10} dump: {:.4f}s load: {:.4f}s size: {} bytes'.format(
+            method, values['dump'], values['load'], values['size']))
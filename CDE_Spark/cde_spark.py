@@ -4,6 +4,7 @@ import time
 
 import numpy as np
 
+import adaf_wire
 import mdf_importer
 from cde_functions_new import ExtractVIN, RemoveETKC, RenameCrankAngleRaster
 from cde_plot import distribution_plot_subsets_spark
@@ -94,18 +95,17 @@ def process_dat_adaf(adaf_obj):
     return new_adaf_obj
 
 
-def saveSydata(adaf_obj):
+def saveSydata(data):
     """
-    dump the final file
-    :param adaf_obj:
+    dump the final file, the adaf is only rebuilt from its wire format here
+    :param data: adaf encoded by adaf_wire.dumps
     :return:
     """
-    out_name = adaf_obj.meta["DATA_Name"].value()[0]
+    out_name = adaf_wire.meta(data)["DATA_Name"][0]
     out_name = out_name.split(".")[0] + ".sydata"
     file_path = os.path.join(bc_output_dir.value, out_name)
 
-    with adaf.File(filename=file_path, mode='w', source=adaf_obj):
-        pass
+    adaf_wire.write(data, file_path)
 
 
 def saveSydata_hdfs(adaf_obj):
@@ -161,7 +161,8 @@ adaf_objs = hdfsFile.map(read_dat_hdfs)\
     .map(process_dat_adaf).map(sort_adaf) \
     .map(vehical_config) \
     .filter(do_filter)\
-    .map(subsetMetaData)
+    .map(subsetMetaData) \
+    .map(adaf_wire.dumps)
 #########################################################Total Time Used: 25.1680002213
 
 # rdd_vehical_config = hdfsFile.map(read_dat_hdfs) \
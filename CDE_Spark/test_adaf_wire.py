@@ -0,0 +1,118 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+import adaf_wire
+from sympathy.api import adaf
+
+
+def create_adaf():
+    adaf_obj = adaf.File()
+    adaf_obj.meta.create_column('VIN_Number', np.array([u'YV1\xe5??????']),
+                                {'description': u'VIN'})
+    adaf_obj.meta.create_column('MDF_date', np.array(['01:02:2016']))
+    adaf_obj.res.create_column('count', np.array([3], dtype=np.int64))
+    adaf_obj.res.create_column(
+        'date', np.array(['2016-02-01T10:00:00'], dtype='datetime64[us]'))
+
+    system = adaf_obj.sys.create('system0')
+    raster = system.create('raster0')
+    raster.create_basis(np.arange(5, dtype=float), {'unit': 's'})
+    raster.create_signal('float', np.linspace(0, 1, 5),
+                         {'unit': 'V', 'description': 'voltage'})
+    raster.create_signal('int', np.arange(5, dtype=np.int32))
+    raster.create_signal('bool', np.array([True, False] * 2 + [True]))
+    raster.create_signal('text', np.array([u'a', u'bb', u'ccc', u'', u'e']))
+    raster.attr.set('comment', 'first raster')
+
+    # Odd sized columns to exercise alignment of later buffers.
+    raster = system.create('raster1')
+    raster.create_basis(np.arange(3, dtype=np.int8))
+    raster.create_signal('bytes', np.array([b'x', b'yy', b'zzz']))
+    raster.create_signal('float', np.ones(3))
+
+    adaf_obj.sys.create('empty')
+    return adaf_obj
+
+
+class RoundTripTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.adaf_obj = create_adaf()
+        self.data = adaf_wire.dumps(self.adaf_obj)
+
+    def assert_columns_equal(self, expected, actual):
+        self.assertEqual(expected.dtype, actual.dtype)
+        np.testing.assert_array_equal(expected, actual)
+
+    def assert_adaf_equal(self, expected, actual):
+        for group in ['meta', 'res']:
+            expected_group = getattr(expected, group)
+            actual_group = getattr(actual, group)
+            self.assertEqual(expected_group.keys(), actual_group.keys())
+            for key in expected_group.keys():
+                self.assert_columns_equal(expected_group[key].value(),
+                                          actual_group[key].value())
+                self.assertEqual(dict(expected_group[key].attr.items()),
+                                 dict(actual_group[key].attr.items()))
+
+        self.assertEqual(expected.sys.keys(), actual.sys.keys())
+        for system_name in expected.sys.keys():
+            expected_system = expected.sys[system_name]
+            actual_system = actual.sys[system_name]
+            self.assertEqual(expected_system.keys(), actual_system.keys())
+            for raster_name in expected_system.keys():
+                expected_raster = expected_system[raster_name]
+                actual_raster = actual_system[raster_name]
+                self.assertEqual(dict(expected_raster.attr.items()),
+                                 dict(actual_raster.attr.items()))
+                self.assert_columns_equal(
+                    expected_raster.basis_column().value(),
+                    actual_raster.basis_column().value())
+                self.assertEqual(expected_raster.keys(), actual_raster.keys())
+                for key in expected_raster.keys():
+                    self.assert_columns_equal(expected_raster[key].y,
+                                              actual_raster[key].y)
+                    self.assertEqual(expected_raster[key].get_attributes(),
+                                     actual_raster[key].get_attributes())
+
+    def test_round_trip(self):
+        self.assert_adaf_equal(self.adaf_obj, adaf_wire.loads(self.data))
+
+    def test_round_trip_twice(self):
+        data = adaf_wire.dumps(adaf_wire.loads(self.data))
+        self.assertEqual(self.data, data)
+
+    def test_alignment(self):
+        header, base = adaf_wire._read_header(self.data)
+        self.assertEqual(base % 8, 0)
+        for system in header['sys']:
+            for raster in system['rasters']:
+                for entry in [raster['basis']] + raster['signals']:
+                    self.assertEqual(entry['offset'] % 8, 0)
+
+    def test_meta(self):
+        meta = adaf_wire.meta(self.data)
+        self.assertEqual(sorted(meta.keys()), ['MDF_date', 'VIN_Number'])
+        self.assertEqual(meta['VIN_Number'][0], u'YV1\xe5??????')
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            adaf_wire.loads(b'\0' * 32)
+
+    def test_write(self):
+        tempdir = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(tempdir, 'out.sydata')
+            adaf_wire.write(self.data, filename)
+            with adaf.File(filename=filename, mode='r') as adaf_obj:
+                self.assert_adaf_equal(self.adaf_obj, adaf_obj)
+        finally:
+            shutil.rmtree(tempdir)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+import vehical_config
+from sympathy.api import adaf
+
+
+CONFIG_VINS = ['YV1A000001', 'YV1A000001', 'YV1B000001', 'YV1A000002X',
+               'YV2A000001', 'YV1A000002', 'XV1A000001']
+
+ADAF_VINS = ['YV1A000001', 'YV1A000002', 'YV1A000003', '??????????',
+             '???A000001', 'YV1?00000?', '????????02', 'YV1B', 'YV1A000002X',
+             'Y?1?0?0?0?', 'XV1A00000?', 'ZV1A000001']
+
+
+def first_match(adaf_vin, config_vins):
+    """Position of the first config VIN matching adaf_vin, by scanning."""
+    for position, config_vin in enumerate(config_vins):
+        if vehical_config.is_vin_match(adaf_vin, config_vin):
+            return position
+    return None
+
+
+def create_config(engines):
+    return pd.DataFrame({
+        'VIN': CONFIG_VINS[:len(engines)],
+        'date': pd.date_range('2016-01-01', periods=len(engines)),
+        'engine': engines,
+        'transmission': ['manual'] * len(engines),
+        'Reg No': ['ABC{}'.format(i) for i in range(len(engines))]})
+
+
+class ExcelFile(object):
+    """Stands in for pd.ExcelFile, parsing returns the next config."""
+
+    configs = []
+    parsed = []
+
+    def __init__(self, filename):
+        self.filename = filename
+
+    def parse(self, sheet):
+        self.parsed.append(self.filename)
+        return self.configs[len(self.parsed) - 1]
+
+
+class VinMatcherTestCase(unittest.TestCase):
+
+    def test_first_match(self):
+        matcher = vehical_config.VinMatcher(CONFIG_VINS)
+        for adaf_vin in ADAF_VINS:
+            self.assertEqual(matcher.match(adaf_vin),
+                             first_match(adaf_vin, CONFIG_VINS), adaf_vin)
+        # Again, from the built indices.
+        for adaf_vin in ADAF_VINS:
+            self.assertEqual(matcher.match(adaf_vin),
+                             first_match(adaf_vin, CONFIG_VINS), adaf_vin)
+
+    def test_look_up(self):
+        config = create_config(range(len(CONFIG_VINS)))
+        adaf_objs = []
+        for adaf_vin in ADAF_VINS:
+            adaf_obj = adaf.File()
+            adaf_obj.meta.create_column('VIN_Number', np.array([adaf_vin]))
+            adaf_objs.append(adaf_obj)
+        rows = vehical_config.look_up(adaf_objs, config)
+        for adaf_vin, row in zip(ADAF_VINS, rows):
+            position = first_match(adaf_vin, CONFIG_VINS)
+            if position is None:
+                self.assertIsNone(row, adaf_vin)
+            else:
+                self.assertEqual(row['engine'], position, adaf_vin)
+
+
+class GetConfigTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, 'vehicle_config.xlsx')
+        with open(self.filename, 'w'):
+            pass
+        self.excel_file = pd.ExcelFile
+        pd.ExcelFile = ExcelFile
+        ExcelFile.configs = [create_config([1.0, np.nan]),
+                             create_config([2.0, 3.0])]
+        ExcelFile.parsed = []
+
+    def tearDown(self):
+        pd.ExcelFile = self.excel_file
+        vehical_config._config_cache.clear()
+        shutil.rmtree(self.directory)
+
+    def test_reload(self):
+        config = vehical_config.get_config(self.filename)
+        self.assertEqual(config['engine'].tolist(), [1.0, 1.0])
+        self.assertIs(vehical_config.get_config(self.filename), config)
+        self.assertEqual(len(ExcelFile.parsed), 1)
+
+        stat = os.stat(self.filename)
+        os.utime(self.filename, (stat.st_atime, stat.st_mtime + 10))
+        config = vehical_config.get_config(self.filename)
+        self.assertEqual(config['engine'].tolist(), [2.0, 3.0])
+        self.assertEqual(len(ExcelFile.parsed), 2)
+        self.assertIs(vehical_config.get_config(self.filename), config)
+
+
+if __name__ == '__main__':
+    unittest.main()
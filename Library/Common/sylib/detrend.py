@@ -0,0 +1,137 @@
+# Copyright (c) 2016, System Engineering Software Society
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither the name of the System Engineering Software Society nor the
+#       names of its contributors may be used to endorse or promote products
+#       derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.
+# IN NO EVENT SHALL SYSTEM ENGINEERING SOFTWARE SOCIETY BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+Polynomial trends and Cook's distance for the detrend nodes.
+
+cooks_distance computes the influence of every sample on the polynomial
+fit from the leverages, the diagonal of the hat matrix, instead of refitting
+the polynomial once for each left out sample. The hat matrix of the
+Vandermonde design matrix V is H = Q Q^T, where V = Q R is its QR
+decomposition, so the leverages are the row sums of Q ** 2. Leaving out
+sample i changes the fitted value of every other sample j by
+H[j, i] * e[i] / (1 - h[i]), where e are the residuals, and since H is
+idempotent the squared changes sum to e[i] ** 2 * h[i] / (1 - h[i]). The
+cost is O(n * p ** 2) for n samples and p coefficients, compared to
+O(n ** 2 * p ** 2) for cooks_distance_loop.
+"""
+import time
+
+import numpy as np
+
+
+def get_trend(tb, ts, detrend_function):
+    """Fit ploynomial to data points. detrend_function index for
+    degree of ploynomial.
+    """
+    poly_coeff = np.polyfit(tb, ts, detrend_function)
+    trend = np.polyval(poly_coeff, tb)
+    return trend
+
+
+def leverages(tb, degree):
+    """
+    Return the diagonal of the hat matrix for a polynomial fit of degree to
+    the points tb.
+    """
+    tb = np.asarray(tb, dtype=float)
+    # Centering and scaling the time basis does not change the space spanned
+    # by the polynomials, but keeps the design matrix well conditioned.
+    scale = np.ptp(tb) / 2.0 if len(tb) else 0
+    x = (tb - tb.mean()) / scale if scale else tb - tb.mean()
+    q, _ = np.linalg.qr(np.vander(x, degree + 1))
+    return np.einsum('ij,ij->i', q, q)
+
+
+def cooks_distance(tb, ts, detrend_function, trend=None):
+    """
+    Calculates cooks distance function.
+
+    The distance for sample i is the sum of squared changes of the fitted
+    values at the other samples when sample i is left out of the fit,
+    divided by the number of coefficients times the mean squared error.
+
+    :return: distances and trend
+    """
+    if trend is None:
+        trend = get_trend(tb, ts, detrend_function)
+    residuals = np.asarray(ts, dtype=float) - trend
+    n = len(residuals)
+    MSE = 1.0 / n * np.sum(residuals ** 2)
+    p = detrend_function + 1
+    h = leverages(tb, detrend_function)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        D = residuals ** 2 * h / ((1 - h) * (p * MSE))
+    return D, trend
+
+
+def cooks_distance_loop(tb, ts, detrend_function, trend=None):
+    """
+    Calculates cooks distance function by refitting the polynomial with
+    each sample left out. Reference for cooks_distance.
+    """
+    if trend is None:
+        trend = get_trend(tb, ts, detrend_function)
+    n = len(ts)
+    MSE = 1.0 / n * np.sum((trend - ts) ** 2)
+    D = np.zeros(n)
+    p = detrend_function + 1
+    for ind in range(n):
+        trend_ind = np.delete(trend, [ind])
+        ts_new = np.delete(ts, [ind])
+        tb_new = np.delete(tb, [ind])
+        trend_new = get_trend(tb_new, ts_new, detrend_function)
+        D[ind] = np.sum((trend_ind - trend_new) ** 2) / (p * MSE)
+    return D, trend
+
+
+def bench(sizes=(1000, 4000, 100000), detrend_function=2, repeat=3):
+    """
+    Time cooks_distance and cooks_distance_loop on signals of each size,
+    the loop is skipped for sizes above 10000.
+
+    :return: list of (size, seconds, loop seconds or None)
+    """
+    random = np.random.RandomState(0)
+
+    def timeit(function, *args):
+        t0 = time.time()
+        for _ in range(repeat):
+            result = function(*args)
+        return (time.time() - t0) / repeat, result
+
+    result = []
+    for size in sizes:
+        tb = np.linspace(0, 100, size)
+        ts = 0.01 * tb ** 2 + random.standard_normal(size)
+        seconds, (D, trend) = timeit(
+            cooks_distance, tb, ts, detrend_function)
+        loop_seconds = None
+        if size <= 10000:
+            loop_seconds, (expected, _) = timeit(
+                cooks_distance_loop, tb, ts, detrend_function, trend)
+            assert np.allclose(D, expected)
+        result.append((size, seconds, loop_seconds))
+    return result
@@ -0,0 +1,437 @@
+# Copyright (c) 2016, System Engineering Software Society
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither the name of the System Engineering Software Society nor the
+#       names of its contributors may be used to endorse or promote products
+#       derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.
+# IN NO EVENT SHALL SYSTEM ENGINEERING SOFTWARE SOCIETY BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+Compile predicate lambdas, as written in the filter nodes, into whole column
+masks.
+
+compile_predicate parses the source of a one argument lambda. If the body
+only uses the recognised forms below, the result has a mask method that
+evaluates the predicate on a whole numpy column at once, instead of calling
+the lambda once per row::
+
+    x > 1, x == 'a', 1 <= x < 5
+    x in C0, x not in [1, 2, 3]
+    x.startswith('a'), x.endswith(('a', 'b')), 'a' in x
+    and, or, not, & and | of the above
+
+Names other than the argument are looked up in env. Predicates that use
+anything else, and columns whose type does not match the constants, are
+left for the caller to evaluate row by row.
+"""
+import ast
+import time
+import numbers
+import operator
+
+import numpy as np
+import pandas
+import six
+
+from . import util
+
+
+_comparisons = {
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge}
+
+_named_constants = {'True': True, 'False': False, 'None': None}
+
+
+class NotVectorizable(Exception):
+    """Raised for predicates that can not be evaluated on whole columns."""
+    pass
+
+
+class _Column(object):
+    """The lambda argument."""
+    pass
+
+
+_column = _Column()
+
+
+def _text(value):
+    """
+    Return value as text if it can be compared to a text column, else None.
+    Byte strings, which string literals are in Python 2, are only accepted
+    if they are ASCII since they compare unequal to all other text.
+    """
+    if isinstance(value, six.text_type):
+        return value
+    if isinstance(value, bytes):
+        try:
+            return value.decode('ascii')
+        except UnicodeDecodeError:
+            pass
+    return None
+
+
+def _scalar(values, value):
+    """Return value in a form that compares like Python with values."""
+    kind = values.dtype.kind
+    if kind in 'biuf':
+        if isinstance(value, numbers.Real):
+            return value
+    elif kind == 'U':
+        value = _text(value)
+        if value is not None:
+            return value
+    elif kind == 'S':
+        if isinstance(value, bytes):
+            return value
+    raise NotVectorizable()
+
+
+def _collection(values, collection):
+    """Return collection as an array of the same kind as values."""
+    if isinstance(collection, (six.string_types, bytes)):
+        # Substring test, x in 'abc'.
+        raise NotVectorizable()
+    if isinstance(collection, np.ndarray):
+        kind = collection.dtype.kind
+        if (kind == values.dtype.kind or
+                kind in 'biuf' and values.dtype.kind in 'biuf'):
+            return collection
+        raise NotVectorizable()
+    try:
+        collection = [_scalar(values, value) for value in collection]
+    except TypeError:
+        raise NotVectorizable()
+    if not collection:
+        return np.array([], dtype=values.dtype)
+    collection = np.array(collection)
+    if values.dtype.kind in 'biuf' and collection.dtype.kind not in 'biuf':
+        raise NotVectorizable()
+    return collection
+
+
+def _text_values(values, *patterns):
+    """Return patterns as the same kind of strings as values."""
+    kind = values.dtype.kind
+    if kind not in 'SU':
+        raise NotVectorizable()
+    return [_scalar(values, pattern) for pattern in patterns]
+
+
+def _characters(values, pattern):
+    """
+    Return the strings in values as a 2D array of character codes, the
+    length of each string and the character codes of pattern.
+
+    Fixed width numpy strings are padded with zeros, so comparing codes
+    works as long as pattern has no zeros itself. This is much faster than
+    the np.char functions which call the string method for each element.
+    """
+    if not values.dtype.isnative:
+        values = values.astype(values.dtype.newbyteorder('='))
+    values = np.ascontiguousarray(values)
+    pattern = _text_values(values, pattern)[0]
+    code = np.uint32 if values.dtype.kind == 'U' else np.uint8
+    width = values.dtype.itemsize // np.dtype(code).itemsize
+    characters = values.view(code).reshape(len(values), width)
+    codes = np.array([pattern]).view(code)[:len(pattern)]
+    if not codes.all():
+        raise NotVectorizable()
+    filled = characters != 0
+    lengths = width - np.argmax(filled[:, ::-1], axis=1)
+    lengths[~filled.any(axis=1)] = 0
+    return characters, lengths, codes
+
+
+def _startswith(values, pattern):
+    characters, lengths, codes = _characters(values, pattern)
+    if len(codes) > characters.shape[1]:
+        return np.zeros(len(values), dtype=bool)
+    return (characters[:, :len(codes)] == codes).all(axis=1)
+
+
+def _endswith(values, pattern):
+    characters, lengths, codes = _characters(values, pattern)
+    start = np.maximum(lengths - len(codes), 0)
+    indices = start[:, np.newaxis] + np.arange(len(codes))
+    indices = np.minimum(indices, characters.shape[1] - 1)
+    return (lengths >= len(codes)) & (
+        characters[np.arange(len(values))[:, np.newaxis], indices] ==
+        codes).all(axis=1)
+
+
+def _find(values, pattern):
+    characters, lengths, codes = _characters(values, pattern)
+    mask = np.zeros(len(values), dtype=bool)
+    if not len(codes):
+        mask[:] = True
+    for offset in range(characters.shape[1] - len(codes) + 1):
+        mask |= (characters[:, offset:offset + len(codes)] ==
+                 codes).all(axis=1)
+    return mask
+
+
+def _check_mask(mask, values):
+    if not (isinstance(mask, np.ndarray) and mask.dtype == bool and
+            mask.shape == values.shape):
+        raise NotVectorizable()
+    return mask
+
+
+class _Compiler(object):
+    """
+    Lower the body of a predicate lambda into a function from column
+    to mask.
+    """
+
+    def __init__(self, argument, env):
+        self._argument = argument
+        self._env = env or {}
+
+    def operand(self, node):
+        """
+        Return the lambda argument marker or the value of a constant
+        operand.
+        """
+        if isinstance(node, ast.Name):
+            if node.id == self._argument:
+                return _column
+            if node.id in self._env:
+                return self._env[node.id]
+            if node.id in _named_constants:
+                return _named_constants[node.id]
+            raise NotVectorizable()
+        elif isinstance(node, ast.Num):
+            return node.n
+        elif isinstance(node, ast.Str):
+            return node.s
+        elif (isinstance(node, ast.UnaryOp) and
+              isinstance(node.op, (ast.USub, ast.UAdd)) and
+              isinstance(node.operand, ast.Num)):
+            if isinstance(node.op, ast.USub):
+                return -node.operand.n
+            return node.operand.n
+        elif isinstance(node, (ast.Tuple, ast.List, ast.Set)):
+            elements = [self.operand(element) for element in node.elts]
+            if any(element is _column for element in elements):
+                raise NotVectorizable()
+            return tuple(elements)
+        elif getattr(ast, 'NameConstant', None) and isinstance(
+                node, ast.NameConstant):
+            return node.value
+        raise NotVectorizable()
+
+    def mask(self, node):
+        """Return function from column to mask for node."""
+        if isinstance(node, ast.BoolOp):
+            return self._combine(
+                np.logical_and if isinstance(node.op, ast.And)
+                else np.logical_or,
+                [self.mask(value) for value in node.values])
+        elif (isinstance(node, ast.BinOp) and
+              isinstance(node.op, (ast.BitAnd, ast.BitOr))):
+            return self._combine(
+                np.logical_and if isinstance(node.op, ast.BitAnd)
+                else np.logical_or,
+                [self.mask(node.left), self.mask(node.right)])
+        elif isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+            operand = self.mask(node.operand)
+            return lambda values: np.logical_not(operand(values))
+        elif isinstance(node, ast.Compare):
+            return self._compare(node)
+        elif isinstance(node, ast.Call):
+            return self._call(node)
+        raise NotVectorizable()
+
+    def _combine(self, function, operands):
+        def combine(values):
+            return function.reduce([operand(values) for operand in operands])
+        return combine
+
+    def _compare(self, node):
+        operands = [self.operand(operand)
+                    for operand in [node.left] + node.comparators]
+        pairs = []
+        for op, left, right in zip(node.ops, operands[:-1], operands[1:]):
+            if (left is _column) == (right is _column):
+                raise NotVectorizable()
+            if type(op) in _comparisons:
+                pairs.append(self._ordering(
+                    _comparisons[type(op)], left, right))
+            elif isinstance(op, (ast.In, ast.NotIn)):
+                pairs.append(self._contains(
+                    isinstance(op, ast.NotIn), left, right))
+            else:
+                raise NotVectorizable()
+        return self._combine(np.logical_and, pairs)
+
+    def _ordering(self, function, left, right):
+        def compare(values):
+            if left is _column:
+                return _check_mask(
+                    function(values, _scalar(values, right)), values)
+            return _check_mask(
+                function(_scalar(values, left), values), values)
+        return compare
+
+    def _contains(self, negate, left, right):
+        if left is _column:
+            def contains(values):
+                return np.in1d(values, _collection(values, right),
+                               invert=negate)
+        else:
+            def contains(values):
+                mask = _find(values, left)
+                if negate:
+                    mask = ~mask
+                return mask
+        return contains
+
+    def _call(self, node):
+        func = node.func
+        if not (isinstance(func, ast.Attribute) and
+                isinstance(func.value, ast.Name) and
+                func.value.id == self._argument and
+                func.attr in ('startswith', 'endswith') and
+                len(node.args) == 1 and not node.keywords and
+                not getattr(node, 'starargs', None) and
+                not getattr(node, 'kwargs', None)):
+            raise NotVectorizable()
+        patterns = self.operand(node.args[0])
+        if not isinstance(patterns, tuple):
+            patterns = (patterns,)
+        function = _startswith if func.attr == 'startswith' else _endswith
+
+        def call(values):
+            return np.logical_or.reduce(
+                [function(values, pattern) for pattern in patterns] +
+                [np.zeros(values.shape, dtype=bool)])
+        return call
+
+
+class Predicate(object):
+    """A predicate lambda that can be evaluated on whole columns."""
+
+    def __init__(self, source, mask):
+        self.source = source
+        self._mask = mask
+
+    def mask(self, values):
+        """
+        Return boolean mask for values or None if values has a type that
+        the predicate can not be evaluated on as a whole.
+
+        :param values: numpy array
+        """
+        try:
+            return self._mask(values)
+        except NotVectorizable:
+            return None
+
+
+def compile_predicate(source, env=None):
+    """
+    Return Predicate for the lambda in source or None if the lambda is
+    not made of the recognised forms.
+
+    :param source: string with a one argument lambda
+    :param env: dict of names available in the lambda
+    """
+    try:
+        tree = ast.parse(source.strip(), mode='eval')
+    except (SyntaxError, TypeError, ValueError):
+        return None
+    node = tree.body
+    if not isinstance(node, ast.Lambda):
+        return None
+    args = node.args
+    if (len(args.args) != 1 or args.vararg or args.kwarg or args.defaults or
+            getattr(args, 'kwonlyargs', None)):
+        return None
+    argument = args.args[0]
+    argument = getattr(argument, 'id', getattr(argument, 'arg', None))
+    try:
+        return Predicate(
+            source, _Compiler(argument, env).mask(node.body))
+    except NotVectorizable:
+        return None
+
+
+def column_mask(source, values, env=None):
+    """
+    Evaluate the predicate lambda in source on each element of values and
+    return the result as a boolean mask. Recognised predicates are
+    evaluated on the whole column, others are called row by row.
+
+    :param source: string with a one argument lambda
+    :param values: numpy array
+    :param env: dict of names available in the lambda
+    """
+    predicate = compile_predicate(source, env)
+    if predicate is not None:
+        mask = predicate.mask(values)
+        if mask is not None:
+            return mask
+    function = util.base_eval(source, env)
+    return np.asarray(pandas.Series(values).apply(function), dtype=bool)
+
+
+def bench(rows=5000000, repeat=3):
+    """
+    Time a few predicates on columns with rows elements with column_mask
+    and with row by row evaluation.
+
+    :return: list of (predicate, vectorized seconds, row by row seconds)
+    """
+    random = np.random.RandomState(0)
+    floats = random.random_sample(rows)
+    words = np.array([u'alpha', u'beta', u'gamma', u'delta'])[
+        random.randint(0, 4, rows)]
+    env = {'C0': np.array([0.25, 0.5, 0.75])}
+    cases = [
+        ('lambda x: x > 0.5', floats),
+        ('lambda x: 0.25 <= x < 0.75', floats),
+        ('lambda x: x < 0.1 or not x < 0.9', floats),
+        ('lambda x: x not in C0', floats),
+        ("lambda x: x.startswith('al') or 'mm' in x", words),
+        ("lambda x: x in ('beta', 'delta')", words)]
+
+    def timeit(function):
+        t0 = time.time()
+        for _ in range(repeat):
+            result = function()
+        return (time.time() - t0) / repeat, result
+
+    result = []
+    for source, values in cases:
+        vectorized, mask = timeit(
+            lambda: column_mask(source, values, env))
+        function = util.base_eval(source, env)
+        rowwise, expected = timeit(
+            lambda: np.asarray(pandas.Series(values).apply(function),
+                               dtype=bool))
+        assert np.array_equal(mask, expected)
+        result.append((source, vectorized, rowwise))
+    return result
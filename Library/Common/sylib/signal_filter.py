@@ -0,0 +1,126 @@
+# Copyright (c) 2016, System Engineering Software Society
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither the name of the System Engineering Software Society nor the
+#       names of its contributors may be used to endorse or promote products
+#       derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.
+# IN NO EVENT SHALL SYSTEM ENGINEERING SOFTWARE SOCIETY BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+Filtering of many equally long signals at once.
+
+filter_columns stacks the columns of a raster that have the same dtype into
+2-D arrays and filters each array along the time axis in one call, so that
+the setup of filtfilt, the padding and the initial conditions, is made once
+per batch instead of once per signal. The rows are filtered
+independently, so the result for every signal is identical to filtering it
+on its own.
+"""
+import time
+
+import numpy as np
+import scipy.signal as signal
+
+# Upper limit for the size of a stacked batch, keeps the working set small.
+BATCH_BYTES = 4 * 1024 * 1024
+
+
+def _batches(columns, batch_bytes):
+    """
+    Yield lists of indices of numeric columns with the same dtype and
+    length, at most batch_bytes each, and single indices for other columns.
+    """
+    groups = {}
+    for index, column in enumerate(columns):
+        if column.ndim != 1 or column.dtype.kind not in 'biufc':
+            yield [index]
+        else:
+            groups.setdefault((column.dtype, len(column)), []).append(index)
+
+    for (dtype, length), indices in sorted(groups.items()):
+        step = max(1, batch_bytes // max(1, length * dtype.itemsize))
+        for start in range(0, len(indices), step):
+            yield indices[start:start + step]
+
+
+def filter_columns(function, b, a, columns, batch_bytes=BATCH_BYTES):
+    """
+    Filter each column with function(b, a, column), where function is
+    scipy.signal.lfilter or scipy.signal.filtfilt.
+
+    :return: list with the filtered array, or the ValueError raised when
+             filtering it, for each column.
+    """
+    if function is signal.lfilter:
+        # Nothing is shared between the signals, stacking only adds a copy.
+        batch_bytes = 0
+    result = [None] * len(columns)
+    for indices in _batches(columns, batch_bytes):
+        if len(indices) > 1:
+            try:
+                filtered = function(
+                    b, a, np.vstack([columns[i] for i in indices]), axis=-1)
+            except ValueError:
+                # Retried one by one to find the failing columns.
+                pass
+            else:
+                for i, row in zip(indices, filtered):
+                    result[i] = row
+                continue
+        for i in indices:
+            try:
+                result[i] = function(b, a, columns[i])
+            except ValueError as e:
+                result[i] = e
+    return result
+
+
+def bench(rasters=4, signals=500, rows=(200, 2000, 20000), repeat=3):
+    """
+    Time filtering wide rasters with filter_columns and one signal at a
+    time, for lfilter and filtfilt with an elliptic IIR filter.
+
+    :return: list of (function name, rows, batched seconds, single seconds)
+    """
+    random = np.random.RandomState(0)
+    b, a = signal.iirdesign(0.1, 0.2, 1, 40, ftype='ellip')
+
+    def timeit(function):
+        t0 = time.time()
+        for _ in range(repeat):
+            output = function()
+        return (time.time() - t0) / repeat, output
+
+    result = []
+    for length in rows:
+        data = [[random.standard_normal(length) for _ in range(signals)]
+                for _ in range(rasters)]
+        for function in [signal.lfilter, signal.filtfilt]:
+            batched, output = timeit(
+                lambda: [filter_columns(function, b, a, columns)
+                         for columns in data])
+            single, expected = timeit(
+                lambda: [[function(b, a, column) for column in columns]
+                         for columns in data])
+            assert all(np.array_equal(x, y)
+                       for xs, ys in zip(output, expected)
+                       for x, y in zip(xs, ys))
+            result.append((function.__name__, length, batched, single))
+    return result
@@ -26,7 +26,9 @@
 import codecs
 from contextlib import contextmanager
 import datetime
+import io
 from itertools import izip
+import multiprocessing
 import numpy as np
 import os
 import pandas as pd
@@ -42,6 +44,7 @@ from sympathy.platform import qt_compat
 QtCore = qt_compat.QtCore # noqa
 
 from sympathy.api import table
+from sympathy.api import node_helper
 
 from .xl_utils import get_xl_sheetnames
 
@@ -65,6 +68,9 @@ CODEC_LANGS = {'Western (ASCII)': 'ascii',
 
 CHUNK_ROW_LIMIT = 1000
 CHUNK_BYTE_LIMIT = 1 * 1024 * 1024
+# Files larger than this are read in blocks of about this many bytes, split
+# on newlines and parsed concurrently, when read to the end.
+BLOCK_BYTE_LIMIT = 64 * 1024 * 1024
 SNIFF_LIMIT = 5 * 1024 * 1024
 ITER_LIMIT = 50
 FIND_NR_KEY = r'\d'
@@ -891,10 +897,14 @@ class TableSourceCSV(object):
         """
         Quick call for read the whole csv-file. The method gets
         a dataframe from _read and return a table to caller.
+        Large files are read with _read_blocks when possible.
         """
-        return table.File().from_dataframe(
-            self._read(row_offset=offset,
-                       require_num=req_num).dropna(how='all'))
+        data_frame = None
+        if self._filesize > BLOCK_BYTE_LIMIT:
+            data_frame = self._read_blocks(offset, req_num)
+        if data_frame is None:
+            data_frame = self._read(row_offset=offset, require_num=req_num)
+        return table.File().from_dataframe(data_frame.dropna(how='all'))
 
     def read_part(self, no_rows, offset, req_num):
         """
@@ -933,6 +943,102 @@ class TableSourceCSV(object):
             else:
                 return pd.DataFrame()
 
+    def _read_blocks(self, row_offset, require_num,
+                     block_bytes=BLOCK_BYTE_LIMIT, workers=None):
+        """
+        Read the csv-file from row_offset to the end in blocks of about
+        block_bytes, split on newlines and parsed concurrently by workers
+        threads (default: one per cpu). Return a dataframe, or None if the
+        file has to be read with _read instead.
+
+        That is the case for utf-16 encodings, where newlines can not be
+        found in the raw bytes, if a block could not be parsed, if the
+        blocks have different numbers of columns or if a quoted field spans
+        a block boundary. In the last three cases _read gives the same
+        result or error as before.
+        """
+        encoding = self._encoding
+        if self._delimiter == '' or encoding.startswith('utf_16'):
+            return None
+
+        with open(self._fq_infilename, 'rb') as csvfile:
+            if (encoding == 'utf_8' and
+                    csvfile.read(len(codecs.BOM_UTF8)) != codecs.BOM_UTF8):
+                csvfile.seek(0)
+            # A row offset inside a quoted field can not be found this way.
+            quotes = 0
+            for row in xrange(row_offset or 0):
+                quotes += csvfile.readline().count('"')
+            if quotes % 2:
+                return None
+
+            starts = []
+            start = csvfile.tell()
+            while start < self._filesize:
+                starts.append(start)
+                csvfile.seek(start + block_bytes)
+                csvfile.readline()
+                start = csvfile.tell()
+        if not starts:
+            return None
+        ends = starts[1:] + [self._filesize]
+
+        def read_block(start, end, dtype=None):
+            with open(self._fq_infilename, 'rb') as csvfile:
+                csvfile.seek(start)
+                data = csvfile.read(end - start)
+            try:
+                return (self._read_block_data(data, require_num, dtype),
+                        data.count('"'))
+            except Exception:
+                return None, 0
+
+        data_frames = []
+        quotes = 0
+        for data_frame, block_quotes in node_helper.ordered_map(
+                read_block, izip(starts, ends),
+                workers or multiprocessing.cpu_count()):
+            quotes += block_quotes
+            if data_frame is None or quotes % 2:
+                return None
+            data_frames.append(data_frame)
+        columns = list(data_frames[0].columns)
+        if any(list(data_frame.columns) != columns
+               for data_frame in data_frames):
+            return None
+
+        # Columns that are numbers in some blocks and text or bool in others
+        # are parsed again as text, so that the result has the same type and
+        # values regardless of the split. Integer and float blocks are joined
+        # as float and bool blocks with blank rows as object, like a single
+        # read does.
+        for i, column in enumerate(columns):
+            kinds = set(data_frame[column].dtype.kind
+                        for data_frame in data_frames)
+            if (len(kinds) > 1 and not kinds <= set('if') and
+                    not kinds <= set('bO')):
+                for data_frame, start, end in izip(
+                        data_frames, starts, ends):
+                    if data_frame[column].dtype.kind != 'O':
+                        data_frame[column] = read_block(
+                            start, end, {i: object})[0][column]
+
+        return pd.concat(data_frames, ignore_index=True)
+
+    def _read_block_data(self, data, require_num, dtype=None):
+        """Parse data, a block of full rows, like _read_c."""
+        return PANDAS_CSV_READER(io.BytesIO(data),
+                                 sep=self._delimiter,
+                                 skipinitialspace=True,
+                                 header=None,
+                                 prefix='X',
+                                 encoding=self._encoding,
+                                 doublequote=False,
+                                 engine='c',
+                                 na_filter=require_num,
+                                 skip_blank_lines=False,
+                                 dtype=dtype)
+
     def _read_sniff(self, no_rows=None, row_offset=None,
                     encoding=None, delimiter=None):
         """Quick call used by the sniffer methods."""
@@ -1309,6 +1415,46 @@ class TableSourceCSV(object):
             return False
 
 
+def write_bench_csv(fq_filename, size):
+    """
+    Write a csv-file of about size bytes with a header row and a float, an
+    integer and a text column.
+    """
+    rows = 100000
+    row_format = '{};{};{}\n'.format('%f', '%d', 'text %d')
+    with open(fq_filename, 'wb') as csvfile:
+        csvfile.write('float;integer;text\n')
+        while csvfile.tell() < size:
+            values = np.arange(rows)
+            csvfile.write((row_format * rows) % tuple(np.column_stack(
+                [np.random.random(rows), values, values % 1000]).astype(
+                    object).ravel()))
+
+
+def bench_read_to_end(directory, sizes=(1, 2, 5, 10), workers=None):
+    """
+    Time reading generated csv-files of each size in GiB from directory,
+    with _read and with _read_blocks. Return a list of tuples of size, rows,
+    and seconds for each method.
+    """
+    result = []
+    for size in sizes:
+        fq_filename = os.path.join(directory, 'bench_{}.csv'.format(size))
+        write_bench_csv(fq_filename, size * 1024 ** 3)
+        try:
+            source = TableSourceCSV(fq_filename, ';', 'utf_8')
+            t0 = datetime.datetime.now()
+            rows = len(source._read(row_offset=1, require_num=True))
+            t1 = datetime.datetime.now()
+            source._read_blocks(1, True, workers=workers)
+            t2 = datetime.datetime.now()
+            result.append((size, rows, (t1 - t0).total_seconds(),
+                           (t2 - t1).total_seconds()))
+        finally:
+            os.remove(fq_filename)
+    return result
+
+
 class TooManyColumnsError(Exception):
     """Exception raised when the number of columns are higher than Pandas has
     expected in a row.
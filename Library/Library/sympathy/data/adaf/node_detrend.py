@@ -58,6 +58,7 @@ from matplotlib.figure import Figure
 from sympathy.api import node as synode
 from sympathy.api import adaf
 from sympathy.api.nodeconfig import Port, Ports, Tag, Tags
+from sylib.detrend import get_trend, cooks_distance  # noqa
 
 
 def get_adaf_info(adaffile):
@@ -182,38 +183,12 @@ def detrend_data(tb, ts, detrend_function):
     return ts_new, trend
 
 
-def get_trend(tb, ts, detrend_function):
-    """Fit ploynomial to data points. detrend_function index for
-    degree of ploynomial.
-    """
-    poly_coeff = np.polyfit(tb, ts, detrend_function)
-    trend = np.polyval(poly_coeff, tb)
-    return trend
-
-
 def get_functions():
     functions = ['Constant', 'Linear', '2nd degree poly', '3rd degree poly',
                  '4th degree poly']
     return functions
 
 
-def cooks_distance(tb, ts, detrend_function, trend=None):
-    """Calculates cooks distance function."""
-    if trend is None:
-        trend = get_trend(tb, ts, detrend_function)
-    n = len(ts)
-    MSE = 1.0 / n * np.sum((trend - ts) ** 2)
-    D = np.zeros(n, 1)
-    p = detrend_function + 1
-    for ind in range(n):
-        trend_ind = np.delete(trend, [ind])
-        ts_new = np.delete(ts, [ind])
-        tb_new = np.delete(tb, [ind])
-        trend_new = get_trend(tb_new, ts_new, detrend_function)
-        D[ind] = np.sum((trend_ind - trend_new) ** 2) / (p * MSE)
-    return D, trend
-
-
 def simple_detrend(tb, ts, detrend_function, trend=None):
     if trend is None:
         trend = get_trend(tb, ts, detrend_function)
@@ -32,6 +32,7 @@ import collections
 import ast
 import sys
 import warnings
+import multiprocessing
 
 import six
 
@@ -53,8 +54,10 @@ from matplotlib.backends.backend_qt4agg \
     import NavigationToolbar2QT as NavigationToolbar
 
 from sympathy.api import node as synode
+from sympathy.api import node_helper
 from sympathy.api.nodeconfig import Port, Ports, Tag, Tags
 from sympathy.utils import prim
+from sylib import signal_filter
 
 
 class capture_print(list):
@@ -96,43 +99,61 @@ def write_meta(in_adaffile, out_adaffile):
     write_group(in_adaffile.meta, out_adaffile.meta)
 
 
-def filter_signals(in_adaffile, out_adaffile, parameters):
+def filter_signals(in_adaffile, out_adaffile, parameters, workers=None):
     """
     Filter all timeseries in in_adaffile and write to output
     ADAF file with old timebasis, meta and result.
+
+    The signals of each raster are filtered together and up to workers
+    (default: one per cpu) rasters are filtered concurrently.
     """
     write_res(in_adaffile, out_adaffile)
     write_meta(in_adaffile, out_adaffile)
     # Generate global filter design
     b, a = generate_filter(parameters)
-    for system_name, in_system in in_adaffile.sys.items():
-        out_system = out_adaffile.sys.create(system_name)
-        for raster_name, in_raster in in_system.items():
-            out_raster = out_system.create(raster_name)
-            # Making use of the table API to build the output raster.
-            # While at the same time taking care to propagate attributes.
-            in_raster_table = in_raster.to_table()
-            out_raster_table = table.File()
-            for column_name in in_raster.keys():
-                column_data = in_raster_table.get_column_to_array(column_name)
-                attributes = in_raster_table.get_column_attributes(column_name)
-                try:
-                    column = filter_signal(parameters, b, a, column_data)
-                    attributes['Filtering'] = six.text_type(
-                        create_filter_parameter_attributes(parameters)
-                    )
-                except ValueError as e:
-                    sywarn('A ValueError occurred during signal filtering. '
-                           'The column "{}" is returned unfiltered!\n'
-                           'Error message: {}'.format(column_name, e))
-                    column = column_data
-                    attributes['Filtering'] = 'Unfiltered due to Error'
-                out_raster_table.set_column_from_array(column_name, column)
-                out_raster_table.set_column_attributes(column_name, attributes)
-            in_basis = in_raster.basis_column()
-            out_raster.from_table(out_raster_table)
-            out_raster.create_basis(
-                in_basis.value(), dict(in_basis.attr.items()))
+    function = get_filtering_dict()[parameters['filtering'].selected]
+    filtering = six.text_type(create_filter_parameter_attributes(parameters))
+
+    def rasters():
+        for system_name, in_system in in_adaffile.sys.items():
+            out_system = out_adaffile.sys.create(system_name)
+            for raster_name, in_raster in in_system.items():
+                in_raster_table = in_raster.to_table()
+                column_names = in_raster.keys()
+                columns = [in_raster_table.get_column_to_array(column_name)
+                           for column_name in column_names]
+                yield (in_raster, out_system.create(raster_name),
+                       in_raster_table, column_names, columns)
+
+    def filter_raster(in_raster, out_raster, in_raster_table, column_names,
+                      columns):
+        return (in_raster, out_raster, in_raster_table, column_names, columns,
+                signal_filter.filter_columns(function, b, a, columns))
+
+    for (in_raster, out_raster, in_raster_table, column_names, columns,
+         results) in node_helper.ordered_map(
+             filter_raster, rasters(),
+             workers or multiprocessing.cpu_count()):
+        # Making use of the table API to build the output raster.
+        # While at the same time taking care to propagate attributes.
+        out_raster_table = table.File()
+        for column_name, column_data, column in zip(
+                column_names, columns, results):
+            attributes = in_raster_table.get_column_attributes(column_name)
+            if isinstance(column, ValueError):
+                sywarn('A ValueError occurred during signal filtering. '
+                       'The column "{}" is returned unfiltered!\n'
+                       'Error message: {}'.format(column_name, column))
+                column = column_data
+                attributes['Filtering'] = 'Unfiltered due to Error'
+            else:
+                attributes['Filtering'] = filtering
+            out_raster_table.set_column_from_array(column_name, column)
+            out_raster_table.set_column_attributes(column_name, attributes)
+        in_basis = in_raster.basis_column()
+        out_raster.from_table(out_raster_table)
+        out_raster.create_basis(
+            in_basis.value(), dict(in_basis.attr.items()))
 
 
 def generate_filter(parameters):
@@ -113,6 +113,7 @@ class SuperNode(object):
     author = "Alexander Busck <alexander.busck@sysess.org>"
     copyright = "(C) 2013 System Engineering Software Society"
     version = '1.0'
+    memoize = False
     icon = 'import_adaf.svg'
     tags = Tags(Tag.Input.Import)
 
@@ -292,11 +293,13 @@ class ImportADAFs(SuperNode, synode.Node):
                     node_context.manage_input(dspath, ds_infile)
                 else:
                     outputfile = adaf.File()
-                    adaf_importer.import_data(
-                        outputfile,
-                        params['custom_importer_data'][importer_type],
-                        progress=lambda x: self.set_progress(
-                            (100 * i + x) / len_input_list))
+                    with self.progress_range(
+                            100.0 * i / len_input_list,
+                            100.0 * (i + 1) / len_input_list):
+                        adaf_importer.import_data(
+                            outputfile,
+                            params['custom_importer_data'][importer_type],
+                            progress=self.set_progress)
                     output_list.append(outputfile)
             except Exception as e:
                 if fail_strategy == LIST_FAILURE_STRATEGIES['Exception']:
@@ -312,4 +315,4 @@ class ImportADAFs(SuperNode, synode.Node):
 
             if out_file is not None:
                 output_list.append(out_file)
-            self.set_progress(100 * (1 + i) / len_input_list)
+            self.set_progress(100.0 * (1 + i) / len_input_list)
@@ -98,6 +98,7 @@ class SuperNode(object):
     author = "Alexander Busck <alexander.busck@sysess.org>"
     copyright = "(C) 2013 System Engineering Software Society"
     version = '1.0'
+    memoize = False
     icon = 'import_table.svg'
     tags = Tags(Tag.Input.Import)
 
@@ -313,6 +314,7 @@ class ImportRAWTables(synode.Node):
     name = 'RAW Tables'
     description = 'Import RAW Tables'
     nodeid = 'org.sysess.sympathy.data.table.importrawtables'
+    memoize = False
     icon = 'import_table.svg'
     tags = Tags(Tag.Input.Import)
 
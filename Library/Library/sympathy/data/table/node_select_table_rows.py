@@ -65,6 +65,7 @@ from sympathy.api.nodeconfig import Port, Ports, Tag, Tags
 from sympathy.api import node_helper
 from sympathy.api.exceptions import SyConfigurationError
 from sylib import util
+from sylib.predicate import compile_predicate
 
 QtGui = qt_compat.import_module('QtGui')  # noqa
 QtCore = qt_compat.QtCore  # noqa
@@ -79,7 +80,11 @@ comparisons = collections.OrderedDict([
     ('not equal', '!=')])
 
 
-def get_predicate(relation, constraint):
+def get_predicate_source(relation, constraint):
+    """
+    Return the source of the predicate lambda for relation and constraint
+    and the dict of names that it uses.
+    """
     comparison = comparisons[relation]
     predicate_fn = 'lambda x: x {} {}'.format(comparison, constraint)
     ctx = {}
@@ -94,27 +99,44 @@ def get_predicate(relation, constraint):
     except:
         # Assume that the constraint depends on x.
         pass
-    return util.base_eval(predicate_fn, ctx)
+    return predicate_fn, ctx
 
 
-def get_parameter_predicate(parameters):
+def get_predicate(relation, constraint):
+    return util.base_eval(*get_predicate_source(relation, constraint))
+
+
+def get_parameter_predicate_source(parameters):
     if parameters['use_custom_predicate'].value:
-        return util.base_eval(parameters['predicate'].value)
-    return get_predicate(parameters['relation'].selected,
-                         parameters['constraint'].value)
+        return parameters['predicate'].value, {}
+    return get_predicate_source(parameters['relation'].selected,
+                                parameters['constraint'].value)
+
+
+def get_parameter_predicate(parameters):
+    return util.base_eval(*get_parameter_predicate_source(parameters))
 
 
 def filter_rows(in_table, parameters):
     columns = parameters['columns'].value_names
-    predicate = get_parameter_predicate(parameters)
+    predicate_fn, ctx = get_parameter_predicate_source(parameters)
+    predicate = util.base_eval(predicate_fn, ctx)
+    # Common predicates are evaluated directly on the column arrays.
+    compiled = compile_predicate(predicate_fn, ctx)
     nbr_rows = in_table.number_of_rows()
 
     selection = np.ones(nbr_rows, dtype=bool)
     if nbr_rows:
         try:
             for column_name in columns:
-                selection = selection & predicate(
-                    in_table.get_column_to_series(column_name))
+                mask = None
+                if compiled is not None:
+                    mask = compiled.mask(
+                        in_table.get_column_to_array(column_name))
+                if mask is None:
+                    mask = predicate(
+                        in_table.get_column_to_series(column_name))
+                selection = selection & mask
         except TypeError:
             raise SyConfigurationError(
                 'Value error in the filter constraint or custom filter ' +
@@ -547,8 +569,13 @@ class SelectTableRowsFromTable(synode.Node):
         for column_name, relation, constraint in self._generate_selection(
                 node_context):
 
-            indices.append(get_predicate(relation, constraint)(
-                tablefile.get_column_to_array(column_name)))
+            predicate_fn, ctx = get_predicate_source(relation, constraint)
+            values = tablefile.get_column_to_array(column_name)
+            compiled = compile_predicate(predicate_fn, ctx)
+            mask = compiled.mask(values) if compiled is not None else None
+            if mask is None:
+                mask = util.base_eval(predicate_fn, ctx)(values)
+            indices.append(mask)
 
         if self._parameters['reduction'].selected == 'any':
             index = np.logical_or.reduce(indices)
@@ -54,6 +54,8 @@ class SortOperation(node_helper.TableOperation):
     inputs = ['Input']
     outputs = ['Output']
     update_using = None
+    # Sorting is independent between tables and mostly spent in NumPy.
+    parallel_workers = 4
 
     @staticmethod
     def get_parameters(parameter_group):
@@ -93,6 +93,7 @@ class ImportText(synode.Node):
     name = 'Text'
     description = 'Data source as text'
     nodeid = 'org.sysess.sympathy.data.text.importtext'
+    memoize = False
 
     inputs = Ports([Port.Datasource(
         'Datasource', name='port1', requiresdata=True)])
@@ -173,6 +174,7 @@ class ImportTexts(synode.Node):
     name = 'Texts'
     description = 'Data source as Texts'
     nodeid = 'org.sysess.sympathy.data.text.importtexts'
+    memoize = False
 
     inputs = Ports([Port.Datasources(
         'Datasource', name='port1', requiresdata=True)])
@@ -56,6 +56,7 @@ class SuperNode(object):
     author = "Alexander Busck <alexander.busck@sysess.org>"
     copyright = "(C) 2013 System Engineering Software Society"
     version = '1.1'
+    memoize = False
     icon = 'datasource.svg'
     tags = Tags(Tag.Input.Import)
 
@@ -117,6 +117,7 @@ class ExportADAFs(synode.Node):
     author = 'Alexander Busck <alexander.busck@combine.se>'
     copyright = '(c) 2013 Combine AB'
     nodeid = 'org.sysess.sympathy.export.exportadafs'
+    memoize = False
     version = '0.1'
 
     inputs = Ports([Port.ADAFs('Input ADAFs', name='port0')])
@@ -79,6 +79,7 @@ class ExportDatasources(synode.Node):
     author = 'Erik der Hagopian <erik.hagopian@sysess.org>'
     copyright = '(C) 2013 System Engineering Software Society'
     nodeid = 'org.sysess.sympathy.export.exportdatasources'
+    memoize = False
     version = '1.0'
 
     parameters = synode.parameters()
@@ -117,6 +117,7 @@ class ExportTables(synode.Node):
     author = 'Alexander Busck <alexander.busck@combine.se>'
     copyright = '(c) 2013 Combine AB'
     nodeid = 'org.sysess.sympathy.export.exporttables'
+    memoize = False
     version = '0.1'
 
     parameters = synode.parameters()
@@ -196,21 +197,30 @@ class ExportTables(synode.Node):
         exporter = exporter_class(exporter_parameter_root)
 
         if number_of_filenames is None:
-            for object_no, (fq_outfilename, table_file) in enumerate(
-                    itertools.izip(fq_filenames, input_list)):
-
-                if not os.path.isdir(os.path.dirname(fq_outfilename)):
-                    os.makedirs(os.path.dirname(fq_outfilename))
-                datasource_file = dsrc.File()
-                datasource_file.encode_path(fq_outfilename)
-                datasource_list.append(datasource_file)
-
+            def fq_outfilenames():
+                # Directories are created in this thread, before the
+                # exporter writes the corresponding file.
+                for fq_outfilename in fq_filenames:
+                    if not os.path.isdir(os.path.dirname(fq_outfilename)):
+                        os.makedirs(os.path.dirname(fq_outfilename))
+                    yield fq_outfilename
+
+            exported = exporter.export_data_list(
+                input_list, fq_outfilenames())
+            for object_no in itertools.count():
                 try:
-                    exporter.export_data(table_file, fq_outfilename)
+                    table_file, fq_outfilename = next(exported)
+                except StopIteration:
+                    break
                 except (IOError, OSError):
                     raise SyNodeError(
                         'Unable to create file. Please check that you have '
                         'permission to write to the selected folder.')
+
+                datasource_file = dsrc.File()
+                datasource_file.encode_path(fq_outfilename)
+                datasource_list.append(datasource_file)
+
                 if plot is not None:
                     plots_model = plot_models.get_plots_model(
                         table_file)
@@ -271,6 +281,7 @@ class ExportRAWTables(synode.Node):
     author = 'Alexander Busck <alexander.busck@combine.se>'
     copyright = '(c) 2013 Combine AB'
     nodeid = 'org.sysess.sympathy.export.exportrawtables'
+    memoize = False
     version = '0.12a'
     tags = Tags(Tag.Output.Export)
 
@@ -99,6 +99,7 @@ class ExportTexts(synode.Node):
     author = 'Erik der Hagopian <erik.hagopian@sysess.org>'
     copyright = '(C) 2013 System Engineering Software Society'
     nodeid = 'org.sysess.sympathy.export.exportexts'
+    memoize = False
     version = '0.1'
 
     inputs = Ports([Port.Texts('Texts to be exported', name='port0')])
@@ -25,11 +25,15 @@
 # SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 import collections
 import csv
+import itertools
+import multiprocessing
+import re
 
 from sympathy.api import qt as qt_compat
 QtGui = qt_compat.import_module('QtGui')
 from sylib.export import table as exporttable
 from sympathy.api import node as synode
+from sympathy.api import node_helper
 
 
 # We are currently unable to support UTF-16 encodings since this plugin uses
@@ -61,8 +65,48 @@ def encode_values(data_row, encoding):
     return [unicode(value).encode(encoding) for value in data_row]
 
 
+# Approximate number of cells formatted and written at a time by table2csv.
+CHUNK_CELLS = 2 ** 18
+
+# Characters that make csv.QUOTE_MINIMAL quote a field, with delimiter ';'.
+_needs_quoting = re.compile('[;"\r\n]')
+
+
+def encode_column(column, encoding, single):
+    """
+    Return a list of encoded and, where needed, quoted strings with the
+    values of the text array column. The result is the same as for
+    encode_values followed by csv.writer with QUOTE_MINIMAL, but the work is
+    done once for the whole column unless some value needs quoting. Single
+    should be True if the column is the only one in the table since csv
+    quotes an empty field when it is the only one on the row.
+    """
+    values = column.tolist()
+    if column.dtype.kind == 'S':
+        # Same error as unicode(value) for non-ascii values. The values
+        # are unchanged by encoding since all CODEC_LANGS extend ascii.
+        ''.join(values).decode('ascii')
+    else:
+        values = [value.encode(encoding) for value in values]
+
+    if _needs_quoting.search(''.join(values)) or (single and '' in values):
+        values = [
+            '"{}"'.format(value.replace('"', '""'))
+            if _needs_quoting.search(value) or (single and not value)
+            else value
+            for value in values]
+    return values
+
+
 def table2csv(tabledata, fq_outfilename, header, encoding):
-    """Write table to CSV."""
+    """
+    Write table to CSV.
+
+    Columns are formatted in chunks of about CHUNK_CELLS cells. Values other
+    than text are formatted with '%s' in a single format string per chunk,
+    which gives the same result as unicode(value) for the Python values of
+    ndarray.tolist.
+    """
     # Workaround instead of using matplotlib's rec2csv that doesn't play
     # nicely with unicode/latin-1 characters.
     with open(fq_outfilename, 'w+b') as out_file:
@@ -76,9 +120,42 @@ def table2csv(tabledata, fq_outfilename, header, encoding):
         if header:
             csv_writer.writerow(
                 encode_values(tabledata.column_names(), encoding))
-        if tabledata is not None:
-            for row in tabledata.to_rows():
-                csv_writer.writerow(encode_values(row, encoding))
+        if tabledata is None or not tabledata.number_of_columns():
+            return
+
+        columns = [tabledata.get_column_to_array(name)
+                   for name in tabledata.column_names()]
+        single = len(columns) == 1
+        chunk_rows = max(1, CHUNK_CELLS // len(columns))
+        row_format = (';'.join(['%s'] * len(columns)) +
+                      csv_writer.dialect.lineterminator)
+
+        for start in xrange(0, tabledata.number_of_rows(), chunk_rows):
+            chunk = [column[start:start + chunk_rows] for column in columns]
+            values = [encode_column(column, encoding, single)
+                      if column.dtype.kind in ('S', 'U')
+                      else column.tolist()
+                      for column in chunk]
+            out_file.write((row_format * len(chunk[0])) % tuple(
+                itertools.chain.from_iterable(itertools.izip(*values))))
+
+
+def tables2csv(tablelist, fq_outfilenames, header, encoding, workers=None):
+    """
+    Write each table in tablelist to the corresponding filename in
+    fq_outfilenames and yield (table, filename) pairs in input order as the
+    files are written. With workers larger than one, up to workers tables are
+    written concurrently.
+
+    Tablelist and fq_outfilenames are consumed lazily in the calling thread,
+    which is also where the pairs are yielded.
+    """
+    def write(tabledata, fq_outfilename):
+        table2csv(tabledata, fq_outfilename, header, encoding)
+        return tabledata, fq_outfilename
+
+    return node_helper.ordered_map(
+        write, itertools.izip(tablelist, fq_outfilenames), workers)
 
 
 class DataExportCSVWidget(QtGui.QWidget):
@@ -131,3 +208,11 @@ class DataExportCSV(exporttable.TableDataExporterBase):
         encoding = CODEC_LANGS[
             self._custom_parameter_root['encoding'].selected]
         table2csv(in_sytable, fq_outfilename, header, encoding)
+
+    def export_data_list(self, in_sytables, fq_outfilenames):
+        """Export each Table to its own CSV file, concurrently."""
+        header = self._custom_parameter_root['header'].value
+        encoding = CODEC_LANGS[
+            self._custom_parameter_root['encoding'].selected]
+        return tables2csv(in_sytables, fq_outfilenames, header, encoding,
+                          multiprocessing.cpu_count())
@@ -43,6 +43,7 @@ class SuperNode(object):
     author = "Alexander Busck <alexander.busck@sysess.org>"
     copyright = "(C) 2013 System Engineering Software Society"
     version = '0.9'
+    memoize = False
 
 
 class CopyFile(SuperNode, synode.Node):
@@ -138,6 +139,7 @@ class DeleteFile(synode.Node):
     copyright = "(C) 2016 System Engineering Software Society"
     version = '0.1'
     nodeid = 'org.sysess.sympathy.files.deletefile'
+    memoize = False
     tags = Tags(Tag.Disk.File)
 
     inputs = Ports([Port.Datasource(
@@ -39,13 +39,15 @@ The predefined relations are the following:
         keeps the row if corresponding element in C1 do not exist in any row
         in C0.
 """
+import pandas
+
 from sympathy.api import qt as qt_compat
 QtGui = qt_compat.import_module('QtGui') # noqa
 
 from sympathy.api import node as synode
 from sympathy.api import table
 from sympathy.api.nodeconfig import Port, Ports, Tag, Tags
-from sylib import util
+from sylib import predicate
 from sympathy.api.exceptions import SyDataError
 
 
@@ -57,34 +59,30 @@ COLUMN_FILTERS = {
 
 def execute_filter_query(table1, table2, parameter_root):
     c0_column_name = parameter_root['c0_column'].selected
-    c0_df = table1.to_dataframe()
-
     c1_column_name = parameter_root['c1_column'].selected
-    c1_df = table2.to_dataframe()
 
     if c0_column_name is None or c1_column_name is None:
         raise SyDataError('Selected columns are not valid.')
 
-    c0_column = c0_df[c0_column_name]
-    c1_column = c1_df[c1_column_name]
+    c0_column = table1.get_column_to_array(c0_column_name)
+    c1_column = table2.get_column_to_array(c1_column_name)
     # Expose columns as C0 and C1 when evaluating lambda function
     env = {
-        'C0': c0_column.values,
-        'C1': c1_column.values
+        'C0': c0_column,
+        'C1': c1_column
     }
     use_custom_predicate = parameter_root['use_custom_predicate'].value
 
     if use_custom_predicate:
-        predicate = util.base_eval(
-            parameter_root['predicate_function'].value, env)
-        selection = c1_column.apply(predicate)
+        selection = predicate.column_mask(
+            parameter_root['predicate_function'].value, c1_column, env)
     else:
         selected_filter_name = parameter_root['filter_functions'].selected
-        selection = c1_column.isin(c0_column)
+        selection = pandas.Series(c1_column).isin(c0_column).values
         if not selected_filter_name.startswith('Match'):
-            selection = - selection
+            selection = ~selection
 
-    return c1_df[selection]
+    return table2[selection]
 
 
 class ColumnFilterWidget(QtGui.QWidget):
@@ -169,7 +167,7 @@ class ColumnFilterWidget(QtGui.QWidget):
     def _preview_clicked(self):
         result = execute_filter_query(
             self._table1, self._table2, self._parameters)
-        self._preview_text.setText(str(result))
+        self._preview_text.setText(str(result.to_dataframe()))
 
 
 class ColumnFilterNode(synode.Node):
@@ -255,7 +253,7 @@ class ColumnFilterNode(synode.Node):
         result = execute_filter_query(table1, table2, parameters)
 
         tablefile = node_context.output['port0']
-        tablefile.update(table.File.from_dataframe(result))
+        tablefile.update(result)
         tablefile.set_attributes(table2.get_attributes())
         tablefile.set_name(table2.get_name())
 
@@ -355,7 +353,7 @@ class ColumnFilterTables(synode.Node):
                 table1, table2, parameters)
 
             tablefile = table.File()
-            tablefile.update(table.File.from_dataframe(result))
+            tablefile.update(result)
             tablefile.set_attributes(table2.get_attributes())
             tablefile.set_name(table2.get_name())
 
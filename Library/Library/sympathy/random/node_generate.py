@@ -137,6 +137,7 @@ class RandomADAF(synode.Node):
     description = 'Random ADAF generator.'
     name = 'Random ADAF'
     nodeid = 'org.sysess.sympathy.random.randomadaf'
+    memoize = False
     icon = 'random.svg'
     version = '0.1'
 
@@ -235,6 +236,7 @@ class RandomADAFs(synode.Node):
     name = 'Random ADAFs'
     icon = 'random.svg'
     nodeid = 'org.sysess.sympathy.random.randomadafs'
+    memoize = False
     outputs = Ports([Port.ADAFs('Random ADAFs', name='port0')])
 
     version = '0.1'
@@ -295,6 +297,7 @@ class RandomTable(synode.Node):
     name = 'Random Table'
     icon = 'random.svg'
     nodeid = 'org.sysess.sympathy.random.randomtable'
+    memoize = False
     version = '0.1'
 
     outputs = Ports([Port.Table('Random Table', name='port0')])
@@ -344,6 +347,7 @@ class RandomTables(synode.Node):
     name = 'Random Tables'
     icon = 'random.svg'
     nodeid = 'org.sysess.sympathy.random.randomtables'
+    memoize = False
     version = '0.1'
 
     outputs = Ports([Port.Tables('Random Tables', name='port0')])
@@ -0,0 +1,126 @@
+# Copyright (c) 2017, System Engineering Software Society
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither the name of the System Engineering Software Society nor the
+#       names of its contributors may be used to endorse or promote products
+#       derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.
+# IN NO EVENT SHALL SYSTEM ENGINEERING SOFTWARE SOCIETY BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""Fixtures shared by the tests of the datasource schemes."""
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from sympathy.api import table
+from sympathy.datasources import info
+
+
+class DatasourceTestMixin(object):
+    """
+    Mixin for unittest.TestCase with fixtures and common tests for the
+    datasource scheme given by the scheme attribute.
+    """
+    scheme = None
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, 'data.sydata')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def create_table(self, index=0, rows=5):
+        result = table.File()
+        result.set_column_from_array('index', np.arange(index, index + rows))
+        result.set_column_from_array('float', np.linspace(0, 1, rows))
+        result.set_column_from_array(
+            'text', np.array([u'a', u'\xe5\xe4', u'', u'b', u'c'] * rows)[
+                :rows])
+        result.set_column_from_array(
+            'bytes', np.array([b'x', b'\xff', b'', b'y', b'z'] * rows)[:rows])
+        result.set_column_from_array(
+            'time', np.arange(rows).astype('datetime64[us]'))
+        result.set_column_from_array('bool', np.arange(rows) % 2 == 0)
+        result.set_column_from_array('complex', np.arange(rows) * (1 + 2j))
+        result.set_column_attributes('float', {'unit': 's'})
+        result.set_name(u'table \xe5')
+        result.set_table_attributes({'origin': 'test'})
+        return result
+
+    def assert_table_equal(self, expected, actual):
+        self.assertEqual(expected.column_names(), actual.column_names())
+        for name in expected.column_names():
+            expected_column = expected.get_column_to_array(name)
+            actual_column = actual.get_column_to_array(name)
+            self.assertEqual(expected_column.dtype, actual_column.dtype)
+            np.testing.assert_array_equal(expected_column, actual_column)
+            self.assertEqual(
+                dict(expected.get_column_attributes(name)),
+                dict(actual.get_column_attributes(name)))
+        self.assertEqual(expected.get_name(), actual.get_name())
+        self.assertEqual(expected.get_table_attributes(),
+                         actual.get_table_attributes())
+
+    def assert_row_indices(self, expected, actual):
+        """Compare reading the index column of actual with row indices."""
+        index = expected.get_column_to_array('index')
+        for row_index in [slice(5, 10), slice(-3, None), slice(None),
+                          slice(20, 2, -3), slice(7, 7), [9, 2, 17],
+                          index % 3 == 0]:
+            np.testing.assert_array_equal(
+                index[row_index],
+                actual.get_column_to_array('index', row_index))
+
+    def tables(self, mode):
+        """Return table.FileList for self.filename, in the scheme."""
+        tables_type = type('Tables', (table.FileList,),
+                           {'scheme': self.scheme})
+        return tables_type(filename=self.filename, mode=mode)
+
+    def write_table(self, source):
+        with table.File(filename=self.filename, mode='w',
+                        scheme=self.scheme, source=source):
+            pass
+
+    def write_tables(self, length):
+        with self.tables('w') as tables:
+            for index in range(length):
+                tables.append(self.create_table(index))
+
+    def read_indices(self):
+        with self.tables('r') as tables:
+            return [item.get_column_to_array('index')[0] for item in tables]
+
+    def test_table(self):
+        expected = self.create_table()
+        self.write_table(expected)
+        self.assertEqual(info.get_scheme_from_file(self.filename),
+                         self.scheme)
+        with table.File(filename=self.filename, mode='r') as actual:
+            self.assert_table_equal(expected, actual)
+
+    def test_list(self):
+        self.write_tables(20)
+        with self.tables('r') as tables:
+            self.assertEqual(len(tables), 20)
+            self.assert_table_equal(self.create_table(7), tables[7])
+        self.assertEqual(self.read_indices(), list(range(20)))
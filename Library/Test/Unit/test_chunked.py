@@ -0,0 +1,95 @@
+# Copyright (c) 2017, System Engineering Software Society
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither the name of the System Engineering Software Society nor the
+#       names of its contributors may be used to endorse or promote products
+#       derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.
+# IN NO EVENT SHALL SYSTEM ENGINEERING SOFTWARE SOCIETY BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+import os
+import unittest
+
+import numpy as np
+
+from sympathy.api import adaf
+from sympathy.api import table
+from sympathy.datasources.chunked import dsgroup, dstable
+from datasource_fixtures import DatasourceTestMixin
+
+
+class ChunkedTestCase(DatasourceTestMixin, unittest.TestCase):
+    scheme = 'chunked'
+
+    def test_table(self):
+        super(ChunkedTestCase, self).test_table()
+        self.assertTrue(os.path.isdir(dsgroup.chunk_directory(self.filename)))
+
+    def test_rows(self):
+        chunk_rows = dstable.CHUNK_ROWS
+        dstable.CHUNK_ROWS = 4
+        try:
+            expected = self.create_table(rows=23)
+            self.write_table(expected)
+        finally:
+            dstable.CHUNK_ROWS = chunk_rows
+        # Six chunks for each of the seven columns.
+        self.assertEqual(
+            len(os.listdir(dsgroup.chunk_directory(self.filename))), 42)
+        with table.File(filename=self.filename, mode='r') as actual:
+            self.assert_table_equal(expected, actual)
+            self.assert_row_indices(expected, actual)
+
+    def test_uncompressed(self):
+        compress_level = dsgroup.COMPRESS_LEVEL
+        dsgroup.COMPRESS_LEVEL = 0
+        try:
+            expected = self.create_table(rows=100)
+            self.write_table(expected)
+        finally:
+            dsgroup.COMPRESS_LEVEL = compress_level
+        with table.File(filename=self.filename, mode='r') as actual:
+            self.assert_table_equal(expected, actual)
+            column = actual.get_column_to_array('float')
+            # Mapped copy on write, the file is left unchanged.
+            column[:] = -1
+        with table.File(filename=self.filename, mode='r') as actual:
+            self.assert_table_equal(expected, actual)
+
+    def test_adaf(self):
+        expected = adaf.File()
+        expected.meta.create_column('VIN_Number', np.array([u'YV1']))
+        raster = expected.sys.create('system0').create('raster0')
+        raster.create_basis(np.arange(100, dtype=float), {'unit': 's'})
+        for index in range(50):
+            raster.create_signal('signal{}'.format(index),
+                                 np.random.random(100))
+        with adaf.File(filename=self.filename, mode='w', scheme='chunked',
+                       source=expected):
+            pass
+        with adaf.File(filename=self.filename, mode='r') as actual:
+            self.assertEqual(actual.meta['VIN_Number'].value()[0], u'YV1')
+            actual_raster = actual.sys['system0']['raster0']
+            self.assertEqual(actual_raster.keys(), raster.keys())
+            for name, signal in raster.items():
+                np.testing.assert_array_equal(signal.y, actual_raster[name].y)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,171 @@
+# Copyright (c) 2017, System Engineering Software Society
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither the name of the System Engineering Software Society nor the
+#       names of its contributors may be used to endorse or promote products
+#       derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.
+# IN NO EVENT SHALL SYSTEM ENGINEERING SOFTWARE SOCIETY BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+import os
+import csv
+import imp
+import shutil
+import datetime
+import tempfile
+import unittest
+
+import numpy as np
+
+from sympathy.api import table
+
+
+plugin_csv_exporter = imp.load_source(
+    'plugin_csv_exporter', os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), os.pardir, os.pardir,
+        'Library', 'sympathy', 'export', 'table_exporters',
+        'plugin_csv_exporter.py'))
+
+
+def row_table2csv(tabledata, fq_outfilename, header, encoding):
+    """The row by row writer that table2csv replaced."""
+    with open(fq_outfilename, 'w+b') as out_file:
+        csv_writer = csv.writer(out_file,
+                                delimiter=';',
+                                quotechar='"',
+                                doublequote=True,
+                                quoting=csv.QUOTE_MINIMAL)
+        if header:
+            csv_writer.writerow(plugin_csv_exporter.encode_values(
+                tabledata.column_names(), encoding))
+        for row in tabledata.to_rows():
+            csv_writer.writerow(
+                plugin_csv_exporter.encode_values(row, encoding))
+
+
+def create_table(**columns):
+    tabledata = table.File()
+    for name, column in sorted(columns.items()):
+        tabledata.set_column_from_array(name, column)
+    return tabledata
+
+
+class Table2CsvTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.chunk_cells = plugin_csv_exporter.CHUNK_CELLS
+
+    def tearDown(self):
+        plugin_csv_exporter.CHUNK_CELLS = self.chunk_cells
+        shutil.rmtree(self.directory)
+
+    def assert_same(self, tabledata, encoding='utf_8', header=True):
+        expected = os.path.join(self.directory, 'expected.csv')
+        actual = os.path.join(self.directory, 'actual.csv')
+        row_table2csv(tabledata, expected, header, encoding)
+        plugin_csv_exporter.table2csv(tabledata, actual, header, encoding)
+        with open(expected, 'rb') as f:
+            expected_bytes = f.read()
+        with open(actual, 'rb') as f:
+            self.assertEqual(f.read(), expected_bytes)
+
+    def test_types(self):
+        self.assert_same(create_table(
+            float=np.array([0.0, 1.5, -2.0, 1e300, np.nan, np.inf]),
+            int=np.arange(6) - 3,
+            bool=np.array([True, False] * 3),
+            time=np.array([datetime.datetime(2016, 1, 2, 3, 4, 5)] * 6,
+                          dtype='datetime64[us]'),
+            text=np.array([u'a', u'', u'b c', u'\xe5', u'd', u'e'])))
+
+    def test_quoting(self):
+        tabledata = create_table(
+            text=np.array([u'a;b', u'"q"', u'line\nbreak', u'cr\r', u'',
+                           u'plain']),
+            bytes=np.array(['x;y', '', '"', 'z', '\n', 'w']))
+        for header in [True, False]:
+            self.assert_same(tabledata, header=header)
+
+    def test_single_empty_column(self):
+        self.assert_same(
+            create_table(text=np.array([u'', u'a', u'', u'b;c'])))
+        self.assert_same(create_table(bytes=np.array(['', 'a'])),
+                         header=False)
+
+    def test_encodings(self):
+        tabledata = create_table(
+            text=np.array([u'\xe5\xe4\xf6', u'\xc5;\xc4', u'\xe9"']),
+            value=np.arange(3))
+        for encoding in ['iso8859_1', 'iso8859_15', 'windows-1252']:
+            self.assert_same(tabledata, encoding)
+        self.assert_same(create_table(euro=np.array([u'\u20ac'])),
+                         'windows-1252')
+
+    def test_encoding_errors(self):
+        tabledata = create_table(text=np.array([u'\u20ac']))
+        filename = os.path.join(self.directory, 'actual.csv')
+        with self.assertRaises(UnicodeEncodeError):
+            row_table2csv(tabledata, filename, False, 'iso8859_1')
+        with self.assertRaises(UnicodeEncodeError):
+            plugin_csv_exporter.table2csv(
+                tabledata, filename, False, 'iso8859_1')
+
+    def test_chunks(self):
+        plugin_csv_exporter.CHUNK_CELLS = 4
+        self.assert_same(create_table(
+            float=np.linspace(0, 1, 11),
+            text=np.array([u'a;b', u''] * 5 + [u'c'])))
+
+
+class Tables2CsvTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_tables2csv(self):
+        tablelist = [
+            create_table(value=np.arange(i * 100) * 0.5,
+                         text=np.array([u'a;{}'.format(j)
+                                        for j in range(i * 100)]))
+            for i in range(8)]
+        actual = [os.path.join(self.directory, 'actual_{}.csv'.format(i))
+                  for i in range(len(tablelist))]
+        for workers in [None, 3]:
+            written = list(plugin_csv_exporter.tables2csv(
+                tablelist, iter(actual), True, 'utf_8', workers))
+            self.assertEqual(len(written), len(tablelist))
+            for i, (tabledata, fq_outfilename) in enumerate(written):
+                self.assertIs(tabledata, tablelist[i])
+                self.assertEqual(fq_outfilename, actual[i])
+                expected = os.path.join(self.directory, 'expected.csv')
+                plugin_csv_exporter.table2csv(
+                    tabledata, expected, True, 'utf_8')
+                with open(expected, 'rb') as f:
+                    expected_bytes = f.read()
+                with open(fq_outfilename, 'rb') as f:
+                    self.assertEqual(f.read(), expected_bytes)
+                os.remove(fq_outfilename)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+# Copyright (c) 2016, System Engineering Software Society
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither the name of the System Engineering Software Society nor the
+#       names of its contributors may be used to endorse or promote products
+#       derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.
+# IN NO EVENT SHALL SYSTEM ENGINEERING SOFTWARE SOCIETY BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+import unittest
+
+import numpy as np
+
+from sylib.detrend import cooks_distance, cooks_distance_loop, leverages
+
+
+class CooksDistanceTestCase(unittest.TestCase):
+    def setUp(self):
+        random = np.random.RandomState(1)
+        self.tb = np.linspace(0, 50, 200)
+        self.ts = 0.02 * self.tb ** 2 - self.tb + random.standard_normal(200)
+        # Outlier.
+        self.ts[120] += 25
+
+    def test_equal_to_loop(self):
+        for degree in range(5):
+            D, trend = cooks_distance(self.tb, self.ts, degree)
+            expected, expected_trend = cooks_distance_loop(
+                self.tb, self.ts, degree)
+            np.testing.assert_allclose(trend, expected_trend)
+            np.testing.assert_allclose(D, expected, rtol=1e-6, atol=1e-12)
+            self.assertEqual(np.argmax(D), 120)
+
+    def test_offset_time_basis(self):
+        # Timestamps far from zero must not break the conditioning.
+        np.testing.assert_allclose(leverages(self.tb + 1.5e9, 4),
+                                   leverages(self.tb, 4), rtol=1e-6)
+
+    def test_leverages(self):
+        design = np.vander(self.tb, 3)
+        hat = design.dot(np.linalg.pinv(design))
+        np.testing.assert_allclose(leverages(self.tb, 2), np.diag(hat))
+        self.assertAlmostEqual(leverages(self.tb, 2).sum(), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,140 @@
+# Copyright (c) 2017, System Engineering Software Society
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither the name of the System Engineering Software Society nor the
+#       names of its contributors may be used to endorse or promote products
+#       derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.
+# IN NO EVENT SHALL SYSTEM ENGINEERING SOFTWARE SOCIETY BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+import os
+import shutil
+import hashlib
+import tempfile
+import unittest
+
+from sympathy.platform import filehash
+
+
+class FileHashTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.mmap_size = filehash.MMAP_SIZE
+
+    def tearDown(self):
+        filehash.MMAP_SIZE = self.mmap_size
+        shutil.rmtree(self.directory)
+
+    def write(self, name, data, directory=None):
+        filename = os.path.join(directory or self.directory, name)
+        if not os.path.isdir(os.path.dirname(filename)):
+            os.makedirs(os.path.dirname(filename))
+        with open(filename, 'wb') as f:
+            f.write(data)
+        return filename
+
+    def test_single_file(self):
+        data = os.urandom(3 * 1024) + b'end'
+        filename = self.write('single.py', data)
+        expected = hashlib.md5(data).hexdigest()
+        self.assertEqual(filehash.hashfiles(filename), expected)
+        self.assertEqual(filehash.hashfiles(filename, hashlib.sha1),
+                         hashlib.sha1(data).hexdigest())
+        self.assertEqual(
+            filehash.hashfiles(filename, cache=filehash.DigestCache()),
+            expected)
+        # Memory mapped instead of read in chunks.
+        filehash.MMAP_SIZE = 1024
+        self.assertEqual(filehash.hashfiles(filename), expected)
+
+    def test_directory_order(self):
+        files = [('a.py', b'a'), ('sub/b.py', b'b'), ('sub/deeper/c.py', b'c'),
+                 ('z.py', b'')]
+        first = os.path.join(self.directory, 'first')
+        second = os.path.join(self.directory, 'second')
+        for name, data in files:
+            self.write(name, data, first)
+        for name, data in reversed(files):
+            self.write(name, data, second)
+        self.write('ignored.txt', b'ignored', second)
+        digest = filehash.hashfiles(first)
+        self.assertEqual(filehash.hashfiles(second), digest)
+        self.assertEqual(filehash.hashfiles(second, nworkers=1), digest)
+        self.assertEqual(
+            filehash.hashfiles(second, cache=filehash.DigestCache()), digest)
+
+        # Renaming or changing a file changes the digest.
+        os.rename(os.path.join(second, 'a.py'),
+                  os.path.join(second, 'y.py'))
+        self.assertNotEqual(filehash.hashfiles(second), digest)
+        self.write('b.py', b'changed', os.path.join(first, 'sub'))
+        self.assertNotEqual(filehash.hashfiles(first), digest)
+
+    def test_cache(self):
+        filename = self.write('cached.py', b'abc')
+        cache = filehash.DigestCache()
+        digest = hashlib.md5(b'abc').hexdigest()
+        self.assertEqual(cache.digest(filename), digest)
+        self.assertEqual(cache.digest(filename), digest)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+        # Same size, new modification time.
+        self.write('cached.py', b'xyz')
+        stat = os.stat(filename)
+        os.utime(filename, (stat.st_atime, stat.st_mtime + 10))
+        self.assertEqual(cache.digest(filename),
+                         hashlib.md5(b'xyz').hexdigest())
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+
+        # New size, same modification time.
+        stat = os.stat(filename)
+        self.write('cached.py', b'longer')
+        os.utime(filename, (stat.st_atime, stat.st_mtime))
+        self.assertEqual(cache.digest(filename),
+                         hashlib.md5(b'longer').hexdigest())
+        self.assertEqual((cache.hits, cache.misses), (1, 3))
+
+        # Separate entries per hash algorithm.
+        cache.digest(filename, hashlib.sha1)
+        self.assertEqual((cache.hits, cache.misses), (1, 4))
+
+    def test_cache_file(self):
+        filename = self.write('cached.py', b'abc')
+        cache_filename = os.path.join(self.directory, 'cache.json')
+        cache = filehash.DigestCache(cache_filename)
+        cache.digest(filename)
+        cache.save()
+        loaded = filehash.DigestCache(cache_filename)
+        self.assertEqual(loaded.digest(filename),
+                         hashlib.md5(b'abc').hexdigest())
+        self.assertEqual((loaded.hits, loaded.misses), (1, 0))
+
+    def test_hash_many(self):
+        names = [self.write('{}.py'.format(i), str(i).encode('ascii'))
+                 for i in range(20)]
+        missing = os.path.join(self.directory, 'missing.py')
+        self.assertEqual(
+            filehash.hash_many(names + [missing], nworkers=4),
+            [hashlib.md5(str(i).encode('ascii')).hexdigest()
+             for i in range(20)] + [None])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,186 @@
+# Copyright (c) 2017, System Engineering Software Society
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither the name of the System Engineering Software Society nor the
+#       names of its contributors may be used to endorse or promote products
+#       derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.
+# IN NO EVENT SHALL SYSTEM ENGINEERING SOFTWARE SOCIETY BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+import os
+import time
+import shutil
+import tempfile
+import unittest
+
+from sympathy.platform import flow_executor
+
+
+def create_node(uuid, inputs, outputs, **parameters):
+    return {'uuid': uuid, 'id': 'test.node', 'label': uuid,
+            'ports': {
+                'inputs': [{'uuid': '{}.i{}'.format(uuid, index),
+                            'index': index} for index in range(inputs)],
+                'outputs': [{'uuid': '{}.o{}'.format(uuid, index),
+                             'index': index} for index in range(outputs)]},
+            'parameters': {'type': 'json', 'data': parameters}}
+
+
+def create_connection(source, source_index, destination, destination_index,
+                      source_port='o', destination_port='i'):
+    return {'source': {'node': source, 'port': '{}.{}{}'.format(
+                source, source_port, source_index)},
+            'destination': {'node': destination, 'port': '{}.{}{}'.format(
+                destination, destination_port, destination_index)}}
+
+
+def diamond(**parameters):
+    """Flow a -> (b, c) -> d, d adds its inputs to its value."""
+    nodes = {'a': create_node('a', 0, 1, value=1),
+             'b': create_node('b', 1, 1, value=10),
+             'c': create_node('c', 1, 1, value=100),
+             'd': create_node('d', 2, 1, value=1000)}
+    for name, values in parameters.items():
+        nodes[name]['parameters']['data'].update(values)
+    return {'uuid': 'flow', 'flows': [],
+            'nodes': [nodes[name] for name in 'abcd'],
+            'connections': [create_connection('a', 0, 'b', 0),
+                            create_connection('a', 0, 'c', 0),
+                            create_connection('b', 0, 'd', 0),
+                            create_connection('c', 0, 'd', 1)]}
+
+
+def run_node(node, inputs):
+    parameters = flow_executor.node_parameters(node)
+    time.sleep(parameters.get('sleep', 0))
+    if parameters.get('fail'):
+        raise ValueError('Failed on purpose')
+    return parameters['value'] + sum(inputs)
+
+
+def file_runner(node, inputs, outputs):
+    values = []
+    for filename in inputs:
+        with open(filename) as f:
+            values.append(int(f.read()))
+    value = run_node(node, values)
+    for filename in outputs:
+        with open(filename, 'w') as f:
+            f.write(str(value))
+
+
+def memory_runner(node, inputs, outputs):
+    return [run_node(node, inputs)] * len(outputs)
+
+
+class BuildTasksTestCase(unittest.TestCase):
+    def test_subflow(self):
+        # a -> subflow(b) -> c, through the ports of the subflow.
+        subflow = {'uuid': 's', 'nodes': [create_node('b', 1, 1)],
+                   'flows': [],
+                   'ports': {'inputs': [{'uuid': 's.i0', 'index': 0}],
+                             'outputs': [{'uuid': 's.o0', 'index': 0}]},
+                   'connections': [create_connection('s', 0, 'b', 0,
+                                                     source_port='i'),
+                                   create_connection('b', 0, 's', 0,
+                                                     destination_port='o')]}
+        flow = {'uuid': 'flow', 'flows': [subflow],
+                'nodes': [create_node('a', 0, 1), create_node('c', 1, 0)],
+                'connections': [create_connection('a', 0, 's', 0),
+                                create_connection('s', 0, 'c', 0)]}
+        tasks = flow_executor.build_tasks(flow)
+        self.assertEqual(sorted(tasks), ['a', 'b', 'c'])
+        self.assertEqual(tasks['b'].inputs, [('a', 0)])
+        self.assertEqual(tasks['c'].inputs, [('b', 0)])
+        self.assertEqual(tasks['a'].dependents, ['b'])
+
+    def test_cycle(self):
+        flow = {'uuid': 'flow', 'flows': [],
+                'nodes': [create_node('a', 1, 1), create_node('b', 1, 1)],
+                'connections': [create_connection('a', 0, 'b', 0),
+                                create_connection('b', 0, 'a', 0)]}
+        with self.assertRaises(ValueError):
+            flow_executor.build_tasks(flow)
+
+
+class FlowExecutorTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def run_flow(self, flow, runner=file_runner, processes=True, **kwargs):
+        executor = flow_executor.FlowExecutor(
+            runner, processes=processes, directory=self.directory, **kwargs)
+        return executor.run(flow)
+
+    def test_files(self):
+        results = self.run_flow(diamond(), workers=2)
+        self.assertEqual(
+            [result.status for result in results.values()],
+            [flow_executor.DONE] * 4)
+        filename = results['d'].outputs[0]
+        self.assertTrue(filename.startswith(self.directory))
+        with open(filename) as f:
+            self.assertEqual(f.read(), '1112')
+
+    def test_memory(self):
+        results = self.run_flow(
+            diamond(), memory_runner, processes=False, workers=2)
+        self.assertEqual(results['d'].outputs, [1112])
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_concurrent(self):
+        flow = diamond(b={'sleep': 0.5}, c={'sleep': 0.5})
+        t0 = time.time()
+        results = self.run_flow(
+            flow, memory_runner, processes=False, workers=2)
+        self.assertLess(time.time() - t0, 0.9)
+        self.assertEqual(results['d'].outputs, [1112])
+
+    def test_failure(self):
+        for processes in [True, False]:
+            results = self.run_flow(
+                diamond(b={'fail': True}), processes=processes)
+            self.assertEqual(results['a'].status, flow_executor.DONE)
+            self.assertEqual(results['b'].status, flow_executor.FAILED)
+            self.assertIn('Failed on purpose', results['b'].error)
+            self.assertEqual(results['c'].status, flow_executor.DONE)
+            self.assertEqual(results['d'].status, flow_executor.SKIPPED)
+
+    def test_fail_fast(self):
+        results = self.run_flow(
+            diamond(b={'fail': True}, c={'sleep': 0.2}), workers=1,
+            fail_fast=True)
+        self.assertEqual(results['b'].status, flow_executor.FAILED)
+        self.assertEqual(results['c'].status, flow_executor.SKIPPED)
+        self.assertEqual(results['d'].status, flow_executor.SKIPPED)
+
+    def test_timeout(self):
+        t0 = time.time()
+        results = self.run_flow(diamond(c={'sleep': 30}), timeout=0.5)
+        self.assertLess(time.time() - t0, 10)
+        self.assertEqual(results['b'].status, flow_executor.DONE)
+        self.assertEqual(results['c'].status, flow_executor.TIMEOUT)
+        self.assertEqual(results['d'].status, flow_executor.SKIPPED)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+# Copyright (c) 2017, System Engineering Software Society
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither the name of the System Engineering Software Society nor the
+#       names of its contributors may be used to endorse or promote products
+#       derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.
+# IN NO EVENT SHALL SYSTEM ENGINEERING SOFTWARE SOCIETY BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+import os
+import shutil
+import tempfile
+import unittest
+
+import h5py
+import numpy as np
+
+from sympathy.api import adaf
+from sympathy.datasources.hdf5 import dsgroup
+
+
+class Linkable(object):
+    def __init__(self, can_link):
+        self.can_link = can_link
+
+
+def external_links(filename):
+    result = []
+
+    def visit(group):
+        for key in group:
+            link = group.get(key, getlink=True)
+            if isinstance(link, h5py.ExternalLink):
+                result.append(key)
+            elif isinstance(group[key], h5py.Group):
+                visit(group[key])
+
+    with h5py.File(filename, 'r') as f:
+        visit(f)
+    return result
+
+
+class PassthroughTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.policy = dsgroup.PASSTHROUGH
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, 'origin.sydata')
+        self.output = os.path.join(self.directory, 'derived.sydata')
+        self.adaf_obj = adaf.File()
+        self.adaf_obj.meta.create_column('name', np.array(['origin']))
+        raster = self.adaf_obj.sys.create('system').create('raster')
+        raster.create_basis(np.arange(1000, dtype=float), {'unit': 's'})
+        raster.create_signal('signal', np.linspace(0, 1, 1000),
+                             {'unit': 'V'})
+        with adaf.File(filename=self.filename, mode='w',
+                       source=self.adaf_obj):
+            pass
+
+    def tearDown(self):
+        dsgroup.PASSTHROUGH = self.policy
+        shutil.rmtree(self.directory)
+
+    def write_derived(self, policy):
+        dsgroup.PASSTHROUGH = policy
+        with adaf.File(filename=self.filename, mode='r') as origin:
+            derived = adaf.File()
+            derived.source(origin)
+            derived.meta.create_column('derived', np.array([True]))
+            with adaf.File(filename=self.output, mode='w', source=derived):
+                pass
+
+    def assert_derived(self):
+        with adaf.File(filename=self.output, mode='r') as derived:
+            self.assertEqual(derived.meta.keys(), ['name', 'derived'])
+            raster = derived.sys['system']['raster']
+            np.testing.assert_array_equal(
+                raster.basis_column().value(), np.arange(1000, dtype=float))
+            np.testing.assert_array_equal(
+                raster['signal'].y, np.linspace(0, 1, 1000))
+            self.assertEqual(raster['signal'].get_attributes(),
+                             {'unit': 'V'})
+
+    def test_policy(self):
+        linkable = Linkable(True)
+        unlinkable = Linkable(False)
+        dsgroup.PASSTHROUGH = 'link'
+        self.assertEqual(dsgroup.passthrough(linkable, linkable), 'link')
+        self.assertEqual(dsgroup.passthrough(linkable, unlinkable), 'copy')
+        dsgroup.PASSTHROUGH = 'copy'
+        self.assertEqual(dsgroup.passthrough(linkable, linkable), 'copy')
+        dsgroup.PASSTHROUGH = 'none'
+        self.assertIsNone(dsgroup.passthrough(linkable, linkable))
+
+    def test_copy(self):
+        self.write_derived('copy')
+        self.assertEqual(external_links(self.output), [])
+        os.remove(self.filename)
+        self.assert_derived()
+
+    def test_none(self):
+        self.write_derived('none')
+        self.assert_derived()
+
+    def test_link_without_can_link(self):
+        # Files written through the API can not link and get copies.
+        self.write_derived('link')
+        self.assertEqual(external_links(self.output), [])
+        os.remove(self.filename)
+        self.assert_derived()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,132 @@
+# Copyright (c) 2017, System Engineering Software Society
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither the name of the System Engineering Software Society nor the
+#       names of its contributors may be used to endorse or promote products
+#       derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.
+# IN NO EVENT SHALL SYSTEM ENGINEERING SOFTWARE SOCIETY BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+import os
+import shutil
+import tempfile
+import unittest
+
+import h5py
+import numpy as np
+
+from sympathy.platform import state
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows.
+    resource = None
+
+
+class Hdf5StateTestCase(unittest.TestCase):
+
+    nfiles = 300
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.filenames = []
+        self.main = os.path.join(self.directory, 'main.h5')
+        with h5py.File(self.main, 'w') as main:
+            for index in range(self.nfiles):
+                filename = os.path.join(
+                    self.directory, '{}.h5'.format(index))
+                with h5py.File(filename, 'w') as hdf5_file:
+                    hdf5_file['values'] = np.arange(index, index + 3)
+                main[str(index)] = h5py.ExternalLink(filename, '/values')
+                self.filenames.append(filename)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def walk(self, hdf5_state, main):
+        return [hdf5_state.get(main, str(index))[0]
+                for index in range(self.nfiles)]
+
+    def test_walk_more_files_than_descriptors(self):
+        if resource is None:
+            self.skipTest('Descriptor limit can not be set')
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        limit = self.nfiles // 2
+        resource.setrlimit(resource.RLIMIT_NOFILE, (limit, hard))
+        hdf5_state = state.Hdf5State(max_open=limit // 4)
+        try:
+            main = hdf5_state.open(self.main, 'r')
+            self.assertEqual(self.walk(hdf5_state, main),
+                             list(range(self.nfiles)))
+            self.assertLessEqual(len(hdf5_state.filestate), limit // 4)
+            # Second walk reopens the evicted files.
+            self.assertEqual(self.walk(hdf5_state, main),
+                             list(range(self.nfiles)))
+        finally:
+            hdf5_state.clear()
+            resource.setrlimit(resource.RLIMIT_NOFILE, (soft, hard))
+        self.assertEqual(hdf5_state.counters['open'], 2 * self.nfiles + 1)
+        self.assertGreater(hdf5_state.counters['reopen'], 0)
+        self.assertGreater(hdf5_state.counters['eviction'], 0)
+
+    def test_in_use_not_evicted(self):
+        hdf5_state = state.Hdf5State(max_open=2)
+        try:
+            main = hdf5_state.open(self.main, 'r')
+            datasets = [hdf5_state.get(main, str(index))
+                        for index in range(4)]
+            # Files with live datasets are kept open beyond max_open.
+            self.assertEqual(len(hdf5_state.filestate), 5)
+            self.assertEqual(datasets[0][0], 0)
+            self.assertEqual(datasets[3][0], 3)
+            self.assertEqual(hdf5_state.counters['eviction'], 0)
+            del datasets, main
+            self.assertEqual(hdf5_state.evict(), 5)
+        finally:
+            hdf5_state.clear()
+
+    def test_write_not_evicted(self):
+        hdf5_state = state.Hdf5State(max_open=1)
+        filename = os.path.join(self.directory, 'out.h5')
+        try:
+            hdf5_state.open(filename, 'w')
+            hdf5_state.open(self.filenames[0], 'r')
+            self.assertEqual(list(hdf5_state.filestate),
+                             [self.filenames[0], filename][::-1])
+            hdf5_state.evict()
+            self.assertEqual(list(hdf5_state.filestate), [filename])
+        finally:
+            hdf5_state.clear()
+
+    def test_least_recently_used(self):
+        hdf5_state = state.Hdf5State(max_open=2)
+        try:
+            hdf5_state.open(self.filenames[0], 'r')
+            hdf5_state.open(self.filenames[1], 'r')
+            hdf5_state.open(self.filenames[0], 'r')
+            hdf5_state.open(self.filenames[2], 'r')
+            self.assertEqual(list(hdf5_state.filestate),
+                             [self.filenames[0], self.filenames[2]])
+        finally:
+            hdf5_state.clear()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+# Copyright (c) 2017, System Engineering Software Society
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither the name of the System Engineering Software Society nor the
+#       names of its contributors may be used to endorse or promote products
+#       derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.
+# IN NO EVENT SHALL SYSTEM ENGINEERING SOFTWARE SOCIETY BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+import os
+import sys
+import json
+import shutil
+import tempfile
+import textwrap
+import unittest
+import subprocess
+
+import numpy as np
+
+from sympathy.api import table
+
+
+NODE_SOURCE = textwrap.dedent('''
+    from sympathy.api import node as synode
+    from sympathy.api.nodeconfig import Port, Ports
+
+
+    class DoubleColumn(synode.Node):
+        name = 'Double Column'
+        nodeid = 'test.doublecolumn'
+        inputs = Ports([Port.Table('Input Table', name='port1')])
+        outputs = Ports([Port.Table('Output Table', name='port1')])
+        parameters = synode.parameters()
+        parameters.set_string('column', value='x')
+
+        def execute(self, node_context):
+            column = node_context.parameters['column'].value
+            node_context.output['port1'].set_column_from_array(
+                column, node_context.input['port1'].get_column_to_array(
+                    column) * 2)
+    ''')
+
+RUN_SOURCE = textwrap.dedent('''
+    import sys
+    from sympathy.utils.run_node_standalone import run_node
+    run_node(sys.argv[1], '', sys.argv[2], {'port1': sys.argv[3]},
+             sys.argv[1], 'node_double_column.py', 'DoubleColumn')
+    print 'Qt imported:', any(name.split('.')[0] in ('PySide', 'PyQt4')
+                              for name in sys.modules)
+    ''')
+
+
+def port(description):
+    return {'name': 'port1', 'description': description, 'type': 'table',
+            'scheme': 'hdf5'}
+
+
+class HeadlessTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_run_node(self):
+        with open(os.path.join(
+                self.directory, 'node_double_column.py'), 'w') as f:
+            f.write(NODE_SOURCE)
+        definition_filename = os.path.join(self.directory, 'definition.json')
+        with open(definition_filename, 'w') as f:
+            json.dump({'label': 'Double Column',
+                       'ports': {'inputs': [port('Input Table')],
+                                 'outputs': [port('Output Table')]}}, f)
+        input_filename = os.path.join(self.directory, 'input.sydata')
+        with table.File(filename=input_filename, mode='w') as input_table:
+            input_table.set_column_from_array('x', np.arange(4))
+
+        env = dict(os.environ)
+        env['SY_HEADLESS'] = '1'
+        env['PYTHONPATH'] = os.pathsep.join(sys.path)
+        process = subprocess.Popen(
+            [sys.executable, '-c', RUN_SOURCE, self.directory,
+             definition_filename, input_filename],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=env)
+        stdout, stderr = process.communicate()
+        self.assertEqual(process.returncode, 0, stderr)
+        lines = stdout.splitlines()
+        self.assertEqual(lines[-1], 'Qt imported: False')
+
+        output_filename = lines[lines.index(
+            'Data is written to file(s):') + 1]
+        try:
+            with table.File(filename=output_filename, mode='r') as output:
+                self.assertEqual(
+                    output.get_column_to_array('x').tolist(), [0, 2, 4, 6])
+        finally:
+            os.remove(output_filename)
+
+
+if __name__ == '__main__':
+    unittest.main()
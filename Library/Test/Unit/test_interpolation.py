@@ -0,0 +1,62 @@
+# Copyright (c) 2017, System Engineering Software Society
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither the name of the System Engineering Software Society nor the
+#       names of its contributors may be used to endorse or promote products
+#       derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.
+# IN NO EVENT SHALL SYSTEM ENGINEERING SOFTWARE SOCIETY BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+import os
+import imp
+import unittest
+
+import numpy as np
+
+
+node_interpolation = imp.load_source(
+    'node_interpolation', os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), os.pardir, os.pardir,
+        'Library', 'sympathy', 'data', 'adaf', 'node_interpolation.py'))
+
+
+class InterpolationTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tb_old = np.arange(5.0)
+        self.tb_new = np.array([-1, 0, 0.4, 0.6, 2.5, 3.9, 4, 7])
+
+    def test_nearest(self):
+        for ts_old in [np.arange(5) * 10, np.arange(5) * 10.0,
+                       np.array([True, False, True, False, True])]:
+            result = node_interpolation.nearest_any(
+                self.tb_old, ts_old)(self.tb_new)
+            self.assertEqual(result.dtype, ts_old.dtype)
+            self.assertEqual(result.tolist(),
+                             ts_old[[0, 0, 0, 1, 3, 4, 4, 4]].tolist())
+
+    def test_zero(self):
+        ts_old = np.arange(5) * 10
+        result = node_interpolation.zero_any(
+            self.tb_old, ts_old)(self.tb_new)
+        self.assertEqual(result.tolist(), [0, 0, 0, 0, 20, 30, 40, 40])
+
+
+if __name__ == '__main__':
+    unittest.main()
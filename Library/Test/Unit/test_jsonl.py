@@ -0,0 +1,83 @@
+# Copyright (c) 2017, System Engineering Software Society
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither the name of the System Engineering Software Society nor the
+#       names of its contributors may be used to endorse or promote products
+#       derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.
+# IN NO EVENT SHALL SYSTEM ENGINEERING SOFTWARE SOCIETY BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+import unittest
+
+from sympathy.api import table
+from sympathy.datasources.jsonl import dsgroup, dstable
+from datasource_fixtures import DatasourceTestMixin
+
+
+class JsonlTestCase(DatasourceTestMixin, unittest.TestCase):
+    scheme = 'jsonl'
+
+    def test_chunks(self):
+        chunk_rows = dstable.CHUNK_ROWS
+        dstable.CHUNK_ROWS = 2
+        try:
+            expected = self.create_table()
+            self.write_table(expected)
+        finally:
+            dstable.CHUNK_ROWS = chunk_rows
+        with open(self.filename, 'rb') as f:
+            self.assertIn('["columns", "index", "2"]', f.read())
+        with table.File(filename=self.filename, mode='r') as actual:
+            self.assert_table_equal(expected, actual)
+
+    def test_append(self):
+        jsonl_file = dsgroup.JsonlFile(self.filename, 'w', {})
+        jsonl_file.write((u'a',), 1)
+        jsonl_file.close()
+        with open(self.filename, 'rb') as f:
+            data = f.read()
+        jsonl_file = dsgroup.JsonlFile(self.filename, 'r+')
+        jsonl_file.write((u'b',), [2])
+        jsonl_file.write((u'a', u'c'), 3)
+        jsonl_file.close()
+        with open(self.filename, 'rb') as f:
+            # Existing records are kept, new ones are added after them.
+            self.assertTrue(
+                f.read().startswith(data[:data.rindex(dsgroup.INDEX)]))
+        jsonl_file = dsgroup.JsonlFile(self.filename, 'r')
+        self.assertEqual(jsonl_file.read((u'a',)), 1)
+        self.assertEqual(jsonl_file.read((u'b',)), [2])
+        self.assertEqual(jsonl_file.children((u'a',)), [u'c'])
+        self.assertEqual(jsonl_file.children(()), [u'a', u'b'])
+        jsonl_file.close()
+
+    def test_scan(self):
+        self.write_tables(4)
+        # Remove the index and leave an incomplete record, like after a
+        # crash while writing.
+        with open(self.filename, 'rb') as f:
+            data = f.read()
+        end = data.rindex(dsgroup.INDEX)
+        with open(self.filename, 'wb') as f:
+            f.write(data[:end] + '["3", "partial"]\t{')
+        self.assertEqual(self.read_indices(), list(range(4)))
+
+
+if __name__ == '__main__':
+    unittest.main()
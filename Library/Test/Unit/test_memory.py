@@ -0,0 +1,95 @@
+# Copyright (c) 2017, System Engineering Software Society
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither the name of the System Engineering Software Society nor the
+#       names of its contributors may be used to endorse or promote products
+#       derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.
+# IN NO EVENT SHALL SYSTEM ENGINEERING SOFTWARE SOCIETY BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+import unittest
+
+from sympathy.utils import memory
+
+
+class Clock(object):
+
+    def __init__(self):
+        self.time = 0.0
+
+    def __call__(self):
+        return self.time
+
+
+class SoftBudgetTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.rss = memory.rss
+        self.current = 0
+        memory.rss = lambda: self.current
+        self.clock = Clock()
+        self.spills = []
+        self.budget = memory.SoftBudget(
+            100, [self.spills.append], interval=1.0, clock=self.clock)
+
+    def tearDown(self):
+        memory.rss = self.rss
+
+    def test_below(self):
+        self.current = 100
+        self.assertFalse(self.budget.check())
+        self.assertEqual(self.budget.batch_size(8), 8)
+        self.assertEqual(self.spills, [])
+
+    def test_exceeded_once(self):
+        self.current = 200
+        for i in range(10):
+            self.clock.time = i * 0.5
+            self.assertEqual(self.budget.batch_size(8), 4)
+        # Handlers run and the scale is halved once while RSS stays above.
+        self.assertEqual(self.spills, [self.budget])
+        self.assertEqual(self.budget.exceeded, 1)
+
+    def test_interval(self):
+        self.current = 200
+        self.assertTrue(self.budget.check())
+        self.current = 50
+        self.clock.time = 0.5
+        # Not measured again until interval has passed.
+        self.assertTrue(self.budget.check())
+        self.clock.time = 1.0
+        self.assertFalse(self.budget.check())
+
+    def test_restore(self):
+        for current, size in [(200, 4), (200, 4), (50, 8), (200, 4),
+                              (50, 8), (50, 8), (200, 4)]:
+            self.clock.time += 1
+            self.current = current
+            self.assertEqual(self.budget.batch_size(8), size)
+        self.assertEqual(self.budget.exceeded, 3)
+        self.assertEqual(len(self.spills), 3)
+
+    def test_minimum(self):
+        self.current = 200
+        self.budget.scale = 0.125
+        self.assertEqual(self.budget.batch_size(4, minimum=2), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,177 @@
+# Copyright (c) 2017, System Engineering Software Society
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither the name of the System Engineering Software Society nor the
+#       names of its contributors may be used to endorse or promote products
+#       derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.
+# IN NO EVENT SHALL SYSTEM ENGINEERING SOFTWARE SOCIETY BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+import os
+import time
+import shutil
+import tempfile
+import unittest
+
+import h5py
+import numpy as np
+
+from sympathy.platform import node_cache
+
+
+class Node(object):
+    nodeid = 'test.node'
+    version = '1.0'
+
+
+class NotMemoized(Node):
+    memoize = False
+
+
+def write(filename, values, link=None):
+    with h5py.File(filename, 'w') as hdf5_file:
+        hdf5_file.create_dataset('values', data=np.array(values))
+        if link is not None:
+            hdf5_file['linked'] = h5py.ExternalLink(link, '/values')
+
+
+def read(filename):
+    with h5py.File(filename, 'r') as hdf5_file:
+        return hdf5_file['values'][...].tolist()
+
+
+class NodeCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache = node_cache.set_cache(
+            os.path.join(self.directory, 'cache'))
+        self.input = self.filename('input')
+        write(self.input, [1, 2, 3])
+
+    def tearDown(self):
+        node_cache.set_cache(None)
+        shutil.rmtree(self.directory)
+
+    def filename(self, name):
+        return os.path.join(self.directory, name + '.sydata')
+
+    def parameters(self, output, value=1):
+        return {'parameters': {'type': 'json', 'data': {'value': value}},
+                'ports': {
+                    'inputs': [{'file': self.input, 'type': 'table',
+                                'scheme': 'hdf5'}],
+                    'outputs': [{'file': output, 'type': 'table',
+                                 'scheme': 'hdf5'}]}}
+
+    def execute(self, output, value=1, node=None, link=None):
+        """Execute with memoization, return True on hit."""
+        memo = node_cache.memo(node or Node(), self.parameters(output, value),
+                               {})
+        if memo.serve():
+            return True
+        write(output, [value], link)
+        memo.store()
+        return False
+
+    def test_hit(self):
+        self.assertFalse(self.execute(self.filename('out0')))
+        output = self.filename('out1')
+        self.assertTrue(self.execute(output))
+        self.assertEqual(read(output), [1])
+        stats = self.cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['stores']),
+                         (1, 1, 1))
+
+    def test_key(self):
+        parameters = self.parameters(self.filename('out'))
+        key = self.cache.key(Node(), parameters, {})
+        self.assertEqual(key, self.cache.key(Node(), parameters, {}))
+        self.assertNotEqual(
+            key, self.cache.key(Node(), self.parameters('out', 2), {}))
+        node = Node()
+        node.version = '2.0'
+        self.assertNotEqual(key, self.cache.key(node, parameters, {}))
+        self.assertNotEqual(
+            key, self.cache.key(Node(), parameters, {'alias': 'table'}))
+        # Input content, not its modification time or name, is the key.
+        time.sleep(0.01)
+        write(self.input, [1, 2, 3])
+        self.assertEqual(key, self.cache.key(Node(), parameters, {}))
+        write(self.input, [1, 2, 4])
+        self.assertNotEqual(key, self.cache.key(Node(), parameters, {}))
+
+    def test_linked_input(self):
+        linked = self.filename('linked')
+        write(linked, [1])
+        write(self.input, [1, 2, 3], link=linked)
+        key = self.cache.key(Node(), self.parameters('out'), {})
+        write(linked, [2])
+        self.assertNotEqual(
+            key, self.cache.key(Node(), self.parameters('out'), {}))
+
+    def test_linked_output(self):
+        linked = self.filename('linked')
+        write(linked, [1])
+        self.execute(self.filename('out0'), link=linked)
+        self.assertTrue(self.execute(self.filename('out1')))
+        write(linked, [2])
+        self.assertFalse(self.execute(self.filename('out2')))
+
+    def test_opt_out(self):
+        self.assertIsNone(node_cache.memo(
+            NotMemoized(), self.parameters(self.filename('out')), {}))
+
+    def test_unshare(self):
+        output = self.filename('out')
+        self.execute(output)
+        self.assertTrue(self.execute(output))
+        # A miss must not write through the hard link to the stored file.
+        self.assertFalse(self.execute(output, value=2))
+        self.assertEqual(read(output), [2])
+        self.assertTrue(self.execute(self.filename('out1')))
+        self.assertEqual(read(self.filename('out1')), [1])
+
+    def test_evict(self):
+        self.cache.limit = 0
+        self.execute(self.filename('out0'))
+        self.assertEqual(self.cache.stats()['entries'], 0)
+        self.assertEqual(self.cache.evictions, 1)
+        self.assertFalse(self.execute(self.filename('out1')))
+
+    def test_evict_least_recently_used(self):
+        self.execute(self.filename('a'), value=1)
+        self.execute(self.filename('b'), value=2)
+        size = self.cache.stats()['size']
+        entries = self.cache.entries()
+        # Make the first entry older and use it, the second is then the
+        # least recently used.
+        for used, _, key in entries:
+            path = self.cache._entry_filename(key)
+            os.utime(path, (used - 10, used - 10))
+        oldest = min(entries)[2]
+        self.cache.lookup(oldest, [self.filename('c')])
+        self.cache.limit = size - 1
+        self.cache.evict()
+        self.assertEqual([key for _, _, key in self.cache.entries()],
+                         [oldest])
+
+
+if __name__ == '__main__':
+    unittest.main()
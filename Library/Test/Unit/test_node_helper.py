@@ -0,0 +1,199 @@
+# Copyright (c) 2017, System Engineering Software Society
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither the name of the System Engineering Software Society nor the
+#       names of its contributors may be used to endorse or promote products
+#       derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.
+# IN NO EVENT SHALL SYSTEM ENGINEERING SOFTWARE SOCIETY BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+import time
+import threading
+import unittest
+
+import numpy as np
+
+from sympathy.api import adaf
+from sympathy.api import table
+from sympathy.platform import gennode
+from sympathy.utils import node_helper
+
+
+def delayed_square(value):
+    # Later items finish first.
+    time.sleep(0.001 * (10 - value))
+    return value * value
+
+
+class DoubleOperation(node_helper.TableOperation):
+    """Doubles column x, fails for tables named fail."""
+    inputs = ['Input']
+    outputs = ['Output']
+    update_using = None
+    parallel_workers = 4
+
+    @staticmethod
+    def get_parameters(parameter_group):
+        pass
+
+    def execute_table(self, in_table, out_table, parameters):
+        in_table = in_table['Input']
+        if in_table.get_name() == 'fail':
+            raise ValueError('fail')
+        out_table['Output'].set_column_from_array(
+            'x', in_table.get_column_to_array('x') * 2)
+
+
+class DoubleRasterOperation(DoubleOperation):
+
+    def execute_table(self, in_table, out_table, parameters):
+        raise AssertionError('Should use execute_raster')
+
+    def execute_raster(self, in_raster, out_raster, parameters):
+        out_raster['Output'].create_signal(
+            'x', in_raster['Input']['x'].y * 2)
+
+
+DoubleTables = node_helper.tables_node_factory(
+    'DoubleTables', DoubleOperation, 'Double Tables', 'test.doubletables')
+
+
+DoubleADAFs = node_helper.adafs_node_factory(
+    'DoubleADAFs', DoubleRasterOperation, 'Double ADAFs', 'test.doubleadafs',
+    'Time series')
+
+
+class NodeContext(object):
+
+    def __init__(self, input, parameters):
+        self.input = {0: input, 'Input': input}
+        self.output = {0: [], 'Output': []}
+        self.parameters = parameters
+
+
+def create_table(index, name=None):
+    table_ = table.File()
+    table_.set_column_from_array('x', np.arange(5) + index)
+    table_.set_name(name)
+    return table_
+
+
+def create_adaf(index):
+    adaf_ = adaf.File()
+    raster = adaf_.sys.create('system0').create('raster0')
+    raster.create_basis(np.arange(5, dtype=float))
+    raster.create_signal('x', np.arange(5) + index)
+    return adaf_
+
+
+class OrderedMapTestCase(unittest.TestCase):
+
+    def test_sequential(self):
+        self.assertEqual(
+            list(node_helper.ordered_map(delayed_square,
+                                         [(i,) for i in range(10)])),
+            [i * i for i in range(10)])
+
+    def test_order(self):
+        self.assertEqual(
+            list(node_helper.ordered_map(
+                delayed_square, [(i,) for i in range(10)], workers=4)),
+            [i * i for i in range(10)])
+
+    def test_window(self):
+        lock = threading.Lock()
+        running = [0, 0]
+
+        def function(value):
+            with lock:
+                running[0] += 1
+                running[1] = max(running)
+            time.sleep(0.005)
+            with lock:
+                running[0] -= 1
+            return value
+
+        self.assertEqual(
+            list(node_helper.ordered_map(
+                function, [(i,) for i in range(20)], workers=4, window=3)),
+            range(20))
+        self.assertLessEqual(running[1], 3)
+
+    def test_exception(self):
+        def function(value):
+            if value == 3:
+                raise ValueError(value)
+            return delayed_square(value)
+
+        results = []
+        with self.assertRaises(ValueError):
+            for result in node_helper.ordered_map(
+                    function, [(i,) for i in range(10)], workers=4):
+                results.append(result)
+        # Results before the failing item, in order, and none after it.
+        self.assertEqual(results, [0, 1, 4])
+
+
+class CalculationTestCase(unittest.TestCase):
+
+    def test_tables(self):
+        node = DoubleTables()
+        progress = []
+        node.set_progress = progress.append
+        node_context = NodeContext(
+            [create_table(i) for i in range(8)], DoubleTables.parameters)
+        node.execute(node_context)
+        self.assertEqual(
+            [out_table.get_column_to_array('x').tolist()
+             for out_table in node_context.output[0]],
+            [((np.arange(5) + i) * 2).tolist() for i in range(8)])
+        self.assertEqual(progress, [12.5 * i for i in range(8)])
+
+    def test_tables_exception(self):
+        node = DoubleTables()
+        node.set_progress = lambda value: None
+        node_context = NodeContext(
+            [create_table(0), create_table(1), create_table(2, 'fail'),
+             create_table(3)], DoubleTables.parameters)
+        with self.assertRaises(ValueError):
+            node.execute(node_context)
+        self.assertEqual(len(node_context.output[0]), 2)
+
+    def test_adafs_execute_raster(self):
+        node = DoubleADAFs()
+        progress = []
+        node.set_progress = progress.append
+        parameters = gennode.parameters(DoubleADAFs.parameters)
+        selection = parameters[node_helper.ADAF_GROUP]
+        selection['system'].list = ['system0']
+        selection['system'].selected = 'system0'
+        selection['raster'].list = ['raster0']
+        selection['raster'].selected = 'raster0'
+        node_context = NodeContext(
+            [create_adaf(i) for i in range(4)], parameters)
+        node.execute(node_context)
+        self.assertEqual(
+            [out_adaf.sys['system0']['raster0']['x'].y.tolist()
+             for out_adaf in node_context.output[0]],
+            [((np.arange(5) + i) * 2).tolist() for i in range(4)])
+        self.assertEqual(progress, [0, 25, 50, 75])
+
+
+if __name__ == '__main__':
+    unittest.main()
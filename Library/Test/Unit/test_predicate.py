@@ -0,0 +1,99 @@
+# Copyright (c) 2016, System Engineering Software Society
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither the name of the System Engineering Software Society nor the
+#       names of its contributors may be used to endorse or promote products
+#       derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.
+# IN NO EVENT SHALL SYSTEM ENGINEERING SOFTWARE SOCIETY BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+import unittest
+
+import numpy as np
+import pandas
+
+from sylib import util
+from sylib.predicate import compile_predicate, column_mask
+
+
+class CompilePredicateTestCase(unittest.TestCase):
+    def setUp(self):
+        self.env = {'C0': np.array([0.25, 3.0, 5]), 'limit': 2}
+        self.columns = [
+            np.array([0.1, 0.5, np.nan, 3, -2, 0.25, 5]),
+            np.array([1, 2, 3, 4, 5, 6, 7]),
+            np.array([True, False, True, False, True, False, True]),
+            np.array([u'alpha', u'beta', u'', u'\xe5sa', u'gamma', u'al',
+                      u'lab']),
+            np.array([b'alpha', b'beta', b'', b'x', b'gamma', b'al',
+                      b'lab'])]
+
+    def assert_rowwise(self, source):
+        for values in self.columns:
+            function = util.base_eval(source, self.env)
+            try:
+                expected = np.asarray(
+                    pandas.Series(values).apply(function), dtype=bool)
+            except (TypeError, AttributeError):
+                continue
+            np.testing.assert_array_equal(
+                expected, column_mask(source, values, self.env))
+
+    def test_compiled(self):
+        sources = [
+            'lambda x: x > 0.5',
+            'lambda x: 0.25 <= x < 4',
+            'lambda x: not x != limit',
+            'lambda x: x in C0',
+            'lambda x: x not in (1, 2, 3)',
+            "lambda x: x in ['beta', 'al']",
+            "lambda x: x.startswith('al')",
+            "lambda x: x.endswith(('a', 'b'))",
+            "lambda x: 'a' in x",
+            "lambda x: x == 'beta' or x < 'b' and x != ''",
+            'lambda x: (x > 1) & (x < 5) | (x == -2)']
+        for source in sources:
+            self.assertIsNotNone(compile_predicate(source, self.env), source)
+            self.assert_rowwise(source)
+
+    def test_fallback(self):
+        sources = [
+            'lambda x: x * 2 > 1',
+            'lambda x: len(x) > 2',
+            'lambda x, y=1: x > y']
+        for source in sources:
+            self.assertIsNone(compile_predicate(source, self.env), source)
+            self.assert_rowwise(source)
+
+    def test_mismatched_types(self):
+        predicate = compile_predicate("lambda x: x.startswith('a')")
+        self.assertIsNone(predicate.mask(np.arange(3)))
+        predicate = compile_predicate('lambda x: x > 1')
+        self.assertIsNone(predicate.mask(np.array([u'a', u'b'])))
+        predicate = compile_predicate("lambda x: x in 'alphabet'")
+        self.assertIsNone(predicate.mask(np.array([u'a', u'b'])))
+
+    def test_syntax_error(self):
+        self.assertIsNone(compile_predicate('lambda x: x >'))
+        with self.assertRaises(SyntaxError):
+            column_mask('lambda x: x >', np.arange(3))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,135 @@
+# Copyright (c) 2017, System Engineering Software Society
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither the name of the System Engineering Software Society nor the
+#       names of its contributors may be used to endorse or promote products
+#       derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.
+# IN NO EVENT SHALL SYSTEM ENGINEERING SOFTWARE SOCIETY BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+import unittest
+
+from sympathy.platform import progress
+
+
+class Clock(object):
+
+    def __init__(self):
+        self.time = 0.0
+
+    def __call__(self):
+        return self.time
+
+
+class ReporterTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = Clock()
+        self.progress = []
+        self.status = []
+        self.polls = []
+        self.reporter = progress.Reporter(
+            self.progress.append, self.status.append,
+            lambda: self.polls.append(self.clock()),
+            interval=0.1, delta=0.5, abort_interval=0.1, clock=self.clock)
+
+    def test_coalesce(self):
+        items = 100000
+        for i in range(items):
+            # One millisecond for each item.
+            self.clock.time = i * 0.001
+            self.reporter.progress(100.0 * i / items)
+        self.reporter.progress(100)
+        # At most one message per interval, at least delta apart.
+        self.assertLessEqual(len(self.progress), 100 / 0.1 + 2)
+        self.assertGreater(len(self.progress), 10)
+        self.assertEqual(self.progress[0], 0)
+        self.assertEqual(self.progress[-1], 100)
+        self.assertEqual(self.progress, sorted(self.progress))
+
+    def test_delta(self):
+        for i in range(1000):
+            self.clock.time = i
+            self.reporter.progress(i * 0.001)
+        # Changes smaller than delta are held back until flush.
+        self.assertEqual(self.progress, [0, 0.5])
+        self.reporter.flush()
+        self.assertEqual(self.progress, [0, 0.5, 0.999])
+        self.reporter.flush()
+        self.assertEqual(len(self.progress), 3)
+
+    def test_status(self):
+        for i in range(1000):
+            self.clock.time = i * 0.001
+            self.reporter.status('item {}'.format(i))
+        self.assertEqual(len(self.status), 10)
+        self.reporter.flush()
+        self.assertEqual(self.status[-1], 'item 999')
+
+    def test_poll(self):
+        for i in range(1000):
+            self.clock.time = i * 0.001
+            self.reporter.poll()
+        self.assertEqual(len(self.polls), 10)
+
+    def test_poll_pending(self):
+        self.reporter.progress(0)
+        self.reporter.status('first')
+        self.clock.time = 0.05
+        self.reporter.progress(10)
+        self.reporter.status('second')
+        self.reporter.poll()
+        # Not yet due.
+        self.assertEqual(self.progress, [0])
+        self.assertEqual(self.status, ['first'])
+        # Sent by a poll once due, without further updates.
+        self.clock.time = 0.1
+        self.reporter.poll()
+        self.assertEqual(self.progress, [0, 10])
+        self.assertEqual(self.status, ['first', 'second'])
+        self.reporter.flush()
+        self.assertEqual(self.progress, [0, 10])
+        self.assertEqual(self.status, ['first', 'second'])
+
+    def test_range(self):
+        items = 4
+        for i in range(items):
+            with self.reporter.range(100.0 * i / items,
+                                     100.0 * (i + 1) / items):
+                for j in range(10):
+                    self.clock.time += 1
+                    self.reporter.progress(j * 10)
+        self.assertEqual(self.progress[0], 0)
+        self.assertIn(35.0, self.progress)
+        self.assertEqual(self.progress[-1], 100)
+
+    def test_nested_range(self):
+        with self.reporter.range(50, 100):
+            with self.reporter.range(0, 50):
+                self.reporter.progress(50)
+                self.assertEqual(self.progress, [62.5])
+                self.clock.time += 1
+            self.assertEqual(self.progress, [62.5, 75])
+            self.clock.time += 1
+            self.reporter.progress(100)
+        self.assertEqual(self.progress, [62.5, 75, 100])
+
+
+if __name__ == '__main__':
+    unittest.main()
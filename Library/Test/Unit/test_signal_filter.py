@@ -0,0 +1,70 @@
+# Copyright (c) 2016, System Engineering Software Society
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither the name of the System Engineering Software Society nor the
+#       names of its contributors may be used to endorse or promote products
+#       derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.
+# IN NO EVENT SHALL SYSTEM ENGINEERING SOFTWARE SOCIETY BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+import unittest
+
+import numpy as np
+import scipy.signal as signal
+
+from sylib.signal_filter import filter_columns
+
+
+class FilterColumnsTestCase(unittest.TestCase):
+    def setUp(self):
+        random = np.random.RandomState(0)
+        self.iir = signal.iirdesign(0.1, 0.2, 1, 40, ftype='ellip')
+        self.fir = signal.firwin(31, 0.2), [1.0]
+        self.columns = (
+            [random.standard_normal(500) for _ in range(20)] +
+            [np.arange(500, dtype=np.int32),
+             random.standard_normal(500).astype(np.float32),
+             np.arange(500) % 3 == 0])
+
+    def test_identical(self):
+        for b, a in [self.iir, self.fir]:
+            for function in [signal.lfilter, signal.filtfilt]:
+                for batch_bytes in [0, 10000, 10 ** 7]:
+                    result = filter_columns(
+                        function, b, a, self.columns, batch_bytes)
+                    for column, filtered in zip(self.columns, result):
+                        expected = function(b, a, column)
+                        self.assertEqual(filtered.dtype, expected.dtype)
+                        np.testing.assert_array_equal(filtered, expected)
+
+    def test_errors(self):
+        b, a = self.iir
+        columns = [np.ones(5), np.ones(5), np.ones(500)]
+        result = filter_columns(signal.filtfilt, b, a, columns)
+        self.assertIsInstance(result[0], ValueError)
+        self.assertIsInstance(result[1], ValueError)
+        np.testing.assert_array_equal(
+            result[2], signal.filtfilt(b, a, columns[2]))
+
+        with self.assertRaises(TypeError):
+            filter_columns(signal.lfilter, b, a, [np.array([u'a', u'b'])])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+# Copyright (c) 2017, System Engineering Software Society
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither the name of the System Engineering Software Society nor the
+#       names of its contributors may be used to endorse or promote products
+#       derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.
+# IN NO EVENT SHALL SYSTEM ENGINEERING SOFTWARE SOCIETY BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+import unittest
+
+import numpy as np
+
+from sympathy.api import table
+from sympathy.datasources import info
+from sympathy.datasources.sqlite import dsgroup, dstable
+from datasource_fixtures import DatasourceTestMixin
+
+
+class SqliteTestCase(DatasourceTestMixin, unittest.TestCase):
+    scheme = 'sqlite'
+
+    def test_empty_table(self):
+        expected = table.File()
+        expected.set_column_from_array('empty', np.array([], dtype=float))
+        self.write_table(expected)
+        with table.File(filename=self.filename, mode='r') as actual:
+            self.assertEqual(actual.number_of_rows(), 0)
+            self.assert_table_equal(expected, actual)
+
+    def test_rows(self):
+        chunk_rows = dstable.CHUNK_ROWS
+        dstable.CHUNK_ROWS = 4
+        try:
+            expected = self.create_table(rows=23)
+            self.write_table(expected)
+        finally:
+            dstable.CHUNK_ROWS = chunk_rows
+        with table.File(filename=self.filename, mode='r') as actual:
+            self.assert_table_equal(expected, actual)
+            self.assert_row_indices(expected, actual)
+
+    def test_uncommitted(self):
+        self.write_table(self.create_table())
+        sqlite_file = dsgroup.SqliteFile(self.filename, 'r+')
+        sqlite_file.write((u'extra',), 1)
+        # Readers see the committed content until the writer is closed.
+        reader = dsgroup.SqliteFile(self.filename, 'r')
+        self.assertFalse(reader.contains((u'extra',)))
+        sqlite_file.close()
+        self.assertTrue(reader.contains((u'extra',)))
+        reader.close()
+
+    def test_not_sqlite(self):
+        with open(self.filename, 'wb') as f:
+            f.write('SFD TEXT{}\n')
+        self.assertFalse(info.INFO_FROM_SCHEME['sqlite'](
+            self.filename).is_file())
+
+
+if __name__ == '__main__':
+    unittest.main()
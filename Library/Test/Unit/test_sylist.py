@@ -0,0 +1,117 @@
+# Copyright (c) 2017, System Engineering Software Society
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither the name of the System Engineering Software Society nor the
+#       names of its contributors may be used to endorse or promote products
+#       derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.
+# IN NO EVENT SHALL SYSTEM ENGINEERING SOFTWARE SOCIETY BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+import os
+import shutil
+import tempfile
+import unittest
+
+import h5py
+import numpy as np
+
+from sympathy.api import table
+
+
+class SyListTestCase(unittest.TestCase):
+
+    length = 150
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, 'list.sydata')
+        with table.FileList(filename=self.filename, mode='w') as tables:
+            for index in range(self.length):
+                item = table.File()
+                item.set_column_from_array('index', np.array([index]))
+                tables.append(item)
+        self.tables = table.FileList(filename=self.filename, mode='r')
+
+    def tearDown(self):
+        self.tables.close()
+        shutil.rmtree(self.directory)
+
+    def indices(self, tables):
+        return [item.get_column_to_array('index')[0] for item in tables]
+
+    def test_slice(self):
+        expected = list(range(self.length))
+        self.assertEqual(self.indices(self.tables[10:20]), expected[10:20])
+        # Mix of cached and uncached items.
+        self.assertEqual(self.indices(self.tables[5:100:3]), expected[5:100:3])
+        self.assertEqual(self.indices(self.tables[::-1]), expected[::-1])
+        self.assertEqual(len(self.tables[10:20]), 10)
+
+    def test_slice_cached(self):
+        first = self.tables[3]
+        self.assertIs(self.tables[2:4][1], first)
+
+    def test_iterate(self):
+        expected = list(range(self.length))
+        self.assertEqual(self.indices(self.tables), expected)
+        self.assertEqual(self.indices(self.tables.iterate(window=7)),
+                         expected)
+
+    def test_prefetch(self):
+        expected = list(range(self.length))
+        self.tables[40]
+        self.assertEqual(
+            self.indices(self.tables.iterate(window=8, prefetch=20)),
+            expected)
+        self.assertEqual(self.indices(self.tables), expected)
+
+    def test_prefetch_stop(self):
+        items = self.tables.iterate(window=4, prefetch=8)
+        self.assertEqual(self.indices(next(items) for _ in range(5)),
+                         list(range(5)))
+        items.close()
+        self.assertEqual(self.indices(self.tables[:5]), list(range(5)))
+
+    def test_external_links(self):
+        filename = os.path.join(self.directory, 'linked.sydata')
+        shutil.copy(self.filename, filename)
+        with h5py.File(filename, 'r+') as hdf5_file:
+            for index, target in [(1, 5), (3, 7)]:
+                del hdf5_file[str(index)]
+                hdf5_file[str(index)] = h5py.ExternalLink(
+                    self.filename, '/{}'.format(target))
+        tables = table.FileList(filename=filename, mode='r')
+        try:
+            self.assertEqual(self.indices(tables[:5]), [0, 5, 2, 7, 4])
+            self.assertEqual(self.indices(tables[3:0:-2]), [7, 5])
+        finally:
+            tables.close()
+
+    def test_in_memory(self):
+        tables = table.FileList()
+        tables.extend(self.tables[:3])
+        tables.append(self.tables[3])
+        self.assertEqual(self.indices(tables), [0, 1, 2, 3])
+        self.assertEqual(self.indices(tables[1:3]), [1, 2])
+        self.assertEqual(self.indices(tables.iterate(prefetch=2)),
+                         [0, 1, 2, 3])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+# Copyright (c) 2017, System Engineering Software Society
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither the name of the System Engineering Software Society nor the
+#       names of its contributors may be used to endorse or promote products
+#       derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.
+# IN NO EVENT SHALL SYSTEM ENGINEERING SOFTWARE SOCIETY BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+import os
+import shutil
+import tempfile
+import unittest
+
+from sylib import table_sources
+from sympathy.api import table
+
+
+class BlockReadTestCase(unittest.TestCase):
+    """Compare _read_blocks, using small blocks, with a single _read."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def source(self, text):
+        filename = os.path.join(self.directory, 'data.csv')
+        with open(filename, 'wb') as f:
+            f.write(text)
+        return table_sources.TableSourceCSV(filename, ';', 'ascii')
+
+    def assertSameRead(self, text, row_offset=0, require_num=True):
+        source = self.source(text)
+        data_frame = source._read_blocks(
+            row_offset, require_num, block_bytes=50, workers=3)
+        self.assertIsNotNone(data_frame)
+        expected = table.File().from_dataframe(
+            source._read(row_offset=row_offset,
+                         require_num=require_num).dropna(how='all'))
+        result = table.File().from_dataframe(data_frame.dropna(how='all'))
+        self.assertEqual(result.column_names(), expected.column_names())
+        for name in expected.column_names():
+            self.assertEqual(result.column_type(name),
+                             expected.column_type(name), name)
+            self.assertEqual(
+                [unicode(value)
+                 for value in result.get_column_to_array(name)],
+                [unicode(value)
+                 for value in expected.get_column_to_array(name)], name)
+
+    def test_same_types(self):
+        self.assertSameRead(''.join(
+            '{0};{1};abc{0}\n'.format(i, i * 0.5) for i in range(100)))
+
+    def test_integer_to_text(self):
+        # Integers in the first blocks, text in the last.
+        self.assertSameRead(''.join(
+            '{0};{0}\n'.format(i) for i in range(100)) + 'x;1\n')
+
+    def test_float_to_text(self):
+        self.assertSameRead('1.50;1\n' * 100 + 'x;1\n')
+
+    def test_integer_to_float(self):
+        self.assertSameRead('1;1\n' * 100 + '1.5;1\n')
+
+    def test_row_offset(self):
+        self.assertSameRead(
+            'a;b\nunit;unit\n' +
+            ''.join('{0};{0}\n'.format(i) for i in range(100)) + '1;x\n',
+            row_offset=2)
+
+    def test_text(self):
+        self.assertSameRead(''.join(
+            '{0};{0}\n'.format(i) for i in range(100)) + 'x;1\n',
+            require_num=False)
+
+
+if __name__ == '__main__':
+    unittest.main()
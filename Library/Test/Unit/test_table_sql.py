@@ -0,0 +1,154 @@
+# Copyright (c) 2017, System Engineering Software Society
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither the name of the System Engineering Software Society nor the
+#       names of its contributors may be used to endorse or promote products
+#       derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.
+# IN NO EVENT SHALL SYSTEM ENGINEERING SOFTWARE SOCIETY BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+import numpy as np
+
+from sympathy.api import table
+from sympathy.typeutils import table_sql
+
+
+class FailingTable(table.File):
+    """Table whose column x can not be inserted from row fail_row."""
+
+    fail_row = None
+
+    def get_column_to_array(self, name, *args, **kwargs):
+        column = super(FailingTable, self).get_column_to_array(
+            name, *args, **kwargs)
+        if name == 'x' and self.fail_row is not None:
+            column = column.astype(object)
+            column[self.fail_row] = {}
+        return column
+
+
+def create_table(rows=10):
+    table_ = table.File()
+    table_.set_column_from_array('x', np.arange(rows))
+    table_.set_column_from_array('y', np.arange(rows) * 0.5)
+    return table_
+
+
+class WriteTableSqliteTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, 'data.db')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def query(self, query):
+        conn = sqlite3.connect(self.filename)
+        try:
+            return conn.execute(query).fetchall()
+        finally:
+            conn.close()
+
+    def test_types(self):
+        columns = [
+            ('integer', np.array([1, -2, 3], dtype=np.int64),
+             [1, -2, 3]),
+            ('real', np.array([0.5, -1.5, np.inf]),
+             [0.5, -1.5, np.inf]),
+            ('bit', np.array([True, False, True]),
+             [1, 0, 1]),
+            ('datetime', np.array(
+                ['2016-02-01T10:00:00', '2016-02-01T10:00:00.5',
+                 '1970-01-01T00:00:00'], dtype='datetime64[us]'),
+             ['2016-02-01 10:00:00', '2016-02-01 10:00:00.500000',
+              '1970-01-01 00:00:00']),
+            ('text', np.array([u'a', u'\xe5\xe4\xf6', u'']),
+             [u'a', u'\xe5\xe4\xf6', u'']),
+            ('bytes', np.array(['a', 'bc', '']),
+             ['a', 'bc', ''])]
+        expected_types = [
+            'integer', 'real', 'bit', 'datetime', 'text', 'text']
+        table_ = table.File()
+        for name, data, _ in columns:
+            table_.set_column_from_array(name, data)
+        table_sql.write_table_sqlite3(
+            self.filename, 'types', table_, chunk_size=2)
+
+        self.assertEqual(
+            [(row[1], row[2].lower()) for row in self.query(
+                'PRAGMA table_info(types)')],
+            [(name, type_) for (name, _, _), type_ in zip(
+                columns, expected_types)])
+        rows = self.query('SELECT * FROM types')
+        for i, (name, _, expected) in enumerate(columns):
+            self.assertEqual([row[i] for row in rows], expected, name)
+
+    def test_unsupported_type(self):
+        with self.assertRaises(NotImplementedError):
+            table_sql.sqlite_column_type(np.dtype(complex))
+
+    def test_rollback(self):
+        table_ = FailingTable(source=create_table(rows=10))
+        table_.fail_row = 7
+        with self.assertRaises(sqlite3.Error):
+            table_sql.write_table_sqlite3(
+                self.filename, 'partial', table_, indexes=['x'],
+                chunk_size=3)
+        # The first chunks were inserted, but nothing was committed.
+        self.assertEqual(table_sql.read_table_names_sqlite3(self.filename),
+                         [])
+        self.assertEqual(
+            self.query("SELECT name FROM sqlite_master WHERE type='index'"),
+            [])
+
+        # An existing table keeps its rows.
+        table_sql.write_table_sqlite3(
+            self.filename, 'partial', create_table(rows=2))
+        with self.assertRaises(sqlite3.Error):
+            table_sql.write_table_sqlite3(
+                self.filename, 'partial', table_, chunk_size=3)
+        self.assertEqual(self.query('SELECT x FROM partial'), [(0,), (1,)])
+
+    def test_indexes(self):
+        table_sql.write_table_sqlite3(
+            self.filename, 'indexed', create_table(rows=100),
+            indexes=['y', 'x'], chunk_size=16)
+        self.assertEqual(
+            sorted(self.query(
+                "SELECT name, tbl_name FROM sqlite_master "
+                "WHERE type='index'")),
+            [('indexed_x', 'indexed'), ('indexed_y', 'indexed')])
+        self.assertEqual(
+            [row[2] for row in self.query("PRAGMA index_info(indexed_x)")],
+            ['x'])
+        self.assertEqual(self.query('SELECT count(*) FROM indexed'),
+                         [(100,)])
+        self.assertEqual(
+            self.query('SELECT y FROM indexed WHERE x = 42'), [(21.0,)])
+
+
+if __name__ == '__main__':
+    unittest.main()
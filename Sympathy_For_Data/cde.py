@@ -10,20 +10,8 @@ from vehical_config import vehical_config
 from filter_file import filter_file
 from create_subsets import create_subsets
 from eval_flow import eval_flow
-from functools import wraps
-import time
-
-def fn_timer(function):
-    @wraps(function)
-    def function_timer(*args, **kwargs):
-        t0 = time.time()
-        result = function(*args, **kwargs)
-        t1 = time.time()
-        print ("Total time running %s: %s seconds" %
-               (function.func_name, str(t1 - t0))
-               )
-        return result
-    return function_timer
+from sympathy.utils import instrument
+from sympathy.utils import memory
 
 # input dir
 input_dir = "C://Users//FLU2//Documents//10GB"
@@ -50,19 +38,20 @@ def sort_adafs(adaf_objs):
         adaf_obj.meta.create_column('Date', np.array([os.path.dirname(os.path.abspath(input_dir))]))
     adaf_objs.sort(key=lambda x: x.meta['Date'].value()[0])
 
-@fn_timer
+@instrument.timed('cde')
 def main():
     sydata_adaf_objs = []
     dat_list, sydat_list = get_data()
     # sydat
     new_sydat_list = []
-    for sydat in sydat_list:
-        try:
-            adaf_obj = adaf.File(filename=sydat)
-            sydata_adaf_objs.append(adaf_obj)
-            new_sydat_list.append(sydat)
-        except:
-            print("Can't input sydata file {}".format(sydat))
+    with instrument.span('read sydata'):
+        for sydat in sydat_list:
+            try:
+                adaf_obj = adaf.File(filename=sydat)
+                sydata_adaf_objs.append(adaf_obj)
+                new_sydat_list.append(sydat)
+            except:
+                print("Can't input sydata file {}".format(sydat))
 
     # dat
     dat_adaf_objs = []
@@ -70,53 +59,82 @@ def main():
     importer = mdf_importer.MdfImporter("latin1", None)
 
     new_dat_list = []
-    for dat in dat_list:
-        try:
-            adaf_obj = adaf.File()
-            importer.run(dat, adaf_obj)
-            dat_adaf_objs.append(adaf_obj)
-            new_dat_list.append(dat)
-        except:
-            print("Can't import dat file {}".format(dat))
-    for adaf_obj in dat_adaf_objs:
-        ExtractVIN(adaf_obj)
-        processed_adaf_objs.append(process_dat_adaf(adaf_obj))
+    with instrument.span('import'):
+        for dat in dat_list:
+            with instrument.span('import dat', filename=dat):
+                try:
+                    adaf_obj = adaf.File()
+                    importer.run(dat, adaf_obj)
+                    dat_adaf_objs.append(adaf_obj)
+                    new_dat_list.append(dat)
+                    instrument.count('bytes read', os.path.getsize(dat))
+                    instrument.count('signals decoded',
+                                     len(adaf_obj.ts.keys()))
+                except:
+                    print("Can't import dat file {}".format(dat))
+            memory.check_budget()
+    with instrument.span('interpolate'):
+        for adaf_obj in dat_adaf_objs:
+            ExtractVIN(adaf_obj)
+            processed_adaf_objs.append(process_dat_adaf(adaf_obj))
+            memory.check_budget()
 
     # update meta
-    for i, adaf_obj in enumerate(sydata_adaf_objs):
-        update_file_path_meta(adaf_obj, new_sydat_list[i], input_dir, output_dir)
+    with instrument.span('update meta'):
+        for i, adaf_obj in enumerate(sydata_adaf_objs):
+            update_file_path_meta(adaf_obj, new_sydat_list[i], input_dir, output_dir)
 
-    for i, adaf_obj in enumerate(processed_adaf_objs):
-        update_file_path_meta(adaf_obj, new_dat_list[i], input_dir, output_dir)
+        for i, adaf_obj in enumerate(processed_adaf_objs):
+            update_file_path_meta(adaf_obj, new_dat_list[i], input_dir, output_dir)
 
     adaf_objs = sydata_adaf_objs + processed_adaf_objs
 
     # sort
-    sort_adafs(adaf_objs)
+    with instrument.span('sort'):
+        sort_adafs(adaf_objs)
 
     # vehical_config
-    vehical_config(adaf_objs)
+    with instrument.span('vehicle config'):
+        vehical_config(adaf_objs)
 
     # filter file
-    adaf_objs = filter_file(adaf_objs)
+    with instrument.span('filter'):
+        adaf_objs = filter_file(adaf_objs)
 
     # create subsets
-    subsets_list = create_subsets(adaf_objs)
+    with instrument.span('create subsets'):
+        subsets_list = create_subsets(adaf_objs)
 
     # loop the subsets to do evaluation
-    for subsets in subsets_list:
-        eval_flow(subsets, output_dir)
+    with instrument.span('evaluation'):
+        for subsets in subsets_list:
+            with instrument.span('evaluate subsets'):
+                eval_flow(subsets, output_dir)
+            memory.check_budget()
 
     # dump
-    for adaf_obj in adaf_objs:
-        out_name = adaf_obj.meta["DATA_Name"].value()[0]
-        out_name = out_name.split(".")[0] + ".sydata"
-        file_path = os.path.join(output_dir, out_name)
-        with adaf.File(filename=file_path, mode='w', source=adaf_obj):
-            pass
-
-if __name__ == "__main__":
-    start_time = time.time()
-    main()
-    finished_time=time.time()-start_time
-    print finished_time
+    with instrument.span('write'):
+        for adaf_obj in adaf_objs:
+            out_name = adaf_obj.meta["DATA_Name"].value()[0]
+            out_name = out_name.split(".")[0] + ".sydata"
+            file_path = os.path.join(output_dir, out_name)
+            with adaf.File(filename=file_path, mode='w', source=adaf_obj):
+                pass
+            instrument.count('rows written', sum(
+                raster.number_of_rows()
+                for system in adaf_obj.sys.values()
+                for raster in system.values()))
+
+if __name__ == "__main__":
+    # Memory recording is enabled by SY_INSTRUMENT_MEMORY and the counting
+    # of NumPy bytes, which is slow, by SY_INSTRUMENT_ARRAYS.
+    instrument.enable()
+    main()
+    for name, seconds in instrument.recorder.summary().items():
+        print("Total time running %s: %s seconds" % (name, seconds))
+    for name, deltas in instrument.recorder.memory_summary().items():
+        print("Memory change running %s: %s" % (name, ", ".join(
+            "%s %+.1f MiB" % (field, value / 2.0 ** 20)
+            for field, value in deltas.items())))
+    # Spans as json and in the Chrome trace format (chrome://tracing).
+    instrument.recorder.write(os.path.join(output_dir, "cde_instrument.json"))
@@ -189,7 +189,7 @@ def zero_any(tb_old, ts_old):
             if any(np.isnan(i_new)):
                 sywarn("NaNs in i_new")
 
-            result = ts_old[list(i_new)]
+            result = ts_old[i_new.astype(int)]
 
         # Samples that aren't covered by the tb_old domain should be "empty".
         # This is as close to "empty" as we can get without implementing masked
@@ -225,7 +225,7 @@ def nearest_any(tb_old, ts_old):
             i_new[too_early] = 0
             i_new[too_late] = -1
 
-            result = ts_old[list(i_new)]
+            result = ts_old[i_new.astype(int)]
         return result
     return nearest_inner
 
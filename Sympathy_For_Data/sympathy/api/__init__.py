@@ -23,36 +23,103 @@
 # ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
 # (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
 # SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
-"""The Sympathy for Data API."""
+"""
+The Sympathy for Data API.
 
-# Node API, for implementing library modules.
-from .. platform import gennode as node
+The members of this package are imported on first attribute access so that
+importing a single member, for example ``from sympathy.api import adaf``, does
+not pay for importing the Qt bindings, importers, exporters and the rest of
+the API.
 
-# Node parameter API, for accessing fields and building the structure.
-# Also available from node.parameters
-from .. utils.parameter_helper import ParameterRoot as parameters
+Setting the environment variable SY_HEADLESS to a non-empty value, other than
+0, selects the headless profile. In it, members that require Qt raise
+ImportError instead of importing the Qt bindings. Nodes can be executed, but
+not configured, in the headless profile.
+"""
+import sys
+import types as _types
+import importlib
+from collections import OrderedDict
 
-# Data type utility modules.
-from .. typeutils import adaf
-from .. typeutils import datasource
-from .. typeutils import table
-from .. typeutils import text
-from .. typeutils import report
-from .. typeutils import figure
+from ..platform.os_support import headless
 
-# Data type utility wrapper modules.
-from .. common import adaf_wrapper
-from .. common import table_wrapper
 
-# For implementing importers and exporters.
-from .. import dataexporters as exporters
-from .. import dataimporters as importers
+_members = OrderedDict([
+    # Node API, for implementing library modules.
+    ('node', ('..platform.gennode', None)),
 
-# For defining Data type utility modules.
-from .. import types
+    # Node parameter API, for accessing fields and building the structure.
+    # Also available from node.parameters
+    ('parameters', ('..utils.parameter_helper', 'ParameterRoot')),
 
-# For using QT (to create GUI:s, etc.). Use this to ensure compatibility
-from .. platform import qt_compat as qt
+    # Data type utility modules.
+    ('adaf', ('..typeutils.adaf', None)),
+    ('datasource', ('..typeutils.datasource', None)),
+    ('table', ('..typeutils.table', None)),
+    ('text', ('..typeutils.text', None)),
+    ('report', ('..typeutils.report', None)),
+    ('figure', ('..typeutils.figure', None)),
 
-# Node generator functions
-from .. utils import node_helper
+    # Data type utility wrapper modules.
+    ('adaf_wrapper', ('..common.adaf_wrapper', None)),
+    ('table_wrapper', ('..common.table_wrapper', None)),
+
+    # For implementing importers and exporters.
+    ('exporters', ('..dataexporters', None)),
+    ('importers', ('..dataimporters', None)),
+
+    # For defining Data type utility modules.
+    ('types', ('..types', None)),
+
+    # For using QT (to create GUI:s, etc.). Use this to ensure compatibility
+    ('qt', ('..platform.qt_compat', None)),
+
+    # Node generator functions
+    ('node_helper', ('..utils.node_helper', None)),
+
+    # Timing and profiling of node execution.
+    ('instrument', ('..utils.instrument', None)),
+
+    # Memory accounting and soft memory budget.
+    ('memory', ('..utils.memory', None)),
+])
+
+# Members that import the Qt bindings.
+_qt_members = frozenset(['exporters', 'importers', 'qt', 'node_helper'])
+
+__all__ = list(_members.keys())
+
+
+class _LazyModule(_types.ModuleType):
+    """Module type which imports the API members on first access."""
+
+    def __init__(self, module):
+        super(_LazyModule, self).__init__(module.__name__, module.__doc__)
+        self.__dict__.update(module.__dict__)
+        # Keep the original module alive, its globals are cleared when it is
+        # garbage collected.
+        self._module = module
+
+    def __getattr__(self, name):
+        try:
+            module_name, attribute = _members[name]
+        except KeyError:
+            raise AttributeError(
+                "'module' object has no attribute '{}'".format(name))
+
+        if name in _qt_members and headless():
+            raise ImportError(
+                'sympathy.api.{} requires Qt and is not available in the '
+                'headless profile (SY_HEADLESS).'.format(name))
+
+        value = importlib.import_module(module_name, __name__)
+        if attribute is not None:
+            value = getattr(value, attribute)
+        setattr(self, name, value)
+        return value
+
+    def __dir__(self):
+        return sorted(set(self.__dict__.keys()) | set(_members.keys()))
+
+
+sys.modules[__name__] = _LazyModule(sys.modules[__name__])
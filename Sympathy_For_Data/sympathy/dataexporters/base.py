@@ -102,7 +102,18 @@ class ADAFDataExporterBase(DataExporterBase):
 
 
 class TableDataExporterBase(DataExporterBase):
-    pass
+
+    def export_data_list(self, in_sytables, fq_outfilenames):
+        """
+        Export each Table in in_sytables to the corresponding filename in
+        fq_outfilenames and yield (table, filename) pairs in input order as
+        the files are written. Please override to write the files
+        concurrently.
+        """
+        for in_sytable, fq_outfilename in itertools.izip(
+                in_sytables, fq_outfilenames):
+            self.export_data(in_sytable, fq_outfilename)
+            yield in_sytable, fq_outfilename
 
 
 class TextDataExporterBase(DataExporterBase):
@@ -0,0 +1,245 @@
+# Copyright (c) 2017, System Engineering Software Society
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither the name of the System Engineering Software Society nor the
+#       names of its contributors may be used to endorse or promote products
+#       derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.
+# IN NO EVENT SHALL SYSTEM ENGINEERING SOFTWARE SOCIETY BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+Chunked group.
+
+A chunked file is a manifest with a header line, like the text scheme,
+followed by one line with the JSON encoded elements::
+
+    SFD CHUNKED{"version": "1.0", "datatype": "[table]", "type": "[table]"}
+    {"files": 1, "elements": [[[], {}], [["0"], {}], ...]}
+
+and a directory, named like the manifest with the suffix .chunks, with the
+data of the table columns. Each column is stored as chunks of CHUNK_ROWS
+rows, one zlib compressed file each. With COMPRESS_LEVEL 0 each column is
+instead stored as one file of raw data which is memory mapped for reading.
+
+Groups, including list items and dict and record entries, are elements
+with the value {}. The elements are kept in memory and the manifest is
+written when the file is closed.
+
+Chunk files are read and written by a shared pool of WORKERS threads. zlib
+and file I/O release the GIL, so chunks are processed in parallel.
+Writes are asynchronous: the datasources can go on with the next column
+while earlier ones are written, up to MAX_PENDING chunks per file.
+"""
+import os
+import json
+import zlib
+import shutil
+import threading
+import multiprocessing
+from collections import OrderedDict, deque
+from multiprocessing.pool import ThreadPool
+
+import numpy as np
+
+from .. pathgroup import FileInfo, PathGroup
+
+IDENTIFIER = 'SFD CHUNKED'
+VERSION_NUMBER = '1.0'
+SUFFIX = '.chunks'
+COMPRESS_LEVEL = 1
+WORKERS = (int(os.environ.get('SY_CHUNKED_WORKERS', 0)) or
+           multiprocessing.cpu_count())
+MAX_PENDING = 4 * WORKERS
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def pool():
+    """Return the thread pool shared by all chunked files."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPool(WORKERS)
+        return _pool
+
+
+def chunk_directory(filepath):
+    """Return the directory with the chunk files of filepath."""
+    return filepath + SUFFIX
+
+
+def read_header(filepath):
+    """
+    Read the header from chunked file and return an ordered dict with its
+    content.
+    """
+    with open(filepath, 'rb') as manifest:
+        return _read_header(manifest)
+
+
+def _read_header(manifest):
+    identifier = manifest.read(len(IDENTIFIER))
+    line = manifest.readline()
+    assert(identifier == IDENTIFIER)
+    header_data = json.loads(
+        line, object_pairs_hook=OrderedDict)
+    return header_data
+
+
+def _write_chunk(filename, array, compress_level):
+    with open(filename, 'wb') as chunk:
+        if compress_level:
+            chunk.write(zlib.compress(array.view(np.uint8).data,
+                                      compress_level))
+        else:
+            array.tofile(chunk)
+
+
+def _read_chunk(args):
+    filename, dtype, compressed = args
+    with open(filename, 'rb') as chunk:
+        if compressed:
+            return np.frombuffer(zlib.decompress(chunk.read()), dtype=dtype)
+        return np.fromfile(chunk, dtype=dtype)
+
+
+class ChunkedFile(object):
+    """
+    Manifest and chunk directory, shared by the datasources of one file.
+    """
+
+    def __init__(self, filename, mode, header=None):
+        self.filename = filename
+        self.mode = mode
+        self.directory = chunk_directory(filename)
+        self._elements = OrderedDict()
+        self._children = {}
+        self._pending = deque()
+
+        if mode == 'w':
+            if os.path.isdir(self.directory):
+                shutil.rmtree(self.directory)
+            os.makedirs(self.directory)
+            self.header = header
+            self._files = 0
+        else:
+            with open(filename, 'rb') as manifest:
+                self.header = _read_header(manifest)
+                content = json.loads(manifest.readline())
+            self._files = content['files']
+            for path, value in content['elements']:
+                self._add(tuple(path), json.dumps(value))
+
+    def _add(self, path, value):
+        self._elements[path] = value
+        for i in range(len(path)):
+            children = self._children.setdefault(path[:i], OrderedDict())
+            if path[i] not in children:
+                children[path[i]] = None
+
+    def write(self, path, value):
+        """Write value at path, a tuple of keys."""
+        self._add(path, json.dumps(value))
+
+    def read(self, path):
+        """Return the value at path, raise KeyError if there is none."""
+        return json.loads(self._elements[path],
+                          object_pairs_hook=OrderedDict)
+
+    def get(self, path, default=None):
+        try:
+            return self.read(path)
+        except KeyError:
+            return default
+
+    def contains(self, path):
+        return path in self._elements
+
+    def children(self, path):
+        """Return list of keys of the elements below path."""
+        return list(self._children.get(path, ()))
+
+    def chunk_name(self):
+        """Return new unique chunk filename, relative to the directory."""
+        name = unicode(self._files)
+        self._files += 1
+        return name
+
+    def write_chunk(self, name, array, compress_level):
+        """Write a copy of array to the chunk name asynchronously."""
+        self._pending.append(pool().apply_async(
+            _write_chunk, (os.path.join(self.directory, name), array.copy(),
+                           compress_level)))
+        while len(self._pending) > MAX_PENDING:
+            self._pending.popleft().get()
+
+    def read_chunks(self, names, dtype, compressed):
+        """Return list of arrays of dtype with the content of chunks names."""
+        self.flush()
+        args = [(os.path.join(self.directory, name), dtype, compressed)
+                for name in names]
+        if len(args) == 1:
+            return [_read_chunk(args[0])]
+        return pool().map(_read_chunk, args)
+
+    def remove_chunks(self, names):
+        self.flush()
+        for name in names:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+
+    def flush(self):
+        """Wait for the pending writes and raise their errors, if any."""
+        while self._pending:
+            self._pending.popleft().get()
+
+    def close(self):
+        if self._pending is None:
+            return
+        if self.mode != 'r':
+            self.flush()
+            tmp_filename = '{}.{}.tmp'.format(self.filename, os.getpid())
+            with open(tmp_filename, 'wb') as manifest:
+                manifest.write(IDENTIFIER)
+                manifest.write(json.dumps(self.header))
+                manifest.write('\n')
+                manifest.write('{{"files": {}, "elements": ['.format(
+                    self._files))
+                manifest.write(', '.join(
+                    '[{}, {}]'.format(json.dumps(path), value)
+                    for path, value in self._elements.iteritems()))
+                manifest.write(']}\n')
+            if os.path.exists(self.filename):
+                os.remove(self.filename)
+            os.rename(tmp_filename, self.filename)
+        self._pending = None
+
+
+class ChunkedGroup(PathGroup):
+    """Abstraction of a chunked-group."""
+    file_type = ChunkedFile
+    version = VERSION_NUMBER
+
+
+class ChunkedFileInfo(FileInfo):
+    """Chunked file header information."""
+    read_header = staticmethod(read_header)
@@ -0,0 +1,174 @@
+# Copyright (c) 2017, System Engineering Software Society
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither the name of the System Engineering Software Society nor the
+#       names of its contributors may be used to endorse or promote products
+#       derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.
+# IN NO EVENT SHALL SYSTEM ENGINEERING SOFTWARE SOCIETY BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""Chunked table module."""
+import os
+
+import numpy as np
+import dsgroup
+from .. pathgroup import to_path
+
+NAME = '__sy_name__'
+# Number of rows stored in each chunk of a compressed column.
+CHUNK_ROWS = 1 << 16
+
+
+class ChunkedTable(dsgroup.ChunkedGroup):
+    """Abstraction of a chunked-table."""
+    def __init__(self,
+                 factory,
+                 datapointer,
+                 group=None,
+                 can_write=False,
+                 container_type=None):
+        super(ChunkedTable, self).__init__(
+            factory, datapointer, group, can_write, container_type)
+
+    def _column_path(self, column_name):
+        return self.path + ('columns', to_path([column_name])[0])
+
+    def _column_header(self, column_name):
+        return self.file.read(self._column_path(column_name))
+
+    def read_column_attributes(self, column_name):
+        return dict(self._column_header(column_name)['attributes'])
+
+    def write_column_attributes(self, column_name, properties):
+        header = self._column_header(column_name)
+        header['attributes'] = dict(properties)
+        self.file.write(self._column_path(column_name), header)
+
+    def read_column(self, column_name, index=None):
+        """
+        Return numpy array with data from the given column name.
+        Only the chunks that contain rows selected by index are read.
+        """
+        header = self._column_header(column_name)
+        dtype = np.dtype(str(header['dtype']))
+        shape = tuple(header['shape'])
+        length = shape[0] if shape else 1
+        chunks = header['chunks']
+
+        if index is None:
+            rows = None
+            start, stop = 0, length
+        else:
+            rows = np.arange(length)[index]
+            if len(rows):
+                start, stop = rows.min(), rows.max() + 1
+            else:
+                start, stop = 0, 0
+
+        if not header['compressed'] and rows is None and length:
+            self.file.flush()
+            # Copy on write, the file is never modified.
+            return np.memmap(
+                os.path.join(self.file.directory, chunks[0][2]),
+                dtype=dtype, mode='c', shape=shape or (1,)).view(
+                    np.ndarray).reshape(shape)
+
+        chunks = [chunk for chunk in chunks
+                  if chunk[0] < stop and chunk[1] > start]
+        if chunks:
+            offset = chunks[0][0]
+            column = np.concatenate([
+                data.reshape((-1,) + shape[1:])
+                for data in self.file.read_chunks(
+                    [name for _, _, name in chunks], dtype,
+                    header['compressed'])])
+        else:
+            offset = 0
+            column = np.empty((0,) + shape[1:], dtype=dtype)
+
+        if rows is None:
+            return column.reshape(shape)
+        return column[rows - offset]
+
+    def write_column(self, column_name, column):
+        """
+        Stores column in chunk files, one for each CHUNK_ROWS rows, or in a
+        single file if it is not compressed.
+        """
+        if column.dtype.hasobject:
+            raise ValueError(
+                'Can not store object column: {}'.format(column_name))
+        path = self._column_path(column_name)
+        old_header = self.file.get(path)
+        shape = list(column.shape)
+        if not column.ndim:
+            column = column.reshape(1)
+        compress_level = dsgroup.COMPRESS_LEVEL
+        chunk_rows = CHUNK_ROWS if compress_level else max(len(column), 1)
+
+        chunks = []
+        for start in range(0, len(column), chunk_rows):
+            chunk = column[start:start + chunk_rows]
+            name = self.file.chunk_name()
+            self.file.write_chunk(name, chunk, compress_level)
+            chunks.append([start, start + len(chunk), name])
+        self.file.write(path, {'dtype': column.dtype.str,
+                               'shape': shape,
+                               'compressed': bool(compress_level),
+                               'chunks': chunks,
+                               'attributes': {}})
+        if old_header is not None:
+            self.file.remove_chunks(
+                [name for _, _, name in old_header['chunks']])
+
+    def write_started(self, number_of_rows, number_of_columns):
+        pass
+
+    def write_finished(self):
+        pass
+
+    def columns(self):
+        """Return a list contaning the available column names."""
+        return self.file.children(self.path + ('columns',))
+
+    def column_type(self, column_name):
+        return np.dtype(str(self._column_header(column_name)['dtype']))
+
+    def number_of_rows(self):
+        try:
+            shape = self._column_header(self.columns()[0])['shape']
+        except IndexError:
+            return 0
+        return shape[0] if shape else 1
+
+    def number_of_columns(self):
+        return len(self.columns())
+
+    def write_name(self, name):
+        self.file.write(self.path + (NAME,), name)
+
+    def read_name(self):
+        return self.file.get(self.path + (NAME,), '')
+
+    def read_table_attributes(self):
+        return dict(self.file.get(self.path + ('attributes',), {}))
+
+    def write_table_attributes(self, properties):
+        if properties:
+            self.file.write(self.path + ('attributes',), dict(properties))
@@ -26,6 +26,9 @@
 """Factory module for datasources."""
 from . hdf5.dstypes import types as hdf5
 from . text.dstypes import types as text
+from . jsonl import types as jsonl
+from . sqlite import types as sqlite
+from . chunked import types as chunked
 import numpy as tmp
 
 
@@ -34,6 +37,9 @@ class DatasourceFactory(object):
     datasource_from_scheme = {
         'hdf5': hdf5,
         'text': text,
+        'jsonl': jsonl,
+        'sqlite': sqlite,
+        'chunked': chunked,
         'tmp': tmp
     }
 
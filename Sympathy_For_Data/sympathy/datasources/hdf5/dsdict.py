@@ -59,7 +59,7 @@ class Hdf5Dict(dsgroup.Hdf5Group):
         if key in self.group:
             assert(False)
         else:
-            self.group[key] = value.link()
+            self.write_passthrough(key, value)
 
     def items(self, content_type):
         return [
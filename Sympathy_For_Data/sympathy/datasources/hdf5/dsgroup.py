@@ -24,6 +24,7 @@
 # (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
 # SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 """HDF5 group."""
+import os
 import h5py
 import json
 import math
@@ -39,6 +40,9 @@ VERSION_NUMBER = '1.0'
 TYPE = 'Type'
 TYPEALIAS = 'TypeAlias'
 IDENTIFIER = 'SFD HDF5'
+# How unchanged data from hdf5 datasources is written, see passthrough.
+# Can be overridden by setting SY_HDF5_PASSTHROUGH.
+PASSTHROUGH = os.environ.get('SY_HDF5_PASSTHROUGH', 'link')
 
 
 def read_header(filepath):
@@ -104,6 +108,28 @@ def create_path(h5file, path):
     return h5file[path]
 
 
+def passthrough(target, origin):
+    """
+    Return how unchanged data from the origin datasource is written to the
+    target datasource, according to PASSTHROUGH:
+
+    'link'
+        As an external link to origin, when both allow linking, otherwise
+        as for 'copy'.
+    'copy'
+        Copied as stored, with compressed chunks and attributes, without
+        decoding the data. External links in origin are replaced by the data
+        that they point to, so that the written file is self-contained.
+    'none'
+        Returns None, the data is read and written again.
+    """
+    if PASSTHROUGH == 'none':
+        return None
+    elif PASSTHROUGH == 'link' and target.can_link and origin.can_link:
+        return 'link'
+    return 'copy'
+
+
 class Hdf5Group(object):
     """Abstraction of an HDF5-group."""
     def __init__(self, factory, group, datapointer, can_write, can_link):
@@ -136,7 +162,7 @@ class Hdf5Group(object):
                     raise IOError(
                         'Could not open assumed hdf5-file : "{}"'.format(
                             self.filepath))
-                hdf5_state().filestate[self.filepath] = h5file
+                hdf5_state().add(self.filepath, h5file)
                 self.group = h5file[self.path]
             elif self.mode == 'w':
                 # Create new hdf5 file with userblock set.
@@ -144,7 +170,7 @@ class Hdf5Group(object):
                     util.datatype(), util.abstype())
                 h5file = h5py.File(
                     self.filepath, self.mode, userblock_size=header_data_size)
-                hdf5_state().filestate[self.filepath] = h5file
+                hdf5_state().add(self.filepath, h5file)
 
                 self.group = create_path(h5file, self.path)
 
@@ -153,8 +179,8 @@ class Hdf5Group(object):
         Returns True if the content from datasource can be linked directly,
         and False otherwise.
         """
-        return (self.can_link and other.can_link and
-                isinstance(other, Hdf5Group))
+        return (isinstance(other, Hdf5Group) and
+                passthrough(self, other) is not None)
 
     def transfer(self, name, other, other_name):
         """
@@ -168,6 +194,18 @@ class Hdf5Group(object):
             self.group.file.filename.encode(UTF8),
             self.group.name.encode(UTF8))
 
+    def write_passthrough(self, key, other):
+        """
+        Write the unchanged group of the other datasource at key, as a link
+        or as a copy, see passthrough. Only allowed if transferable(other)
+        returns True.
+        """
+        if passthrough(self, other) == 'link':
+            self.group[key] = other.link()
+        else:
+            self.group.copy(other.group, key, expand_soft=True,
+                            expand_external=True)
+
     def shares_origin(self, other_datasource):
         """
         Checks if two datasources originate from the same resource.
@@ -24,6 +24,8 @@
 # (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
 # SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 """HDF5 list."""
+import h5py
+
 import dsgroup
 from sympathy.platform.state import hdf5_state
 
@@ -34,6 +36,7 @@ class Hdf5List(dsgroup.Hdf5Group):
                  can_link=False):
         super(Hdf5List, self).__init__(factory, group, datapointer, can_write,
                                        can_link)
+        self._links = None
 
     def read_with_type(self, index, content_type):
         """Reads element at index and returns it as a datasource."""
@@ -45,6 +48,52 @@ class Hdf5List(dsgroup.Hdf5Group):
             raise TypeError('Investigating:{} from:{}'.format(
                 repr(index), repr(self.group.name)))
 
+    def _external_links(self):
+        """
+        Return dict of the names in the group to the (filename, path) of
+        their external link, None for links inside the file. The links are
+        fetched once, in a single iteration over the group.
+        """
+        if self._links is None:
+            links = self.group.id.links
+            result = {}
+
+            def visit(name, info):
+                result[name] = (links.get_val(name)
+                                if info.type == h5py.h5l.TYPE_EXTERNAL
+                                else None)
+
+            links.iterate(visit, info=True)
+            self._links = result
+        return self._links
+
+    def read_many_with_type(self, indices, content_type):
+        """
+        Reads the elements at indices and returns them as a list of
+        datasources. Only external links are resolved through hdf5_state,
+        elements in the same file are opened directly.
+        """
+        state = hdf5_state()
+        group = self.group
+        links = self._external_links()
+        result = []
+        for index in indices:
+            key = str(index)
+            try:
+                link = links[key]
+            except KeyError:
+                # Written after the links were fetched.
+                element = state.get(group, key)
+            else:
+                if link is None:
+                    element = group[key]
+                else:
+                    filename, path = link
+                    element = state.get(state.open(filename, 'r'), path)
+            result.append(self.factory(element, content_type,
+                                       self.can_write, self.can_link))
+        return result
+
     def write_with_type(self, index, value, content_type):
         """Write group at index and returns the group as a datasource."""
         key = str(index)
@@ -64,7 +113,7 @@ class Hdf5List(dsgroup.Hdf5Group):
         if key in self.group:
             assert(False)
         else:
-            self.group[key] = value.link()
+            self.write_passthrough(key, value)
 
     def size(self):
         """Return the list size."""
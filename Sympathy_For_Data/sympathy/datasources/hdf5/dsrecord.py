@@ -63,7 +63,7 @@ class Hdf5Record(dsgroup.Hdf5Group):
         if key in self.group:
             assert(False)
         else:
-            self.group[key] = value.link()
+            self.write_passthrough(key, value)
 
     def keys(self):
         """Return the record keys"""
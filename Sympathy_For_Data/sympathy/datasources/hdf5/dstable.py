@@ -306,7 +306,7 @@ class Hdf5TableBase(dsgroup.Hdf5Group):
 
     def transferable(self, other):
         return (isinstance(other, Hdf5Table) and
-                self.can_link and other.can_link)
+                dsgroup.passthrough(self, other) is not None)
 
     def transfer(self, name, other, other_name):
         user_name = name
@@ -324,8 +324,13 @@ class Hdf5TableBase(dsgroup.Hdf5Group):
             # Check that the table length is consistent.
             assert(self._length == length)
         self._length = length
-        self.group[store_name] = h5py.ExternalLink(
-            dataset.file.filename.encode(UTF8), dataset.name.encode(UTF8))
+        if dsgroup.passthrough(self, other) == 'link':
+            self.group[store_name] = h5py.ExternalLink(
+                dataset.file.filename.encode(UTF8),
+                dataset.name.encode(UTF8))
+        else:
+            # Copies the stored chunks, without decompressing them.
+            self.group.copy(dataset, store_name)
         self._columns[store_name] = user_name
 
     def write_started(self, number_of_rows, number_of_columns):
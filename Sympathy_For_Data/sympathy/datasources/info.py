@@ -52,6 +52,10 @@ import re
 
 from . hdf5.dsinfo import FileInfo as Hdf5FileInfo
 from . text.dsinfo import FileInfo as TextFileInfo
+from . jsonl.dsgroup import JsonlFileInfo
+from . sqlite.dsgroup import SqliteFileInfo
+from . chunked.dsgroup import ChunkedFileInfo
+from . sqlite.dsgroup import IDENTIFIER as SQLITE_IDENTIFIER
 
 retype = re.compile("^SFD ([A-Z0-9]*)")
 
@@ -59,6 +63,9 @@ retype = re.compile("^SFD ([A-Z0-9]*)")
 INFO_FROM_SCHEME = {
     'hdf5': Hdf5FileInfo,
     'text': TextFileInfo,
+    'jsonl': JsonlFileInfo,
+    'sqlite': SqliteFileInfo,
+    'chunked': ChunkedFileInfo,
 }
 
 
@@ -75,4 +82,8 @@ def get_fileinfo_from_file(filename):
 def get_scheme_from_file(filename):
     """Return the scheme associated with filename."""
     with open(filename, 'rb') as f:
+        # SQLite requires its own header at the start of the file.
+        if f.read(len(SQLITE_IDENTIFIER)) == SQLITE_IDENTIFIER:
+            return 'sqlite'
+        f.seek(0)
         return retype.match(f.readline().split('{')[0]).groups()[0].lower()
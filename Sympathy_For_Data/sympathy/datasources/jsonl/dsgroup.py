@@ -0,0 +1,203 @@
+# Copyright (c) 2017, System Engineering Software Society
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither the name of the System Engineering Software Society nor the
+#       names of its contributors may be used to endorse or promote products
+#       derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.
+# IN NO EVENT SHALL SYSTEM ENGINEERING SOFTWARE SOCIETY BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+Streaming JSON text group.
+
+A jsonl file starts with a header line, like the text scheme, followed by
+one record per line::
+
+    SFD JSONL{"version": "1.0", "datatype": "[table]", "type": "[table]"}
+    []<TAB>{}
+    ["0"]<TAB>{}
+    ["0", "columns", "a"]<TAB>{"dtype": "<i8", "shape": [3], ...}
+    ["0", "columns", "a", "0"]<TAB>[1, 2, 3]
+    #index<TAB>[[[], 79, 5], [["0"], 84, 8], ...]
+    00000000000000000214
+
+Each record is the JSON encoded path of an element, a tab and the JSON
+encoded value. Groups, including list items and dict and record entries,
+are empty records at their path. Tables store a header record for each
+column and one record for each chunk of CHUNK_ROWS rows, so that elements
+are read one at a time without loading the whole document. A later record
+for the same path replaces the earlier one.
+
+When a file is closed the index of record offsets is written at the end,
+followed by the offset of the index. Opening a file reads only the index.
+Files without a valid index, for example after a crash, are indexed by
+scanning the record paths. Opening with mode r+ removes the index and
+appends new records after the existing ones, without rewriting them.
+"""
+import json
+from collections import OrderedDict
+from .. pathgroup import FileInfo, PathGroup
+
+IDENTIFIER = 'SFD JSONL'
+VERSION_NUMBER = '1.0'
+INDEX = '#index\t'
+FOOTER_SIZE = 21
+
+
+def read_header(filepath):
+    """
+    Read the header from jsonl file and return an ordered dict with its
+    content.
+    """
+    with open(filepath, 'rb') as jsonlfile:
+        return _read_header(jsonlfile)
+
+
+def _read_header(jsonlfile):
+    identifier = jsonlfile.read(len(IDENTIFIER))
+    line = jsonlfile.readline()
+    assert(identifier == IDENTIFIER)
+    header_data = json.loads(
+        line, object_pairs_hook=OrderedDict)
+    return header_data
+
+
+class JsonlFile(object):
+    """
+    Indexed file of records, shared by the datasources of one file.
+    """
+
+    def __init__(self, filename, mode, header=None):
+        self.filename = filename
+        self.mode = mode
+        self._index = OrderedDict()
+        self._children = {}
+
+        if mode == 'w':
+            self._file = open(filename, 'w+b')
+            self._file.write(IDENTIFIER)
+            self._file.write(json.dumps(header))
+            self._file.write('\n')
+            self.header = header
+            self._end = self._file.tell()
+        else:
+            self._file = open(filename, 'rb' if mode == 'r' else 'r+b')
+            self.header = _read_header(self._file)
+            start = self._file.tell()
+            end = self._read_index(start)
+            if end is None:
+                end = self._scan(start)
+            self._end = end
+            if mode == 'r+':
+                self._file.truncate(end)
+
+    def _add(self, path, offset, length):
+        self._index[path] = (offset, length)
+        for i in range(len(path)):
+            children = self._children.setdefault(path[:i], OrderedDict())
+            if path[i] not in children:
+                children[path[i]] = None
+
+    def _read_index(self, start):
+        """Read the index at the end of the file, return its offset."""
+        self._file.seek(0, 2)
+        size = self._file.tell()
+        if size < start + FOOTER_SIZE:
+            return None
+        self._file.seek(size - FOOTER_SIZE)
+        try:
+            offset = int(self._file.read(FOOTER_SIZE))
+        except ValueError:
+            return None
+        if not start <= offset < size - FOOTER_SIZE:
+            return None
+        self._file.seek(offset)
+        line = self._file.readline()
+        if not line.startswith(INDEX):
+            return None
+        for path, record_offset, length in json.loads(line[len(INDEX):]):
+            self._add(tuple(path), record_offset, length)
+        return offset
+
+    def _scan(self, start):
+        """Index the records by their paths, return the end offset."""
+        self._file.seek(start)
+        offset = start
+        for line in self._file:
+            if not line.endswith('\n') or line.startswith(INDEX):
+                # Incomplete last record or stale index.
+                break
+            path = json.loads(line[:line.index('\t')])
+            self._add(tuple(path), offset, len(line))
+            offset += len(line)
+        return offset
+
+    def write(self, path, value):
+        """Append record with value at path, a tuple of keys."""
+        line = '{}\t{}\n'.format(json.dumps(path), json.dumps(value))
+        self._file.seek(self._end)
+        self._file.write(line)
+        self._add(path, self._end, len(line))
+        self._end += len(line)
+
+    def read(self, path):
+        """Return the value at path, raise KeyError if there is none."""
+        offset, length = self._index[path]
+        self._file.seek(offset)
+        line = self._file.read(length)
+        return json.loads(line[line.index('\t') + 1:],
+                          object_pairs_hook=OrderedDict)
+
+    def get(self, path, default=None):
+        try:
+            return self.read(path)
+        except KeyError:
+            return default
+
+    def contains(self, path):
+        return path in self._index
+
+    def children(self, path):
+        """Return list of keys of the elements below path."""
+        return list(self._children.get(path, ()))
+
+    def close(self):
+        if self._file.closed:
+            return
+        if self.mode != 'r':
+            self._file.seek(self._end)
+            self._file.write(INDEX)
+            self._file.write(json.dumps(
+                [[path, offset, length]
+                 for path, (offset, length) in self._index.iteritems()]))
+            self._file.write('\n')
+            self._file.write('{:020d}\n'.format(self._end))
+            self._file.truncate()
+        self._file.close()
+
+
+class JsonlGroup(PathGroup):
+    """Abstraction of a jsonl-group."""
+    file_type = JsonlFile
+    version = VERSION_NUMBER
+
+
+class JsonlFileInfo(FileInfo):
+    """Jsonl file header information."""
+    read_header = staticmethod(read_header)
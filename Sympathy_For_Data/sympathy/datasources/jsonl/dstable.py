@@ -0,0 +1,162 @@
+# Copyright (c) 2017, System Engineering Software Society
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither the name of the System Engineering Software Society nor the
+#       names of its contributors may be used to endorse or promote products
+#       derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.
+# IN NO EVENT SHALL SYSTEM ENGINEERING SOFTWARE SOCIETY BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""Jsonl table module."""
+import numpy as np
+import dsgroup
+from .. pathgroup import to_path
+
+NAME = '__sy_name__'
+# Number of rows stored in each record of a column.
+CHUNK_ROWS = 1 << 16
+
+
+def encode_column(column):
+    """Return JSON compatible list with the values of column."""
+    kind = column.dtype.kind
+    if kind in 'mM':
+        return column.view(np.int64).tolist()
+    elif kind == 'S':
+        return np.char.decode(column, 'latin1').tolist()
+    elif kind == 'c':
+        return np.stack((column.real, column.imag), axis=-1).tolist()
+    return column.tolist()
+
+
+def decode_column(values, dtype):
+    """Return array of dtype from values, as returned by encode_column."""
+    kind = dtype.kind
+    if kind in 'mM':
+        return np.array(values, dtype=np.int64).view(dtype)
+    elif kind == 'S':
+        return np.char.encode(np.array(values, dtype=unicode),
+                              'latin1').astype(dtype)
+    elif kind == 'c':
+        pairs = np.array(values, dtype=float)
+        return (pairs[..., 0] + 1j * pairs[..., 1]).astype(dtype)
+    return np.array(values, dtype=dtype)
+
+
+class JsonlTable(dsgroup.JsonlGroup):
+    """Abstraction of a jsonl-table."""
+    def __init__(self,
+                 factory,
+                 datapointer,
+                 group=None,
+                 can_write=False,
+                 container_type=None):
+        super(JsonlTable, self).__init__(
+            factory, datapointer, group, can_write, container_type)
+
+    def _column_path(self, column_name):
+        return self.path + ('columns', to_path([column_name])[0])
+
+    def _column_header(self, column_name):
+        return self.file.read(self._column_path(column_name))
+
+    def read_column_attributes(self, column_name):
+        return dict(self._column_header(column_name)['attributes'])
+
+    def write_column_attributes(self, column_name, properties):
+        header = self._column_header(column_name)
+        header['attributes'] = dict(properties)
+        self.file.write(self._column_path(column_name), header)
+
+    def read_column(self, column_name, index=None):
+        """Return numpy array with data from the given column name."""
+        def bool_index(length, int_index):
+            """Return bool index vector from int index vector."""
+            result = np.zeros(length, dtype=bool)
+            result[int_index] = True
+            return result
+
+        def indexed(column, index):
+            if isinstance(index, list):
+                index = bool_index(len(column), index)
+            return column[index]
+
+        path = self._column_path(column_name)
+        header = self.file.read(path)
+        dtype = np.dtype(str(header['dtype']))
+        shape = tuple(header['shape'])
+        chunks = [decode_column(self.file.read(path + (unicode(chunk),)),
+                                dtype)
+                  for chunk in range(header['chunks'])]
+        column = np.concatenate(chunks).reshape(shape)
+        return indexed(column, index) if index is not None else column
+
+    def write_column(self, column_name, column):
+        """
+        Stores column in the jsonl file, at path, one record for each chunk
+        of CHUNK_ROWS rows.
+        """
+        path = self._column_path(column_name)
+        shape = list(column.shape)
+        if not column.ndim:
+            column = column.reshape(1)
+        starts = range(0, len(column), CHUNK_ROWS) or [0]
+        for chunk, start in enumerate(starts):
+            self.file.write(path + (unicode(chunk),), encode_column(
+                column[start:start + CHUNK_ROWS]))
+        self.file.write(path, {'dtype': column.dtype.str,
+                               'shape': shape,
+                               'chunks': len(starts),
+                               'attributes': {}})
+
+    def write_started(self, number_of_rows, number_of_columns):
+        pass
+
+    def write_finished(self):
+        pass
+
+    def columns(self):
+        """Return a list contaning the available column names."""
+        return self.file.children(self.path + ('columns',))
+
+    def column_type(self, column_name):
+        return np.dtype(str(self._column_header(column_name)['dtype']))
+
+    def number_of_rows(self):
+        try:
+            shape = self._column_header(self.columns()[0])['shape']
+        except IndexError:
+            return 0
+        return shape[0] if shape else 1
+
+    def number_of_columns(self):
+        return len(self.columns())
+
+    def write_name(self, name):
+        self.file.write(self.path + (NAME,), name)
+
+    def read_name(self):
+        return self.file.get(self.path + (NAME,), '')
+
+    def read_table_attributes(self):
+        return dict(self.file.get(self.path + ('attributes',), {}))
+
+    def write_table_attributes(self, properties):
+        if properties:
+            self.file.write(self.path + ('attributes',), dict(properties))
@@ -0,0 +1,349 @@
+# Copyright (c) 2017, System Engineering Software Society
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither the name of the System Engineering Software Society nor the
+#       names of its contributors may be used to endorse or promote products
+#       derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.
+# IN NO EVENT SHALL SYSTEM ENGINEERING SOFTWARE SOCIETY BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+Datasources shared by the schemes that store each element at a path in a
+file object: jsonl, sqlite and chunked.
+
+A group is a pair of the file object and the path, a tuple of keys, of the
+element. The file object of a scheme provides::
+
+    contains(path)      True if there is an element at path.
+    read(path)          Value of the element at path.
+    get(path, default)  Value of the element at path or default.
+    write(path, value)  Store value, any JSON compatible value, at path.
+    children(path)      Keys of the elements directly below path.
+    close()             Write pending changes and close the file.
+
+Each scheme defines a PathGroup subclass with its file type and its own
+table datasource. The list, dict, record, text and lambda datasources and
+the type factory are built from those by PathFactory.
+"""
+from collections import OrderedDict
+from .. types.types import (TypeList,
+                            TypeDict,
+                            TypeRecord,
+                            TypeTuple,
+                            TypeTable,
+                            TypeText,
+                            TypeFunction)
+
+
+def _key(key):
+    if isinstance(key, bytes):
+        return key.decode('utf8')
+    return unicode(key)
+
+
+def to_path(path):
+    """Return path, a string or a sequence of keys, as a tuple of keys."""
+    if isinstance(path, basestring):
+        path = [key for key in path.split('/') if key != '']
+    return tuple(_key(key) for key in path)
+
+
+class FileInfo(object):
+    """
+    File header information, subclasses set read_header to the function
+    that reads the header of their scheme.
+    """
+    read_header = None
+
+    def __init__(self, filepath):
+        try:
+            self.header = self.read_header(filepath)
+        except:
+            self.header = None
+
+    def is_file(self):
+        return self.header is not None
+
+    def version(self):
+        return self.header['version']
+
+    def datatype(self):
+        dtype = self.header['datatype']
+        dtype = dtype.replace('sytable', 'table')
+        dtype = dtype.replace('sytext', 'text')
+        return dtype
+
+    def type(self):
+        return self.header['type']
+
+
+class PathGroup(object):
+    """
+    Abstraction of a group at a path in a file. Subclasses set file_type
+    and version.
+    """
+    file_type = None
+    version = None
+
+    def __init__(self,
+                 factory,
+                 datapointer,
+                 group=None,
+                 can_write=False,
+                 container_type=None):
+
+        self.factory = factory
+        self.datapointer = datapointer
+        self.container_type = container_type
+
+        if group is not None:
+            self.file, self.path = group
+            self.can_write = can_write
+            self.util = None
+            self.mode = None
+        else:
+            self.util = datapointer.util()
+            self.mode = self.util.mode()
+            self.can_write = can_write or self.mode in ['r+', 'w']
+            self.file = self.file_type(
+                self.util.file_path(), self.mode, OrderedDict([
+                    ('version', self.version),
+                    ('datatype', self.util.datatype()),
+                    ('type', self.util.abstype())]))
+            self.path = to_path(self.util.path())
+            if self.mode != 'r' and not self.file.contains(self.path):
+                self.file.write(self.path, {})
+
+    def child(self, key):
+        """Return group of the element at key."""
+        return (self.file, self.path + (_key(key),))
+
+    def transferable(self, other):
+        """
+        Returns True if the content from datasource can be linked directly,
+        and False otherwise.
+        """
+        return False
+
+    def transfer(self, selfname, other, othername):
+        """
+        Performs linking if possible, this is only allowed if transferrable()
+        returns True.
+        """
+        pass
+
+    def shares_origin(self, other_datasource):
+        """
+        Checks if two datasources originate from the same resource.
+        """
+        return False
+
+    def close(self):
+        """Close the file, if this group opened it."""
+        if self.util is not None:
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class PathList(object):
+    """Abstraction of a list, mixed with the PathGroup of a scheme."""
+
+    def read_with_type(self, index, content_type):
+        """Reads element at index and returns it as a datasource."""
+        group = self.child(str(index))
+        if not self.file.contains(group[1]):
+            raise IndexError('list index out of range')
+        return self.factory(
+            self.datapointer, group, content_type, self.can_write)
+
+    def read_many_with_type(self, indices, content_type):
+        """
+        Reads the elements at indices and returns them as a list of
+        datasources.
+        """
+        return [self.read_with_type(index, content_type)
+                for index in indices]
+
+    def write_with_type(self, index, value, content_type):
+        """Write group at index and returns the group as a datasource."""
+        group = self.child(str(index))
+        if not self.file.contains(group[1]):
+            self.file.write(group[1], {})
+
+        return self.factory(
+            self.datapointer, group, content_type, self.can_write)
+
+    def size(self):
+        """Return the list size."""
+        return len(self.file.children(self.path))
+
+
+class PathRecord(object):
+    """Abstraction of a record, mixed with the PathGroup of a scheme."""
+
+    def read_with_type(self, key, content_type):
+        """Reads element at key and returns it as a datasource."""
+        group = self.child(key)
+        if not self.file.contains(group[1]):
+            raise KeyError(key)
+        return self.factory(
+            self.datapointer, group, content_type, self.can_write)
+
+    def write_with_type(self, key, value, content_type):
+        """Write group at key and returns the group as a datasource."""
+        group = self.child(key)
+        if not self.file.contains(group[1]):
+            self.file.write(group[1], {})
+
+        return self.factory(
+            self.datapointer, group, content_type, self.can_write)
+
+    def keys(self):
+        """Return the keys."""
+        return self.file.children(self.path)
+
+
+class PathDict(PathRecord):
+    """Abstraction of a dict, mixed with the PathGroup of a scheme."""
+
+    def items(self, content_type):
+        return [(key, self.factory(
+            self.datapointer, self.child(key), content_type, self.can_write))
+            for key in self.keys()]
+
+    def contains(self, key):
+        return self.file.contains(self.child(key)[1])
+
+    def size(self):
+        """Return the dict size."""
+        return len(self.keys())
+
+    def delete(self, key):
+        if self.contains(key):
+            raise ValueError("Trying to delete stored value.")
+
+
+class PathText(object):
+    """Abstraction of a text, mixed with the PathGroup of a scheme."""
+
+    def read(self):
+        """Return stored text, or '' if nothing is stored."""
+        return self.file.get(self.path + ('text',), '')
+
+    def write(self, text):
+        """Stores text in the file, at path."""
+        self.file.write(self.path + ('text',), text)
+
+
+class PathLambda(object):
+    """Abstraction of a lambda, mixed with the PathGroup of a scheme."""
+
+    def read(self):
+        """
+        Return stored pair of flow and list of port assignments or None if
+        nothing is stored.
+        """
+        value = self.file.get(self.path + ('lambda',))
+        if value is None:
+            return None
+        return (tuple(value[0]), value[1])
+
+    def write(self, value):
+        """Stores lambda in the file, at path."""
+        self.file.write(self.path + ('lambda',), [list(value[0]), value[1]])
+
+    def transfer(self, other):
+        self.write(other.read())
+
+
+class PathFactory(object):
+    """
+    Returns the type constructors of a scheme, given its PathGroup subclass
+    and its table datasource.
+    Creates typed instances.
+    """
+    def __init__(self, name, group_type, table_type):
+        def mixed(mixin, suffix):
+            return type(str(name + suffix), (mixin, group_type), {})
+
+        self._list_type = mixed(PathList, 'List')
+        self._dict_type = mixed(PathDict, 'Dict')
+        self._record_type = mixed(PathRecord, 'Record')
+        self._table_type = table_type
+        self._text_type = mixed(PathText, 'Text')
+        self._lambda_type = mixed(PathLambda, 'Lambda')
+
+    def constructor(self, content_type):
+        """Return datasource constructor according to content_type."""
+        if isinstance(content_type, TypeList):
+            return self._list_type
+        elif isinstance(content_type, TypeDict):
+            return self._dict_type
+        elif isinstance(content_type, (TypeRecord, TypeTuple)):
+            return self._record_type
+        elif isinstance(content_type, TypeTable):
+            return self._table_type
+        elif isinstance(content_type, TypeText):
+            return self._text_type
+        elif isinstance(content_type, TypeFunction):
+            return self._lambda_type
+        else:
+            assert(False)
+
+    def factory(self, datapointer, group, content_type, can_write):
+        """Return contained element."""
+        return self.constructor(content_type)(self.factory,
+                                              datapointer,
+                                              group=group,
+                                              can_write=can_write)
+
+    def list_type(self, datapointer, container_type):
+        """Return the list type constructor."""
+        return self._list_type(self.factory, datapointer,
+                               container_type=container_type)
+
+    def dict_type(self, datapointer, container_type):
+        """Return the dict type constructor."""
+        return self._dict_type(self.factory, datapointer,
+                               container_type=container_type)
+
+    def record_type(self, datapointer, container_type):
+        """Return the record type constructor."""
+        return self._record_type(self.factory, datapointer,
+                                 container_type=container_type)
+
+    def table_type(self, datapointer, container_type):
+        """Return the table type constructor."""
+        return self._table_type(self.factory, datapointer,
+                                container_type=container_type)
+
+    def text_type(self, datapointer, container_type):
+        """Return the text type constructor."""
+        return self._text_type(self.factory, datapointer,
+                               container_type=container_type)
+
+    def lambda_type(self, datapointer, container_type):
+        """Return the lambda type constructor."""
+        return self._lambda_type(self.factory, datapointer,
+                                 container_type=container_type)
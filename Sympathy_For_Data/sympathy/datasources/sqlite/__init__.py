@@ -23,3 +23,16 @@
 # ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
 # (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
 # SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+SQLite datasource, the sqlite scheme.
+
+Stores all elements of a port in a single SQLite database, so that several
+processes can read the same file while it is being written and so that row
+ranges of table columns can be read without loading whole columns, see
+dsgroup.
+"""
+from .. pathgroup import PathFactory
+from . dsgroup import SqliteGroup
+from . dstable import SqliteTable
+
+types = PathFactory('Sqlite', SqliteGroup, SqliteTable)
@@ -0,0 +1,208 @@
+# Copyright (c) 2017, System Engineering Software Society
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither the name of the System Engineering Software Society nor the
+#       names of its contributors may be used to endorse or promote products
+#       derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.
+# IN NO EVENT SHALL SYSTEM ENGINEERING SOFTWARE SOCIETY BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+SQLite group.
+
+A sqlite file is an ordinary SQLite database with three tables::
+
+    header(key, value)
+    elements(path, parent, position, value)
+    chunks(path, start, stop, data)
+
+header holds the version, datatype and type of the file as JSON values.
+elements holds one row for each element, keyed by the JSON encoded list of
+keys leading to it, with the JSON encoded value, and is indexed on its
+parent so that the children of a group are found without a scan. Groups,
+including list items and dict and record entries, have the value {}.
+chunks holds the raw data of table columns in row groups of CHUNK_ROWS
+rows, indexed on the row range, so that a part of a column is read without
+reading the rest of it.
+
+Everything written to a file is committed in one transaction when it is
+closed. Until then, other processes reading the file see its previous
+content.
+"""
+import os
+import json
+from collections import OrderedDict
+import sqlite3
+from .. pathgroup import FileInfo, PathGroup
+
+IDENTIFIER = 'SQLite format 3\x00'
+VERSION_NUMBER = '1.0'
+
+SCHEMA = [
+    'CREATE TABLE header (key TEXT PRIMARY KEY, value TEXT)',
+    'CREATE TABLE elements ('
+    'path TEXT PRIMARY KEY, parent TEXT, position INTEGER, value TEXT)',
+    'CREATE INDEX elements_parent ON elements (parent, position)',
+    'CREATE TABLE chunks ('
+    'path TEXT, start INTEGER, stop INTEGER, data BLOB, '
+    'PRIMARY KEY (path, start))']
+
+
+def is_sqlite(filepath):
+    """Return True if filepath is a SQLite database."""
+    with open(filepath, 'rb') as sqlitefile:
+        return sqlitefile.read(len(IDENTIFIER)) == IDENTIFIER
+
+
+def read_header(filepath):
+    """
+    Read the header from sqlite file and return an ordered dict with its
+    content.
+    """
+    # Connecting would create a database if filepath was missing.
+    assert(is_sqlite(filepath))
+    connection = sqlite3.connect(filepath)
+    try:
+        return _read_header(connection)
+    finally:
+        connection.close()
+
+
+def _read_header(connection):
+    return OrderedDict(
+        (key, json.loads(value)) for key, value in connection.execute(
+            'SELECT key, value FROM header ORDER BY rowid'))
+
+
+def _encode_path(path):
+    return json.dumps(list(path))
+
+
+class SqliteFile(object):
+    """
+    Database connection, shared by the datasources of one file.
+    """
+
+    def __init__(self, filename, mode, header=None):
+        self.filename = filename
+        self.mode = mode
+
+        if mode == 'w':
+            if os.path.exists(filename):
+                os.remove(filename)
+            self._connection = sqlite3.connect(filename)
+            for statement in SCHEMA:
+                self._connection.execute(statement)
+            self._connection.executemany(
+                'INSERT INTO header (key, value) VALUES (?, ?)',
+                [(key, json.dumps(value)) for key, value in header.items()])
+            self.header = header
+            self._position = 0
+        else:
+            assert(is_sqlite(filename))
+            self._connection = sqlite3.connect(filename)
+            self.header = _read_header(self._connection)
+            self._position = self._connection.execute(
+                'SELECT COALESCE(MAX(position) + 1, 0) '
+                'FROM elements').fetchone()[0]
+
+    def write(self, path, value):
+        """Write value at path, a tuple of keys."""
+        encoded_path = _encode_path(path)
+        value = json.dumps(value)
+        if not self._connection.execute(
+                'UPDATE elements SET value = ? WHERE path = ?',
+                (value, encoded_path)).rowcount:
+            self._connection.execute(
+                'INSERT INTO elements (path, parent, position, value) '
+                'VALUES (?, ?, ?, ?)',
+                (encoded_path, _encode_path(path[:-1]) if path else None,
+                 self._position, value))
+            self._position += 1
+
+    def read(self, path):
+        """Return the value at path, raise KeyError if there is none."""
+        row = self._connection.execute(
+            'SELECT value FROM elements WHERE path = ?',
+            (_encode_path(path),)).fetchone()
+        if row is None:
+            raise KeyError(path)
+        return json.loads(row[0], object_pairs_hook=OrderedDict)
+
+    def get(self, path, default=None):
+        try:
+            return self.read(path)
+        except KeyError:
+            return default
+
+    def contains(self, path):
+        return self._connection.execute(
+            'SELECT 1 FROM elements WHERE path = ?',
+            (_encode_path(path),)).fetchone() is not None
+
+    def children(self, path):
+        """Return list of keys of the elements below path."""
+        return [json.loads(child)[-1] for child, in self._connection.execute(
+            'SELECT path FROM elements WHERE parent = ? ORDER BY position',
+            (_encode_path(path),))]
+
+    def write_chunks(self, path, chunks):
+        """
+        Replace the chunks at path with chunks, a list of (start, stop,
+        data) tuples where data is a str.
+        """
+        encoded_path = _encode_path(path)
+        self._connection.execute(
+            'DELETE FROM chunks WHERE path = ?', (encoded_path,))
+        self._connection.executemany(
+            'INSERT INTO chunks (path, start, stop, data) '
+            'VALUES (?, ?, ?, ?)',
+            [(encoded_path, start, stop, buffer(data))
+             for start, stop, data in chunks])
+
+    def read_chunks(self, path, start, stop):
+        """
+        Return list of (start, data) of the chunks at path that overlap
+        rows start to stop, in order.
+        """
+        return [(chunk_start, bytes(data))
+                for chunk_start, data in self._connection.execute(
+                    'SELECT start, data FROM chunks '
+                    'WHERE path = ? AND start < ? AND stop > ? '
+                    'ORDER BY start',
+                    (_encode_path(path), stop, start))]
+
+    def close(self):
+        if self._connection is None:
+            return
+        if self.mode != 'r':
+            self._connection.commit()
+        self._connection.close()
+        self._connection = None
+
+
+class SqliteGroup(PathGroup):
+    """Abstraction of a sqlite-group."""
+    file_type = SqliteFile
+    version = VERSION_NUMBER
+
+
+class SqliteFileInfo(FileInfo):
+    """Sqlite file header information."""
+    read_header = staticmethod(read_header)
@@ -46,6 +46,15 @@ class TextList(dsgroup.TextGroup):
         return self.factory(
             self.datapointer, self.group[index], content_type, self.can_write)
 
+    def read_many_with_type(self, indices, content_type):
+        """
+        Reads the elements at indices and returns them as a list of
+        datasources.
+        """
+        return [self.factory(self.datapointer, self.group[index],
+                             content_type, self.can_write)
+                for index in indices]
+
     def write_with_type(self, index, value, content_type):
         """Write group at index and returns the group as a datasource."""
         key = str(index)
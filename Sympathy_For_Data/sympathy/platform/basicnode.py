@@ -33,17 +33,16 @@ import copy
 import functools
 
 from . import os_support
-from . import qt_compat
 from . import state
-
-QtCore = qt_compat.QtCore
-QtGui = qt_compat.QtGui
+from . import node_cache
+from . import progress
 from . exceptions import sywarn
 
 from .. utils import port as port_util
+from .. utils import instrument
+from .. utils import memory
 from .. utils.prim import uri_to_path, nativepath
-from .. utils.parameter_helper import (ParameterRoot, ParameterGroup,
-                                       WidgetBuildingVisitor)
+from .. utils.parameter_helper import ParameterRoot, ParameterGroup
 from .. utils.context import repeatcontext, PortDummy
 
 
@@ -51,6 +50,15 @@ def void(*args):
     pass
 
 
+def _qt():
+    """
+    Return QtCore and QtGui. Qt is imported on first use, by the parts of the
+    node which show a GUI, so that nodes can be executed without it.
+    """
+    from . import qt_compat
+    return qt_compat.QtCore, qt_compat.QtGui
+
+
 class NodeContext(object):
     def __init__(self, input, output, definition, parameters, typealiases,
                  objects=None):
@@ -351,70 +359,6 @@ def close_server(server):
         pass
 
 
-class ParametersDialog(QtGui.QDialog):
-    def __init__(self, parameters_changed=None, *args, **kwargs):
-        super(ParametersDialog, self).__init__(*args, **kwargs)
-        if parameters_changed is None:
-            self._parameters_changed = lambda: False
-        else:
-            self._parameters_changed = parameters_changed
-        self._widget = None
-        self.accepted.connect(self._save_parameters)
-
-    def set_configuration_widget(self, widget):
-        self._widget = widget
-
-    def keyPressEvent(self, event):
-        # Only accept Ctrl+Enter as Ok and Esc as Cancel.
-        # This is to avoid closing the dialog by accident.
-        if ((event.key() == QtCore.Qt.Key_Return or
-                event.key() == QtCore.Qt.Key_Enter) and
-                event.modifiers() & QtCore.Qt.ControlModifier):
-            self.accept()
-        elif event.key() == QtCore.Qt.Key_Escape:
-            self.reject_or_accept()
-
-    def closeEvent(self, event):
-        if not self.reject_or_accept():
-            event.ignore()
-        else:
-            if (self._widget is not None and
-                    hasattr(self._widget, 'sy_cleanup')):
-                # Currently undocumented/unsupported API.
-                self._widget.sy_cleanup()
-
-    def _save_parameters(self):
-        if (self._widget is not None and
-                hasattr(self._widget, 'save_parameters')):
-            self._widget.save_parameters()
-
-    def reject_or_accept(self):
-        """
-        Ask the user if the dialog should be closed. Return True if the dialog
-        should be closed.
-        """
-        # First notify the widget that it should save its parameters.
-        self._save_parameters()
-        if not self._parameters_changed():
-            self.reject()
-            return True
-
-        choice = QtGui.QMessageBox.question(
-            self, u'Save changes to configuration',
-            "The node's configuration has changed. Save changes in node?",
-            QtGui.QMessageBox.Save | QtGui.QMessageBox.Discard |
-            QtGui.QMessageBox.Cancel, QtGui.QMessageBox.Cancel)
-
-        if choice == QtGui.QMessageBox.Discard:
-            self.reject()
-            return True
-        elif choice == QtGui.QMessageBox.Save:
-            self.accept()
-            return True
-        else:
-            return False
-
-
 class BasicNode(object):
     """
     Base class for Sympathy nodes. Fully implements the
@@ -423,6 +367,10 @@ class BasicNode(object):
     should extend this class.
     """
 
+    # Set to False in nodes that must not be served from the node cache,
+    # see sympathy.platform.node_cache.
+    memoize = True
+
     def __init__(self):
         self.active_socket = None
         self.active_file = None
@@ -432,10 +380,33 @@ class BasicNode(object):
         self._requested_filenames = None
         self._expanded = True
         self._managed = False
+        self._progress = progress.Reporter(
+            self._sys_send_progress, self._sys_send_status,
+            self._sys_process_messages)
 
     def set_progress(self, value):
-        """Set and send progress to main program."""
+        """
+        Set progress, in percent of the current progress range, and send it
+        to main program. Updates are coalesced, see
+        sympathy.platform.progress.
+        """
+        self._progress.progress(value)
+
+    def set_status(self, status):
+        """
+        Send status message to main program. Messages are coalesced, see
+        sympathy.platform.progress.
+        """
+        self._progress.status(status)
 
+    def progress_range(self, start, stop):
+        """
+        Return context manager in which set_progress(0) to set_progress(100)
+        maps to start to stop of the current progress range.
+        """
+        return self._progress.range(start, stop)
+
+    def _sys_send_progress(self, value):
         if self.active_socket is not None:
             msg = 'PROGRESS %f\n' % float(value)
             try:
@@ -443,9 +414,7 @@ class BasicNode(object):
             except socket.error:
                 pass
 
-    def set_status(self, status):
-        """Send status message to main program."""
-
+    def _sys_send_status(self, status):
         if self.active_socket is not None:
             msg = 'STATUS %s\n' % status
             try:
@@ -471,9 +440,10 @@ class BasicNode(object):
     def check_abort(self):
         """
         Check if server has sent an abort message.
-        Returns True if an abort message was sent.
+        Returns True if an abort message was sent. The server is polled at
+        most every progress.ABORT_INTERVAL seconds.
         """
-        self._sys_process_messages()
+        self._progress.poll()
         return self.abort_flag
 
     def request_filenames(self, portname, filename_count,
@@ -550,6 +520,9 @@ class BasicNode(object):
 
     def _execute_parameter_view(self, node_context, parameters_changed=None,
                                 return_widget=False):
+        from .parameters_dialog import ParametersDialog
+        from .. utils.parameter_helper_visitors import WidgetBuildingVisitor
+        QtCore, QtGui = _qt()
         dialog = None
         try:
             if not return_widget:
@@ -681,13 +654,15 @@ class BasicNode(object):
             # In this case the result from self.exec_parameter_view is the
             # configuration widget
             return result
-        elif result == QtGui.QDialog.Accepted:
+        QtGui = _qt()[1]
+        if result == QtGui.QDialog.Accepted:
             return adjusted_parameters
         else:
             return old
 
     def exec_port_viewer(self, parameters):
         from viewer import MainWindow as ViewerWindow
+        QtCore, QtGui = _qt()
         try:
             try:
                 application = QtGui.QApplication([])
@@ -714,16 +689,38 @@ class BasicNode(object):
     def _sys_execute(self, parameters, type_aliases,
                      builder=BaseContextBuilder()):
         """Called by the Sympathy platform when executing a node."""
+        memo = None
+        if isinstance(builder, BaseContextBuilder):
+            # Inputs supplied by other builders are not files that can be
+            # fingerprinted.
+            memo = node_cache.memo(self, parameters, type_aliases)
+            if memo is not None and memo.serve():
+                return
+
         node_context = self._build_node_context(parameters, type_aliases,
                                                 builder=builder)
 
-        self.execute_basic(node_context)
+        name = type(self).__name__
+        try:
+            with instrument.span(getattr(self, 'name', name), 'node',
+                                 profile=instrument.profile_interval(),
+                                 nodeid=getattr(self, 'nodeid', None)):
+                self.execute_basic(node_context)
+        finally:
+            # Also when execute fails, so that the last progress and status
+            # are shown and spans and counters are not reported with the
+            # next execution.
+            self._progress.flush()
+            instrument.flush(name)
+        memory.check_budget()
 
         # Ensure all files were created
         if self._requested_filenames is not None:
             for requested_filename in self._requested_filenames:
                 if not os.path.isfile(requested_filename):
                     raise IOError("All requested files weren't created")
+        elif memo is not None:
+            memo.store()
 
     def _sys_after_execute(self):
         """Always executed after main execution."""
@@ -798,6 +795,7 @@ class BasicNode(object):
             parameters, node_context.typealiases, node_context._objects)
 
     def _open_node_documentation(self, node_context):
+        QtCore, QtGui = _qt()
         path_in_library = os.path.dirname(os.path.relpath(
             uri_to_path(node_context.definition['source_file']),
             uri_to_path(node_context.definition['library'])))
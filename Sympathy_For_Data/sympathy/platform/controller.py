@@ -1,11 +1,6 @@
 import sys
 
-from sympathy.platform import qt_compat
-QtCore = qt_compat.QtCore
-QtGui = qt_compat.import_module('QtGui')
-
 from sympathy.utils.parameter_helper import ParameterRoot
-from sympathy.utils.parameter_helper_visitors import WidgetBuildingVisitor
 
 
 class Field(object):
@@ -72,6 +67,9 @@ class ParameterLayoutObject(object):
 
 def main():
     from sympathy.api import node as synode
+    from sympathy.platform import qt_compat
+    from sympathy.utils.parameter_helper_visitors import WidgetBuildingVisitor
+    QtGui = qt_compat.import_module('QtGui')
 
     app = QtGui.QApplication(sys.argv)
 
@@ -0,0 +1,431 @@
+# Copyright (c) 2017, System Engineering Software Society
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither the name of the System Engineering Software Society nor the
+#       names of its contributors may be used to endorse or promote products
+#       derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.
+# IN NO EVENT SHALL SYSTEM ENGINEERING SOFTWARE SOCIETY BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+Headless execution of workflows.
+
+build_tasks turns a parsed flow, a flow_model.Flow or the dict of one, into
+tasks, one for each node including the nodes of subflows, with the output
+ports that their input ports read from. Connections through the ports of
+subflows are followed to the nodes on the other side, so the result is a
+flat dependency graph.
+
+FlowExecutor runs the tasks with up to workers nodes at the same time,
+starting each node as soon as all nodes it depends on have finished, so
+independent branches of the flow run concurrently. The node itself is run
+by a runner, a callable::
+
+    runner(node, inputs, outputs)
+
+where node is the node dict, inputs the values of the connected output
+ports, in input port order, None for unconnected ports, and outputs a list
+of temporary .sydata filenames, one per output port, for the node to write.
+If the runner returns a list, that list is passed on as the output values
+instead of the filenames.
+
+By default each node runs in a separate process, which isolates the global
+state of the nodes and allows nodes that exceed the timeout to be
+terminated. Runners that hand over data in memory need processes=False,
+then the nodes run in threads of the executor and nodes that time out are
+reported, but left to finish in the background.
+
+A node that fails or times out does not stop independent branches, but
+all nodes that depend on it, directly or indirectly, are skipped. With
+fail_fast no further nodes are started after the first failure.
+
+NodeRunner runs library nodes the way the platform does, with the ports in
+files. The executor can also be run as a module::
+
+    python -m sympathy.platform.flow_executor flow.syx --workers 4
+"""
+import os
+import sys
+import copy
+import json
+import time
+import Queue
+import argparse
+import tempfile
+import threading
+import traceback
+import collections
+import multiprocessing
+
+from .. utils import instrument
+from .. utils.prim import uri_to_path
+
+DONE = 'done'
+FAILED = 'failed'
+TIMEOUT = 'timeout'
+SKIPPED = 'skipped'
+
+
+class Task(object):
+    """A node of the flow and the output ports connected to its inputs."""
+
+    def __init__(self, node):
+        self.node = node
+        self.uuid = node['uuid']
+        self.label = node.get('label') or node.get('id', '')
+        # (node uuid, output index) or None, for each input port.
+        self.inputs = []
+        self.dependencies = set()
+        # In flow order, which is the order they are started in.
+        self.dependents = []
+
+
+class Result(object):
+    """The outcome of running one node."""
+
+    def __init__(self, status, outputs=None, error=None, seconds=0.0):
+        self.status = status
+        self.outputs = outputs
+        self.error = error
+        self.seconds = seconds
+
+    def __repr__(self):
+        return 'Result({!r}, {!r}, {!r}, {:.3f})'.format(
+            self.status, self.outputs, self.error, self.seconds)
+
+
+def _ports(node, group):
+    return sorted(node['ports'][group], key=lambda port: int(port['index']))
+
+
+def node_parameters(node):
+    """Return the parameter data of the node dict."""
+    data = node.get('parameters', {}).get('data', {})
+    if isinstance(data, basestring):
+        data = json.loads(data)
+    # flow_model.Node stores the whole parameter dict as data.
+    if isinstance(data, dict) and sorted(data) == ['data', 'type']:
+        data = data['data']
+    return data
+
+
+def build_tasks(flow):
+    """
+    Return OrderedDict of node uuid to Task for all nodes in flow, a
+    flow_model.Flow or flow dict, and in its subflows.
+    Raises ValueError if the connections form a cycle.
+    """
+    if not isinstance(flow, dict):
+        flow = flow.to_dict()
+    nodes = collections.OrderedDict()
+    # Destination port uuid to source port uuid.
+    sources = {}
+
+    def add(flow_dict):
+        for node in flow_dict.get('nodes', []):
+            nodes[node['uuid']] = node
+        for connection in flow_dict.get('connections', []):
+            sources[connection['destination']['port']] = (
+                connection['source']['port'])
+        for subflow in flow_dict.get('flows', []):
+            # Lambdas and other special flows are data, not subflows.
+            if subflow.get('cls', 'Flow') == 'Flow':
+                add(subflow)
+
+    add(flow)
+    output_ports = {}
+    for uuid_, node in nodes.items():
+        for index, port in enumerate(_ports(node, 'outputs')):
+            output_ports[port['uuid']] = (uuid_, index)
+
+    tasks = collections.OrderedDict(
+        (uuid_, Task(node)) for uuid_, node in nodes.items())
+    for task in tasks.values():
+        for port in _ports(task.node, 'inputs'):
+            source = None
+            port_uuid = port['uuid']
+            seen = set()
+            # Follow connections through subflow ports until a node.
+            while port_uuid in sources and port_uuid not in seen:
+                seen.add(port_uuid)
+                port_uuid = sources[port_uuid]
+                if port_uuid in output_ports:
+                    source = output_ports[port_uuid]
+                    break
+            task.inputs.append(source)
+            if source is not None and source[0] not in task.dependencies:
+                task.dependencies.add(source[0])
+                tasks[source[0]].dependents.append(task.uuid)
+
+    _check_acyclic(tasks)
+    return tasks
+
+
+def _check_acyclic(tasks):
+    waiting = {uuid_: len(task.dependencies) for uuid_, task in tasks.items()}
+    ready = [uuid_ for uuid_, count in waiting.items() if count == 0]
+    visited = 0
+    while ready:
+        visited += 1
+        for dependent in tasks[ready.pop()].dependents:
+            waiting[dependent] -= 1
+            if waiting[dependent] == 0:
+                ready.append(dependent)
+    if visited != len(tasks):
+        raise ValueError('The flow contains a cycle.')
+
+
+def _run_child(connection, runner, node, inputs, outputs):
+    try:
+        value = runner(node, inputs, outputs)
+        connection.send((DONE, value, None))
+    except BaseException:
+        connection.send((FAILED, None, traceback.format_exc()))
+    finally:
+        connection.close()
+
+
+def _run_process(runner, node, inputs, outputs, timeout):
+    reader, writer = multiprocessing.Pipe(duplex=False)
+    process = multiprocessing.Process(
+        target=_run_child, args=(writer, runner, node, inputs, outputs))
+    process.start()
+    writer.close()
+    try:
+        if not reader.poll(timeout):
+            process.terminate()
+            return TIMEOUT, None, 'Terminated after {} seconds.'.format(
+                timeout)
+        try:
+            return reader.recv()
+        except EOFError:
+            process.join()
+            return FAILED, None, 'Process exited with code {}.'.format(
+                process.exitcode)
+    finally:
+        process.join()
+        reader.close()
+
+
+def _run_thread(runner, node, inputs, outputs, timeout):
+    result = []
+
+    def target():
+        try:
+            result.append((DONE, runner(node, inputs, outputs), None))
+        except Exception:
+            result.append((FAILED, None, traceback.format_exc()))
+
+    thread = threading.Thread(target=target, name='flow node')
+    thread.daemon = True
+    thread.start()
+    thread.join(timeout)
+    if thread.is_alive():
+        return TIMEOUT, None, 'Still running after {} seconds.'.format(
+            timeout)
+    return result[0]
+
+
+class FlowExecutor(object):
+    """
+    Runs the nodes of a flow with runner, up to workers (default: one per
+    cpu) at a time, each with at most timeout seconds (default: no limit).
+    Output files are created in directory, a new temporary directory by
+    default.
+    """
+
+    def __init__(self, runner, workers=None, timeout=None, processes=True,
+                 directory=None, fail_fast=False):
+        self.runner = runner
+        self.workers = max(1, workers or multiprocessing.cpu_count())
+        self.timeout = timeout
+        self.processes = processes
+        self.directory = directory
+        self.fail_fast = fail_fast
+
+    def _output_files(self, directory, task):
+        return [os.path.join(directory, '{}_{}.sydata'.format(
+                    task.uuid.strip('{}'), index))
+                for index in range(len(task.node['ports']['outputs']))]
+
+    def _supervise(self, task, results, outputs, completed):
+        t0 = time.time()
+        run = _run_process if self.processes else _run_thread
+        try:
+            inputs = [None if source is None else
+                      results[source[0]].outputs[source[1]]
+                      for source in task.inputs]
+            with instrument.span(task.label, 'flow', uuid=task.uuid):
+                status, value, error = run(
+                    self.runner, task.node, inputs, outputs, self.timeout)
+        except Exception:
+            status, value, error = FAILED, None, traceback.format_exc()
+        completed.put((task.uuid, Result(
+            status, outputs if value is None else value, error,
+            time.time() - t0)))
+
+    def run(self, flow):
+        """
+        Run flow, a flow_model.Flow, a flow dict or the result of
+        build_tasks.
+        :return: OrderedDict of node uuid to Result.
+        """
+        tasks = flow
+        if not (isinstance(flow, dict) and
+                all(isinstance(task, Task) for task in flow.values())):
+            tasks = build_tasks(flow)
+        directory = self.directory or tempfile.mkdtemp(prefix='sy_flow_')
+        results = {}
+        waiting = {uuid_: len(task.dependencies)
+                   for uuid_, task in tasks.items()}
+        ready = collections.deque(
+            uuid_ for uuid_ in tasks if waiting[uuid_] == 0)
+        completed = Queue.Queue()
+        running = 0
+        stopped = False
+
+        while running or (ready and not stopped):
+            while ready and running < self.workers and not stopped:
+                task = tasks[ready.popleft()]
+                thread = threading.Thread(
+                    target=self._supervise, name='flow supervisor',
+                    args=(task, results, self._output_files(directory, task),
+                          completed))
+                thread.daemon = True
+                thread.start()
+                running += 1
+
+            while True:
+                try:
+                    # With a timeout, so that the wait can be interrupted.
+                    uuid_, result = completed.get(True, 1.0)
+                    break
+                except Queue.Empty:
+                    pass
+            running -= 1
+            results[uuid_] = result
+            if result.status == DONE:
+                for dependent in tasks[uuid_].dependents:
+                    waiting[dependent] -= 1
+                    if waiting[dependent] == 0:
+                        ready.append(dependent)
+            else:
+                self._skip_dependents(tasks, tasks[uuid_], results)
+                stopped = stopped or self.fail_fast
+
+        return collections.OrderedDict(
+            (uuid_, results.get(uuid_) or Result(
+                SKIPPED, error='Not started after an earlier failure.'))
+            for uuid_ in tasks)
+
+    def _skip_dependents(self, tasks, task, results):
+        error = 'Skipped since {} {}.'.format(
+            task.label, 'failed' if results[task.uuid].status == FAILED
+            else 'timed out')
+        stack = list(task.dependents)
+        while stack:
+            uuid_ = stack.pop()
+            if uuid_ not in results:
+                results[uuid_] = Result(SKIPPED, error=error)
+                stack.extend(tasks[uuid_].dependents)
+
+
+def _node_instance(definition):
+    filename = uri_to_path(definition['file'])
+    sys.path.insert(0, os.path.dirname(filename))
+    with open(filename) as f:
+        compiled_code = compile(f.read(), filename, 'exec')
+    context = {}
+    eval(compiled_code, context, context)
+    return context[definition['class']]()
+
+
+class NodeRunner(object):
+    """
+    Runner for library nodes, executed with their ports in files.
+
+    definitions maps nodeid to the library definition of the node, with
+    file, class, ports and parameters. Nodes run with the working directory
+    set to directory, if given, so it should only be used with processes.
+    """
+
+    def __init__(self, definitions, type_aliases=None, directory=None):
+        self.definitions = definitions
+        self.type_aliases = type_aliases or {}
+        self.directory = directory
+
+    def __call__(self, node, inputs, outputs):
+        from . import state
+        definition = copy.deepcopy(self.definitions[node['id']])
+        parameters = node_parameters(node)
+        if parameters:
+            definition['parameters']['data'] = parameters
+        for group, files in [('inputs', inputs), ('outputs', outputs)]:
+            for port, filename in zip(_ports(definition, group), files):
+                port['file'] = filename
+        if self.directory:
+            os.chdir(self.directory)
+
+        node_instance = _node_instance(definition)
+        try:
+            adjusted_definition = node_instance._sys_adjust_parameters(
+                definition, self.type_aliases)
+            node_instance._sys_execute(adjusted_definition, self.type_aliases)
+        finally:
+            state.node_state().cleardata()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Run a workflow without the GUI.')
+    parser.add_argument('filename', help='Workflow, .syx')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Number of nodes to run at the same time')
+    parser.add_argument('--timeout', type=float, default=None,
+                        help='Timeout for each node in seconds')
+    parser.add_argument('--directory', default=None,
+                        help='Directory for the output files of the nodes')
+    parser.add_argument('--fail-fast', action='store_true',
+                        help='Start no more nodes after a failure')
+    args = parser.parse_args(argv)
+
+    from . import flow_model
+    from . import interactive
+    filename = os.path.abspath(args.filename)
+    tasks = build_tasks(flow_model.flow_from_syx(filename))
+    library = interactive.load_library(gui=False)
+    definitions = {task.node['id']: library.definition(task.node['id'])
+                   for task in tasks.values()}
+
+    executor = FlowExecutor(
+        NodeRunner(definitions, directory=os.path.dirname(filename)),
+        workers=args.workers, timeout=args.timeout,
+        directory=args.directory, fail_fast=args.fail_fast)
+    results = executor.run(tasks)
+    for uuid_, result in results.items():
+        print('{:40} {:8} {:8.3f}s'.format(
+            tasks[uuid_].label, result.status, result.seconds))
+        if result.error:
+            print(result.error)
+    return 0 if all(result.status == DONE
+                    for result in results.values()) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -235,6 +235,10 @@ class SyiLibrary(object):
     def nodeids(self):
         return self.__library.keys()
 
+    def definition(self, nid):
+        """Return a copy of the library definition of the node with nodeid."""
+        return copy.deepcopy(self.__library[nid][0])
+
 
 @repeatcontext
 def _wrap(portdata):
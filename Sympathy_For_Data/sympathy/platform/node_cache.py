@@ -0,0 +1,467 @@
+# Copyright (c) 2017, System Engineering Software Society
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither the name of the System Engineering Software Society nor the
+#       names of its contributors may be used to endorse or promote products
+#       derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.
+# IN NO EVENT SHALL SYSTEM ENGINEERING SOFTWARE SOCIETY BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+Memoization of node executions.
+
+When enabled, with set_cache or by setting the environment variable
+SY_NODE_CACHE to a directory, the output files of each executed node are
+stored in that directory under a key made from:
+
+* the node identifier,
+* the source version of the node: its version attribute and the digests of
+  the modules defining the node class and its bases,
+* a canonical hash of the parameters and type aliases,
+* the content of the input files.
+
+Executing the node again with the same key serves the stored outputs
+instead, as hard links when possible and as copies otherwise.
+
+Output files can contain HDF5 external links into the files of upstream
+nodes. The digests of all files reachable through such links are recorded
+with each entry and the entry is only served while they are unchanged. The
+fingerprint of an input file includes the files that it links to in the
+same way.
+
+The total size of the stored outputs is bounded by SY_NODE_CACHE_SIZE in
+MiB, default 1024, and the least recently used entries are evicted when it
+is exceeded. Nodes that are not deterministic, for example the ones that
+generate random data or read and write files outside of their ports, opt
+out by setting memoize = False in the node class.
+
+Hits, misses and stores are counted with instrument.count and in stats().
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+import inspect
+import collections
+
+import h5py
+
+from . import state
+from . import filehash
+from .. utils import instrument
+from .. datasources.chunked.dsgroup import chunk_directory
+
+
+DEFAULT_SIZE = 1 << 30
+_entry_suffix = '.json'
+
+
+def _abspath(filename, directory=''):
+    if isinstance(filename, bytes):
+        filename = filename.decode('utf8')
+    return os.path.abspath(os.path.join(directory, filename))
+
+
+def external_links(filename):
+    """
+    Return set with the absolute filenames of the files that filename
+    links to directly with HDF5 external links.
+    """
+    result = set()
+    if not h5py.is_hdf5(filename):
+        return result
+    directory = os.path.dirname(filename)
+    with h5py.File(filename, 'r') as hdf5_file:
+        groups = [hdf5_file]
+        visited = set()
+        while groups:
+            group = groups.pop()
+            for name in group:
+                link = group.get(name, getlink=True)
+                if isinstance(link, h5py.ExternalLink):
+                    result.add(_abspath(link.filename, directory))
+                elif isinstance(link, h5py.HardLink):
+                    item = group.get(name)
+                    if (isinstance(item, h5py.Group) and
+                            item.id not in visited):
+                        visited.add(item.id)
+                        groups.append(item)
+    return result
+
+
+def linked_files(filenames):
+    """
+    Return sorted list of the absolute filenames reachable from filenames
+    through HDF5 external links, filenames themselves excluded.
+    """
+    start = set(_abspath(filename) for filename in filenames)
+    pending = list(start)
+    seen = set(start)
+    while pending:
+        filename = pending.pop()
+        if not os.path.isfile(filename):
+            continue
+        for linked in external_links(filename):
+            if linked not in seen:
+                seen.add(linked)
+                pending.append(linked)
+    return sorted(seen - start)
+
+
+def _link_or_copy(source, destination):
+    if os.path.lexists(destination):
+        os.remove(destination)
+    try:
+        os.link(source, destination)
+    except (AttributeError, OSError):
+        # No hard links on this platform or across file systems.
+        shutil.copyfile(source, destination)
+
+
+def _unshare(filename):
+    """
+    Remove filename if it is a hard link to a stored output, so that
+    writing to it does not change the stored file.
+    """
+    try:
+        if os.stat(filename).st_nlink > 1:
+            os.remove(filename)
+    except OSError:
+        pass
+
+
+class NodeCache(object):
+    """
+    Directory of stored node outputs.
+
+    Each entry consists of the output files, <key>_<index>.sydata, and
+    <key>.json which describes them. Entries are independent files so that
+    several worker processes can share the directory.
+    """
+
+    def __init__(self, directory, limit=DEFAULT_SIZE):
+        self.directory = os.path.abspath(directory)
+        self.limit = limit
+        self.digests = filehash.DigestCache()
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        try:
+            os.makedirs(self.directory)
+        except OSError:
+            # Already exists, possibly created by another worker.
+            pass
+
+    def _entry_filename(self, key):
+        return os.path.join(self.directory, key + _entry_suffix)
+
+    def _output_filename(self, key, index):
+        return os.path.join(self.directory, '{}_{}.sydata'.format(key, index))
+
+    def _digest(self, filename):
+        try:
+            return self.digests.digest(filename)
+        except (IOError, OSError):
+            return None
+
+    def fingerprint(self, filename):
+        """
+        Return digest of the content of filename and of the files that it
+        links to.
+        """
+        hash_function = hashlib.sha1()
+        for name in [_abspath(filename)] + linked_files([filename]):
+            digest = self._digest(name)
+            if digest is None:
+                raise IOError('Can not read: {}'.format(name))
+            hash_function.update(
+                name.encode('utf8') + b'\0' + digest.encode('ascii') + b'\n')
+        return hash_function.hexdigest()
+
+    def source_version(self, node):
+        """
+        Return the version attribute of node combined with the digests of
+        the modules that define its class and base classes.
+        """
+        hash_function = hashlib.sha1()
+        hash_function.update(str(getattr(node, 'version', '')).encode('utf8'))
+        for cls in inspect.getmro(type(node)):
+            try:
+                filename = inspect.getsourcefile(cls)
+            except TypeError:
+                # Built-in class.
+                continue
+            digest = filename and self._digest(filename)
+            if digest:
+                hash_function.update(digest.encode('ascii'))
+        return hash_function.hexdigest()
+
+    def key(self, node, parameters, type_aliases):
+        """
+        Return the key for executing node with parameters, the node
+        definition with ports included.
+        """
+        ports = parameters['ports']
+        description = collections.OrderedDict([
+            ('nodeid', getattr(node, 'nodeid', type(node).__name__)),
+            ('source', self.source_version(node)),
+            ('parameters', parameters['parameters'].get('data', {})),
+            ('type_aliases', type_aliases),
+            ('inputs', [[port['type'], self.fingerprint(port['file'])]
+                        for port in ports.get('inputs', [])]),
+            ('outputs', [port['type'] for port in ports['outputs']])])
+        data = json.dumps(description, sort_keys=True, separators=(',', ':'),
+                          default=repr)
+        return hashlib.sha1(data.encode('utf8')).hexdigest()
+
+    def _load_entry(self, key):
+        try:
+            with open(self._entry_filename(key), 'rb') as f:
+                return json.loads(f.read().decode('utf8'))
+        except (IOError, OSError, ValueError):
+            return None
+
+    def _valid(self, key, entry, count):
+        if len(entry['files']) != count:
+            return False
+        for index, (size, mtime) in enumerate(entry['files']):
+            try:
+                stat = os.stat(self._output_filename(key, index))
+            except OSError:
+                return False
+            # A stored output changes if it is written through one of its
+            # hard links.
+            if [stat.st_size, stat.st_mtime] != [size, mtime]:
+                return False
+        return all(self._digest(filename) == digest
+                   for filename, digest in entry['links'].items())
+
+    def lookup(self, key, outputs):
+        """
+        Serve the stored outputs of key as the files in outputs.
+        :return: True on hit.
+        """
+        entry = self._load_entry(key)
+        if entry is None or not self._valid(key, entry, len(outputs)):
+            if entry is not None:
+                self.remove(key)
+            self.misses += 1
+            instrument.count('node_cache.miss')
+            return False
+        for index, filename in enumerate(outputs):
+            _link_or_copy(self._output_filename(key, index), filename)
+        try:
+            # Modification time of the entry file orders the entries for
+            # eviction.
+            os.utime(self._entry_filename(key), None)
+        except OSError:
+            pass
+        self.hits += 1
+        instrument.count('node_cache.hit')
+        return True
+
+    def store(self, key, outputs):
+        """
+        Store the files in outputs as key and evict old entries if the
+        cache is full.
+        :return: True if the outputs were stored.
+        """
+        hdf5_state = state.hdf5_state()
+        for filename in outputs:
+            # Flush and close outputs still held open after execution.
+            if filename in hdf5_state.filestate:
+                hdf5_state.close(filename)
+        if any(os.path.isdir(chunk_directory(filename))
+               for filename in outputs):
+            # The data of chunked outputs is in a directory named after the
+            # output file, which would not follow the stored file.
+            return False
+        try:
+            links = linked_files(outputs)
+        except (IOError, OSError):
+            return False
+        outputs_ = set(_abspath(filename) for filename in outputs)
+        if outputs_.intersection(links):
+            # Links between the outputs would point at the output filenames
+            # and not at the stored files.
+            return False
+        link_digests = {}
+        for filename in links:
+            link_digests[filename] = self._digest(filename)
+            if link_digests[filename] is None:
+                return False
+
+        files = []
+        try:
+            for index, filename in enumerate(outputs):
+                stored = self._output_filename(key, index)
+                _link_or_copy(filename, stored)
+                stat = os.stat(stored)
+                files.append([stat.st_size, stat.st_mtime])
+        except (IOError, OSError):
+            self.remove(key)
+            return False
+
+        entry = {'files': files, 'links': link_digests,
+                 'size': sum(size for size, _ in files)}
+        tmp_filename = '{}.{}.tmp'.format(self._entry_filename(key),
+                                          os.getpid())
+        with open(tmp_filename, 'wb') as f:
+            f.write(json.dumps(entry).encode('utf8'))
+        if os.path.exists(self._entry_filename(key)):
+            os.remove(self._entry_filename(key))
+        os.rename(tmp_filename, self._entry_filename(key))
+        self.stores += 1
+        instrument.count('node_cache.store')
+        self.evict()
+        return True
+
+    def remove(self, key):
+        """Remove the entry key and its stored outputs."""
+        filenames = [self._entry_filename(key)]
+        prefix = key + '_'
+        filenames.extend(os.path.join(self.directory, name)
+                         for name in os.listdir(self.directory)
+                         if name.startswith(prefix))
+        for filename in filenames:
+            try:
+                os.remove(filename)
+            except OSError:
+                pass
+
+    def entries(self):
+        """
+        Return list of (last used, size, key) for all entries, least
+        recently used first.
+        """
+        result = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(_entry_suffix):
+                continue
+            key = name[:-len(_entry_suffix)]
+            entry = self._load_entry(key)
+            try:
+                used = os.path.getmtime(self._entry_filename(key))
+            except OSError:
+                continue
+            size = entry['size'] if entry is not None else 0
+            result.append((used, size, key))
+        return sorted(result)
+
+    def evict(self):
+        """Remove least recently used entries until within the limit."""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, key in entries:
+            if total <= self.limit:
+                break
+            self.remove(key)
+            total -= size
+            self.evictions += 1
+            instrument.count('node_cache.eviction')
+
+    def stats(self):
+        """Return dict with counters and the current size of the cache."""
+        entries = self.entries()
+        return collections.OrderedDict([
+            ('hits', self.hits),
+            ('misses', self.misses),
+            ('stores', self.stores),
+            ('evictions', self.evictions),
+            ('entries', len(entries)),
+            ('size', sum(size for _, size, _ in entries)),
+            ('limit', self.limit)])
+
+
+class Memo(object):
+    """Memoization of one node execution."""
+
+    def __init__(self, node_cache, key, outputs):
+        self.node_cache = node_cache
+        self.key = key
+        self.outputs = outputs
+
+    def serve(self):
+        """
+        Serve the stored outputs, if any. On a miss, outputs that are
+        hard links to stored outputs are removed before they are written.
+        :return: True on hit.
+        """
+        if self.node_cache.lookup(self.key, self.outputs):
+            return True
+        for filename in self.outputs:
+            _unshare(filename)
+        return False
+
+    def store(self):
+        return self.node_cache.store(self.key, self.outputs)
+
+
+def _cache_from_environ():
+    directory = os.environ.get('SY_NODE_CACHE')
+    if not directory:
+        return None
+    try:
+        limit = int(float(os.environ['SY_NODE_CACHE_SIZE']) * 1024 * 1024)
+    except (KeyError, ValueError):
+        limit = DEFAULT_SIZE
+    return NodeCache(directory, limit)
+
+
+_cache = _cache_from_environ()
+
+
+def cache():
+    """Return the current NodeCache or None."""
+    return _cache
+
+
+def set_cache(directory, limit=DEFAULT_SIZE):
+    """
+    Set the directory of the node cache, None disables memoization.
+    :return: the new NodeCache or None.
+    """
+    global _cache
+    _cache = None if directory is None else NodeCache(directory, limit)
+    return _cache
+
+
+def memo(node, parameters, type_aliases):
+    """
+    Return Memo for executing node with parameters, the node definition,
+    or None if memoization is disabled or not possible.
+    """
+    if _cache is None or not getattr(node, 'memoize', True):
+        return None
+    outputs = [port['file'] for port in parameters['ports']['outputs']]
+    try:
+        key = _cache.key(node, parameters, type_aliases)
+    except (IOError, OSError, KeyError) as error:
+        sys.stderr.write('Node cache disabled for {}: {}\n'.format(
+            getattr(node, 'nodeid', type(node).__name__), error))
+        return None
+    return Memo(_cache, key, outputs)
+
+
+def stats():
+    """Return stats of the current cache, empty if disabled."""
+    return _cache.stats() if _cache is not None else {}
@@ -29,6 +29,14 @@ def thread_count():
         return 1
 
 
+def headless():
+    """
+    Return True if the headless profile is selected, by setting the
+    environment variable SY_HEADLESS to a non-empty value other than 0.
+    """
+    return os.environ.get('SY_HEADLESS', '') not in ('', '0')
+
+
 
 def Popen(args, **kwargs):
     stdin = kwargs.pop('stdin', None)
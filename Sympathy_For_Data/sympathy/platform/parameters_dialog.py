@@ -0,0 +1,95 @@
+# Copyright (c) 2017, System Engineering Software Society
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither the name of the System Engineering Software Society nor the
+#       names of its contributors may be used to endorse or promote products
+#       derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.
+# IN NO EVENT SHALL SYSTEM ENGINEERING SOFTWARE SOCIETY BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+Dialog for node configuration, only used when the parameter view is shown.
+"""
+from . import qt_compat
+QtCore = qt_compat.QtCore
+QtGui = qt_compat.QtGui
+
+
+class ParametersDialog(QtGui.QDialog):
+    def __init__(self, parameters_changed=None, *args, **kwargs):
+        super(ParametersDialog, self).__init__(*args, **kwargs)
+        if parameters_changed is None:
+            self._parameters_changed = lambda: False
+        else:
+            self._parameters_changed = parameters_changed
+        self._widget = None
+        self.accepted.connect(self._save_parameters)
+
+    def set_configuration_widget(self, widget):
+        self._widget = widget
+
+    def keyPressEvent(self, event):
+        # Only accept Ctrl+Enter as Ok and Esc as Cancel.
+        # This is to avoid closing the dialog by accident.
+        if ((event.key() == QtCore.Qt.Key_Return or
+                event.key() == QtCore.Qt.Key_Enter) and
+                event.modifiers() & QtCore.Qt.ControlModifier):
+            self.accept()
+        elif event.key() == QtCore.Qt.Key_Escape:
+            self.reject_or_accept()
+
+    def closeEvent(self, event):
+        if not self.reject_or_accept():
+            event.ignore()
+        else:
+            if (self._widget is not None and
+                    hasattr(self._widget, 'sy_cleanup')):
+                # Currently undocumented/unsupported API.
+                self._widget.sy_cleanup()
+
+    def _save_parameters(self):
+        if (self._widget is not None and
+                hasattr(self._widget, 'save_parameters')):
+            self._widget.save_parameters()
+
+    def reject_or_accept(self):
+        """
+        Ask the user if the dialog should be closed. Return True if the dialog
+        should be closed.
+        """
+        # First notify the widget that it should save its parameters.
+        self._save_parameters()
+        if not self._parameters_changed():
+            self.reject()
+            return True
+
+        choice = QtGui.QMessageBox.question(
+            self, u'Save changes to configuration',
+            "The node's configuration has changed. Save changes in node?",
+            QtGui.QMessageBox.Save | QtGui.QMessageBox.Discard |
+            QtGui.QMessageBox.Cancel, QtGui.QMessageBox.Cancel)
+
+        if choice == QtGui.QMessageBox.Discard:
+            self.reject()
+            return True
+        elif choice == QtGui.QMessageBox.Save:
+            self.accept()
+            return True
+        else:
+            return False
@@ -0,0 +1,160 @@
+# Copyright (c) 2017, System Engineering Software Society
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither the name of the System Engineering Software Society nor the
+#       names of its contributors may be used to endorse or promote products
+#       derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.
+# IN NO EVENT SHALL SYSTEM ENGINEERING SOFTWARE SOCIETY BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+Throttled progress and status reporting for nodes.
+
+Every progress or status message is a write to the socket of the platform,
+and checking for abort reads from it. Nodes that report once per item of
+a long list spend a lot of their time on messages. Reporter coalesces the
+updates instead:
+
+* progress is sent when it has changed by at least delta percent and at
+  least interval seconds have passed since the last message,
+* status is sent at most once every interval seconds, the latest one wins,
+* abort is polled at most once every abort_interval seconds,
+* pending progress and status are sent by the next update or poll after
+  they are due, and whatever is still pending is sent by flush, when the
+  node has executed.
+
+Reaching 100 percent is always sent at once.
+
+Progress ranges divide the progress of a node into parts, which report
+their own progress from 0 to 100::
+
+    for i, item in enumerate(items):
+        with self.progress_range(100.0 * i / n, 100.0 * (i + 1) / n):
+            importer.run(item, progress=self.set_progress)
+
+Ranges can be nested and the progress is at the end of the range when it is
+left.
+"""
+import time
+import contextlib
+
+# Minimum time in seconds between messages.
+INTERVAL = 0.1
+# Minimum change of progress in percent between messages.
+DELTA = 0.5
+# Minimum time in seconds between polls for abort.
+ABORT_INTERVAL = 0.1
+
+
+class Reporter(object):
+    """
+    Coalesces progress and status updates, sent with send_progress and
+    send_status, and abort polls, done with poll.
+    """
+
+    def __init__(self, send_progress, send_status, poll,
+                 interval=INTERVAL, delta=DELTA,
+                 abort_interval=ABORT_INTERVAL, clock=time.time):
+        self._send_progress = send_progress
+        self._send_status = send_status
+        self._poll = poll
+        self.interval = interval
+        self.delta = delta
+        self.abort_interval = abort_interval
+        self._clock = clock
+        self._ranges = []
+        self._offset = 0.0
+        self._scale = 1.0
+        self._sent = None
+        self._sent_time = None
+        self._pending = None
+        self._status = None
+        self._status_time = None
+        self._poll_time = None
+
+    def _due(self, last_time, interval):
+        return last_time is None or self._clock() - last_time >= interval
+
+    def progress(self, value):
+        """Update progress to value, in percent of the innermost range."""
+        self._update(self._offset + self._scale * float(value))
+
+    def _update(self, value):
+        if value == self._sent:
+            self._pending = None
+            return
+        if (value >= 100 or self._sent is None or
+                (abs(value - self._sent) >= self.delta and
+                 self._due(self._sent_time, self.interval))):
+            self._sent = value
+            self._sent_time = self._clock()
+            self._pending = None
+            self._send_progress(value)
+        else:
+            self._pending = value
+
+    def status(self, status):
+        """Update status message to status."""
+        if self._due(self._status_time, self.interval):
+            self._status_time = self._clock()
+            self._status = None
+            self._send_status(status)
+        else:
+            self._status = status
+
+    def poll(self):
+        """
+        Send pending progress and status that are due and poll for abort
+        unless it was polled recently.
+        """
+        if self._pending is not None:
+            self._update(self._pending)
+        if self._status is not None:
+            self.status(self._status)
+        if self._due(self._poll_time, self.abort_interval):
+            self._poll_time = self._clock()
+            self._poll()
+
+    def flush(self):
+        """Send pending progress and status."""
+        if self._pending is not None:
+            self._sent = self._pending
+            self._sent_time = self._clock()
+            self._pending = None
+            self._send_progress(self._sent)
+        if self._status is not None:
+            self._status_time = self._clock()
+            status, self._status = self._status, None
+            self._send_status(status)
+
+    @contextlib.contextmanager
+    def range(self, start, stop):
+        """
+        Context manager mapping progress 0 to 100 inside it to start to stop
+        of the enclosing range.
+        """
+        self._ranges.append((self._offset, self._scale))
+        stop_ = self._offset + self._scale * float(stop)
+        self._offset += self._scale * float(start)
+        self._scale *= (float(stop) - float(start)) / 100.0
+        try:
+            yield
+        finally:
+            self._offset, self._scale = self._ranges.pop()
+            self._update(stop_)
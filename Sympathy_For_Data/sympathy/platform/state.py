@@ -26,9 +26,15 @@
 """
 Methods for handling global state.
 """
-import h5py
+import os
+import sys
+import threading
+import collections
 from contextlib import contextmanager
 
+import h5py
+from h5py import h5f
+
 
 __node_state = None
 __cache_state = None
@@ -154,40 +160,133 @@ class CacheState(object):
         return self.filestate
 
 
+def _max_open_files_from_environ():
+    try:
+        return int(os.environ['SY_HDF5_MAX_OPEN_FILES'])
+    except (KeyError, ValueError):
+        return MAX_OPEN_FILES
+
+
+# Default number of files kept open by Hdf5State, can be overridden by
+# setting SY_HDF5_MAX_OPEN_FILES.
+MAX_OPEN_FILES = 256
+# Objects, other than file handles, that keep a file in use.
+_in_use_types = h5f.OBJ_ALL & ~h5f.OBJ_FILE
+
+
 class Hdf5State(object):
-    def __init__(self):
-        self.filestate = {}
+    """
+    Pool of open HDF5 files, keyed by filename.
+
+    At most max_open files are kept open. When more are opened, read-only
+    files are closed in least recently used order and reopened on their
+    next access. A file is only closed when neither the file itself nor
+    any datasets, groups or other objects in it are referenced elsewhere, so
+    objects handed out remain valid. Files opened for writing are never
+    closed by the pool. Opens, reopens and evictions are counted in
+    counters. The pool can be used from several threads.
+    """
+
+    def __init__(self, max_open=None):
+        self.filestate = collections.OrderedDict()
         self.filenum = {}
+        self.max_open = (_max_open_files_from_environ() if max_open is None
+                         else max_open)
+        self.counters = collections.Counter()
+        self._evicted = set()
+        self._lock = threading.RLock()
 
     def create(self):
         self.clear()
-        self.filestate = {}
+        self.filestate = collections.OrderedDict()
         self.filenum = {}
+        self._evicted = set()
 
     def clear(self):
-        for filename in list(self.filestate):
-            self.close(filename)
+        with self._lock:
+            for filename in list(self.filestate):
+                self.close(filename)
 
     def add(self, filename, hdf5_file):
-        if filename not in self.filestate:
+        """Add hdf5_file, opened elsewhere, as the open file for filename."""
+        with self._lock:
+            self.filestate.pop(filename, None)
+            self.evict(self.max_open - 1)
             self.filestate[filename] = hdf5_file
+            self.counters['open'] += 1
 
     def open(self, filename, mode):
-        if filename in self.filestate:
-            return self.filestate[filename]
-        else:
-            hdf5_file = h5py.File(filename, mode)
-            self.filestate[filename] = hdf5_file
-            return hdf5_file
-
-    def close(self, filename):
-        hdf5_file = self.filestate.pop(filename)
+        with self._lock:
+            hdf5_file = self.filestate.pop(filename, None)
+            if hdf5_file is not None:
+                # Most recently used last.
+                self.filestate[filename] = hdf5_file
+                return hdf5_file
+            else:
+                self.evict(self.max_open - 1)
+                hdf5_file = h5py.File(filename, mode)
+                self.filestate[filename] = hdf5_file
+                self.counters['open'] += 1
+                if filename in self._evicted:
+                    self._evicted.discard(filename)
+                    self.counters['reopen'] += 1
+                return hdf5_file
+
+    def in_use(self, filename):
+        """
+        Return True if the open file filename is referenced outside of the
+        pool, if objects in it are alive or if it is open for writing.
+        """
+        hdf5_file = self.filestate[filename]
+        # References from filestate, hdf5_file and the argument.
+        if sys.getrefcount(hdf5_file) > 3:
+            return True
         try:
-            hdf5_file.flush()
-            hdf5_file.close()
+            return (hdf5_file.mode != 'r' or
+                    h5f.get_obj_count(hdf5_file.id, _in_use_types) > 0)
         except ValueError:
-            # Do not allow exceptions here due to already closed file.
-            pass
+            # Already closed file.
+            return False
+
+    def evict(self, max_open=0):
+        """
+        Close least recently used files that are not in use until at most
+        max_open files are open or no more files can be closed.
+        :return: number of closed files.
+        """
+        with self._lock:
+            evicted = 0
+            excess = len(self.filestate) - max_open
+            for filename in list(self.filestate):
+                if evicted >= excess:
+                    break
+                if not self.in_use(filename):
+                    self.close(filename)
+                    self._evicted.add(filename)
+                    evicted += 1
+            self.counters['eviction'] += evicted
+            return evicted
+
+    def close(self, filename):
+        with self._lock:
+            hdf5_file = self.filestate.pop(filename)
+            try:
+                hdf5_file.flush()
+                hdf5_file.close()
+            except ValueError:
+                # Do not allow exceptions here due to already closed file.
+                pass
+
+    def stats(self):
+        """Return dict of filename to size in bytes for the open files."""
+        result = {}
+        for filename in self.filestate:
+            try:
+                result[filename] = os.path.getsize(filename)
+            except OSError:
+                # In-memory or removed file.
+                result[filename] = 0
+        return result
 
     def get(self, hdf5_file, entry):
         try:
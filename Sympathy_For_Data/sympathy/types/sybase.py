@@ -522,6 +522,13 @@ class NullSource(object):
         """Null read_with_type."""
         raise KeyError()
 
+    @staticmethod
+    def read_many_with_type(keys, content_type):
+        """Null read_many_with_type."""
+        if keys:
+            raise KeyError()
+        return []
+
     @staticmethod
     def write_with_type(key, value, content_type):
         """Null write_with_type."""
@@ -208,11 +208,13 @@ class Cache(object):
         self.__cache = collections.OrderedDict()
 
     def __store_data(self):
-        size = self.__size
-        maxsize = self.maxsize
+        if self.__size > self.maxsize:
+            self.__spill(self.maxsize / 2)
 
-        if size > maxsize:
-            while size > maxsize / 2 and len(self.__cache) > 1:
+    def __spill(self, target):
+        size = self.__size
+        if size > target:
+            while size > target and len(self.__cache) > 1:
                 # We do not store the last element regardless of size.
                 # Because, in that case, the cache would serve no purpose.
                 # Alternatively, an exception could be raised.
@@ -291,6 +293,25 @@ class Cache(object):
     def __contains__(self, key):
         return key in self.__cache or key in self.__store
 
+    def spill(self, target=0):
+        """
+        Move cached data to the backend until at most target bytes are held
+        in memory, the most recently used entry is always kept.
+        """
+        self.__spill(target)
+
+    def stats(self):
+        """
+        Return dict with the number of entries and bytes held in memory and
+        stored in the backend.
+        """
+        return {'maxsize': self.maxsize,
+                'cached_entries': len(self.__cache),
+                'cached_bytes': self.__size,
+                'stored_entries': len(self.__store),
+                'stored_bytes': sum(
+                    entry.size for entry in self.__store.values())}
+
     def close(self):
         self.__cache.clear()
         self.__store.clear()
@@ -334,6 +355,12 @@ class NumpyHDF5Cache(object):
         result = self.cache.type(hash(receipt.data))
         return result
 
+    def spill(self, target=0):
+        self.cache.spill(target)
+
+    def stats(self):
+        return self.cache.stats()
+
 
 def receipt_callback(key, owner):
     def inner(ref):
@@ -24,9 +24,15 @@
 # (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
 # SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 """Sympathy list type."""
+import Queue
+import threading
+
 from . import sybase
 from . import exception as exc
 
+# Number of items read from the datasource at a time when iterating.
+ITER_WINDOW = 64
+
 
 def set_write_through(sylist_instance):
     assert(isinstance(sylist_instance, sylist))
@@ -289,25 +295,12 @@ class sylist(sybase.sygroup):
                 self.content_type)
 
         if isinstance(index, slice):
-            # Read slice from datasource.
-            # Use cache for cached items.
+            positions = range(len(self._cache))[index]
             if self._datasource:
-                # Make concrete list from slice index
-                # and read each index separately.
-                items = []
-                for i in range(len(self._cache))[index]:
-                    value = self._cache[i]
-                    if value:
-                        items.append(value)
-                    else:
-                        value = get_single_item(i)
-                        self._cache[i] = value
-                    items.append(value)
-                return sylist(self.container_type, items=items)
-            else:
-                # Read slice from cache.
-                return sylist(
-                    self.container_type, items=list(self._cache[index]))
+                # Read the items that are not cached in one batch.
+                self._read_items(positions)
+            return sylist(self.container_type,
+                          items=[self._cache[i] for i in positions])
         else:
             value = self._cache[index]
             if not value:
@@ -315,6 +308,90 @@ class sylist(sybase.sygroup):
                 self._cache[index] = value
             return value
 
+    def _read_values(self, positions):
+        """
+        Read and return the items at positions from the datasource, without
+        using or changing the cache.
+        """
+        sources = self._datasource.read_many_with_type(
+            [self.__indices[i] for i in positions], self._content_type)
+        return [self._factory.from_datasource(source, self.content_type)
+                for source in sources]
+
+    def _read_items(self, positions):
+        """Read the items at positions that are not cached into the cache."""
+        positions = [i for i in positions if self._cache[i] is None]
+        if positions:
+            for i, value in zip(positions, self._read_values(positions)):
+                self._cache[i] = value
+
+    def iterate(self, window=ITER_WINDOW, prefetch=0):
+        """
+        Iterate over the items, reading the items that are not cached from
+        the datasource window items at a time.
+
+        With prefetch, a background thread reads up to prefetch items ahead
+        while the caller processes the current ones. The list must not be
+        changed while iterating.
+        """
+        if prefetch > 0 and self._datasource:
+            return self._iterate_prefetch(max(1, min(window, prefetch)),
+                                          prefetch)
+        return self._iterate(window)
+
+    def _iterate(self, window):
+        start = 0
+        while start < len(self._cache):
+            positions = range(start, min(start + window, len(self._cache)))
+            if self._datasource:
+                self._read_items(positions)
+            for i in positions:
+                yield self._cache[i]
+            start += window
+
+    def _iterate_prefetch(self, window, prefetch):
+        length = len(self._cache)
+        starts = range(0, length, window)
+        batches = Queue.Queue(max(1, prefetch // window))
+        stop = threading.Event()
+
+        def put(batch):
+            while not stop.is_set():
+                try:
+                    batches.put(batch, timeout=0.1)
+                    return True
+                except Queue.Full:
+                    pass
+            return False
+
+        def read():
+            try:
+                for start in starts:
+                    positions = [
+                        i for i in range(start, min(start + window, length))
+                        if self._cache[i] is None]
+                    if not put((positions, self._read_values(positions)
+                                if positions else [], None)):
+                        return
+            except Exception as error:
+                put((None, None, error))
+
+        thread = threading.Thread(target=read)
+        thread.daemon = True
+        thread.start()
+        try:
+            for start in starts:
+                positions, values, error = batches.get()
+                if error is not None:
+                    raise error
+                for i, value in zip(positions, values):
+                    if self._cache[i] is None:
+                        self._cache[i] = value
+                for i in range(start, min(start + window, length)):
+                    yield self._cache[i]
+        finally:
+            stop.set()
+
     def __setitem__(self, index, item):
         """Set item."""
         if isinstance(item, slice):
@@ -328,8 +405,7 @@ class sylist(sybase.sygroup):
         self._cache[index] = item
 
     def __iter__(self):
-        self[:]
-        return iter(self._cache)
+        return self.iterate()
 
     def __delitem__(self, index):
         del self._cache[index]
@@ -28,6 +28,7 @@ import datetime
 import numpy as np
 import pyodbc
 import re
+import sys
 import sqlite3
 from decimal import Decimal
 from contextlib import contextmanager
@@ -131,8 +132,66 @@ def read_table_column_names(connector, connection_string, table_name):
     return column_names
 
 
-def write_table_sqlite3(fq_filename, table_name, table):
-    """Write table to sqlite 3."""
+# Number of rows converted and inserted at a time by write_table_sqlite3.
+SQLITE_CHUNK_SIZE = 65536
+
+# Pragmas used for bulk loading with write_table_sqlite3. The database is
+# created in a single transaction so the journal is only needed for rollback
+# and can be kept in memory.
+SQLITE_BULK_PRAGMAS = [
+    ('journal_mode', 'MEMORY'),
+    ('synchronous', 'OFF'),
+    ('temp_store', 'MEMORY'),
+    # Negative values are in KiB, 64 MiB.
+    ('cache_size', '-65536')]
+
+
+def sqlite_column_type(input_type):
+    """Return sqlite column type for numpy dtype input_type."""
+    input_type_base = input_type.str[:2]
+    if input_type_base == '<i':
+        return 'integer'
+    elif input_type_base == '<f':
+        return 'real'
+    elif input_type_base == '|b':
+        return 'bit'
+    elif input_type_base == '<M':
+        return 'datetime'
+    elif input_type_base in ['<U', '|S']:
+        return 'text'
+    raise NotImplementedError(
+        'Type {} not implemented.'.format(input_type.str))
+
+
+def sqlite_chunks(table, chunk_size=SQLITE_CHUNK_SIZE):
+    """
+    Generate lists of rows from table, with at most chunk_size rows each.
+    Cells are converted to Python values a column chunk at a time, using
+    ndarray.tolist, without creating the rows of the whole table.
+    """
+    columns = [table.get_column_to_array(name)
+               for name in table.column_names()]
+    for start in xrange(0, table.number_of_rows(), chunk_size):
+        yield zip(*[column[start:start + chunk_size].tolist()
+                    for column in columns])
+
+
+def write_table_sqlite3(fq_filename, table_name, table, indexes=None,
+                        chunk_size=SQLITE_CHUNK_SIZE):
+    """
+    Write table to sqlite 3.
+
+    The data is inserted in chunks of chunk_size rows inside a single
+    transaction. Indexes, a list of column names, are created after all rows
+    have been inserted. If any step fails the transaction is rolled back,
+    leaving no partial table, and the exception is raised.
+
+    The connection uses SQLITE_BULK_PRAGMAS, which give up durability for
+    speed. With the journal in memory, the database file can be corrupted if
+    the process crashes while writing. With synchronous OFF, a crash of the
+    operating system or a power loss can lose or corrupt the data even
+    after the write has finished.
+    """
     if table.number_of_columns() is 0:
         print('Cannot create empty table [{}].'.format(table_name))
         return
@@ -142,83 +201,52 @@ def write_table_sqlite3(fq_filename, table_name, table):
     else:
         table_name = fix_sql_table_name(table_name)
 
-    conn = sqlite3.connect(fq_filename)
-    # Fick problem med utf-8 nar jag korde fran csv-filer annars.. Fult?
-    conn.text_factory = str
-    cursor = conn.cursor()
-    names = table.column_names()
-    input_types = [table.column_type(name) for name in names]
+    column_names = table.column_names()
+    types = [sqlite_column_type(table.column_type(name))
+             for name in column_names]
     # Fix illegal column names
-    names = ['[{}]'.format(re.sub(r'[\\[\\]\\(\\)]', '', name)) for name in names]
-    types = []
-
-    for input_type in input_types:
-        input_type_base = input_type.str[:2]
-        if input_type_base == '<i':
-            types.append('integer')
-        elif input_type_base == '<f':
-            types.append('real')
-        elif input_type_base == '|b':
-            types.append('bit')
-        elif input_type_base == '<M':
-            types.append('datetime')
-        elif input_type_base in ['<U', '|S']:
-            types.append('text')
-        else:
-            raise NotImplementedError(
-                'Type {} not implemented.'.format(input_type.str))
-
-    assert(len(names) == len(types))
+    names = ['[{}]'.format(re.sub(r'[\\[\\]\\(\\)]', '', name))
+             for name in column_names]
 
     columns = ', '.join(['{} {}'.format(iname, itype)
                          for iname, itype in zip(names, types)])
-    sqlite_data = table.to_rows()
-    sqlite_names = ', '.join(names)
-
     create_str = ("CREATE TABLE IF NOT EXISTS " + table_name +
                   " (" + columns + ")")
+    insert_str = "INSERT INTO {} ({}) VALUES({})".format(
+        table_name, ', '.join(names), ','.join('?' for name in names))
 
-    # Create table from create_str.
-    cursor.execute(create_str)
-    insert_str = ("INSERT INTO " + table_name + "(" + sqlite_names +
-                  ") VALUES(")
-    insert_qm = ['?' for name in names]
-    insert_qm_string = ','.join(insert_qm)
-    insert_str += insert_qm_string + ')'
-
-    type_dict = {np.int: int,
-                 np.int8: int,
-                 np.int16: int,
-                 np.int32: int,
-                 np.int64: int,
-                 np.int32: int,
-                 np.uint: int,
-                 np.uint8: int,
-                 np.uint16: int,
-                 np.uint32: int,
-                 np.uint64: int,
-                 np.uint32: int,
-                 np.float: float,
-                 np.float16: float,
-                 np.float32: float,
-                 np.float64: float,
-                 np.string_: str,
-                 np.unicode_: unicode,
-                 np.bool: bool,
-                 np.complex: str,
-                 np.complex64: str}
+    # The transaction is managed explicitly: by default the sqlite3 module
+    # of Python 2 commits before CREATE TABLE and CREATE INDEX, which would
+    # split the writes into several transactions.
+    conn = sqlite3.connect(fq_filename, isolation_level=None)
+    # Fick problem med utf-8 nar jag korde fran csv-filer annars.. Fult?
+    conn.text_factory = str
     try:
-        sqlite_data = [tuple(type_dict[type(sqlite_item)](sqlite_item)
-                       for sqlite_item in sqlite_row)
-                       for sqlite_row in sqlite_data]
-    except Exception:
-        import traceback
-        traceback.print_exc()
-        raise KeyError("Data type not valid.")
-    # Create table from insert_str and data from table.
-    cursor.executemany(insert_str, sqlite_data)
-    conn.commit()
-    conn.close()
+        cursor = conn.cursor()
+        for pragma, value in SQLITE_BULK_PRAGMAS:
+            cursor.execute('PRAGMA {} = {}'.format(pragma, value))
+        cursor.execute('BEGIN')
+        try:
+            cursor.execute(create_str)
+            for rows in sqlite_chunks(table, chunk_size):
+                cursor.executemany(insert_str, rows)
+            index_names = dict(zip(column_names, names))
+            for index in indexes or []:
+                cursor.execute(
+                    'CREATE INDEX IF NOT EXISTS [{}] ON {} ({})'.format(
+                        fix_sql_table_name('{}_{}'.format(table_name, index)),
+                        table_name, index_names[index]))
+            cursor.execute('COMMIT')
+        except Exception:
+            exc_info = sys.exc_info()
+            try:
+                cursor.execute('ROLLBACK')
+            except sqlite3.Error:
+                # SQLite has already rolled back after some errors.
+                pass
+            raise exc_info[0], exc_info[1], exc_info[2]
+    finally:
+        conn.close()
 
 
 def read_table_names_pyodbc(connection_string):
@@ -282,8 +310,9 @@ class SQLite3Database(FileDatabase):
     def table_column_names(self, table_name):
         return read_table_column_names(sqlite3, self.fq_filename, table_name)
 
-    def from_table(self, table_name, table):
-        return write_table_sqlite3(self.fq_filename, table_name, table)
+    def from_table(self, table_name, table, indexes=None):
+        return write_table_sqlite3(self.fq_filename, table_name, table,
+                                   indexes)
 
 
 class MDBDatabase(FileDatabase):
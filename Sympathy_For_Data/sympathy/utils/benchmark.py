@@ -8,11 +8,24 @@ import time
 import subprocess
 import sys
 import fnmatch
-from collections import namedtuple
+import sqlite3
+import json
+import copy
+import imp
+import shutil
+import datetime
+import platform
+import argparse
+import multiprocessing
+from collections import namedtuple, OrderedDict
 
 from sympathy.utils.prim import containing_dirs, import_statements, concat
 from sympathy.api import table
+from sympathy.api import adaf
 from sympathy.platform import os_support
+from sympathy.platform import state
+from sympathy.datasources.chunked.dsgroup import chunk_directory
+from sympathy.datasources.hdf5 import dsgroup as hdf5_dsgroup
 
 
 TableData = namedtuple('TableData', ['name', 'headers', 'rows'])
@@ -62,7 +75,7 @@ class TableBenchTest(object):
         t1 = time.time()
         return (t1 - t0, table1)
 
-    def bench_io(self, source):
+    def bench_io(self, source, scheme='hdf5'):
         """Benchmark reading and writing of source."""
 
         with tempfile.NamedTemporaryFile() as f0:
@@ -70,7 +83,8 @@ class TableBenchTest(object):
 
         t0 = time.time()
 
-        with table.File(filename=filename0, source=source, mode='w') as fo:
+        with table.File(filename=filename0, source=source, mode='w',
+                        scheme=scheme) as fo:
             pass
 
         t1 = time.time()
@@ -88,6 +102,87 @@ class TableBenchTest(object):
 
         return (twrite, t2 - t1)
 
+    def sqlite(self, n, m):
+        """
+        Benchmark writing a table with n rows and m columns, half float and
+        half integer, to sqlite. Return the time for the row by row writer
+        that the SQLite exporter used before and for write_table_sqlite3.
+        """
+        table1 = table.File()
+        for i in range(m):
+            if i % 2:
+                data = np.arange(n)
+            else:
+                data = np.random.random(n)
+            table1.set_column_from_array(str(i), data)
+
+        result = []
+        for func in [_write_sqlite3_rows,
+                     table.table_sql().write_table_sqlite3]:
+            with tempfile.NamedTemporaryFile(suffix='.db') as f0:
+                filename0 = f0.name
+            t0 = time.time()
+            func(filename0, 'bench', table1)
+            result.append(time.time() - t0)
+            try:
+                os.remove(filename0)
+            except OSError:
+                pass
+        return result
+
+    def schemes(self, n, m, items=1000, schemes=('hdf5', 'sqlite')):
+        """
+        Benchmark the datasource schemes with a table with n rows and m
+        columns: writing and reading it, reading the last 1% of the rows of
+        each column and writing and reading a list of items tables with one
+        row. Return list of (scheme, operation, time).
+        """
+        table1 = table.File()
+        for i in range(m):
+            table1.set_column_from_array(str(i), np.random.random(n))
+        item = table.File()
+        for i in range(10):
+            item.set_column_from_array(str(i), np.arange(1))
+
+        result = []
+        for scheme in schemes:
+            tables_cls = type('FileList', (table.FileList,),
+                              {'scheme': scheme})
+            directory = tempfile.mkdtemp()
+            try:
+                filename0 = os.path.join(directory, 'table.sydata')
+                filename1 = os.path.join(directory, 'tables.sydata')
+                t0 = time.time()
+                with table.File(filename=filename0, source=table1, mode='w',
+                                scheme=scheme):
+                    pass
+                t1 = time.time()
+                with table.File(filename=filename0, mode='r') as fi:
+                    for column_name in fi.column_names():
+                        fi.get_column_to_array(column_name)
+                t2 = time.time()
+                with table.File(filename=filename0, mode='r') as fi:
+                    for column_name in fi.column_names():
+                        fi.get_column_to_array(column_name,
+                                               index=slice(-(n // 100), n))
+                t3 = time.time()
+                with tables_cls(filename=filename1, mode='w') as fo:
+                    for i in range(items):
+                        fo.append(item)
+                t4 = time.time()
+                with tables_cls(filename=filename1, mode='r') as fi:
+                    for item1 in fi:
+                        item1.get_column_to_array('0')
+                t5 = time.time()
+            finally:
+                shutil.rmtree(directory)
+            result.extend([(scheme, 'write', t1 - t0),
+                           (scheme, 'read', t2 - t1),
+                           (scheme, 'read rows', t3 - t2),
+                           (scheme, 'write list', t4 - t3),
+                           (scheme, 'read list', t5 - t4)])
+        return result
+
     def bench(self):
         """Run combined benchmark suite."""
         result = []
@@ -101,9 +196,45 @@ class TableBenchTest(object):
                 result.extend([(name, (m, n), 'execute', tj),
                                (name, (m, n), 'write', tjw),
                                (name, (m, n), 'read', tjr)])
+
+        for n, m in [(1000000, 10)]:
+            print('Benchmarking SQLite {}'.format((n, m)))
+            trows, tcolumns = self.sqlite(n, m)
+            result.extend([('SQLite', (m, n), 'write rows', trows),
+                           ('SQLite', (m, n), 'write columns', tcolumns)])
+
+        for n, m in [(1000000, 10)]:
+            print('Benchmarking schemes {}'.format((n, m)))
+            result.extend([(scheme, (m, n), operation, t)
+                           for scheme, operation, t in self.schemes(n, m)])
         return result
 
 
+def _write_sqlite3_rows(fq_filename, table_name, in_table):
+    """
+    Row by row sqlite writer: all rows are converted cell by cell and
+    inserted with a single executemany. Reference for the SQLite benchmark.
+    """
+    type_dict = {int: int, long: int, float: float, bool: bool}
+    names = in_table.column_names()
+    columns = ', '.join(
+        '[{}] {}'.format(name, table.table_sql().sqlite_column_type(
+            in_table.column_type(name)))
+        for name in names)
+    rows = [tuple(type_dict[type(item)](item) for item in row)
+            for row in in_table.to_rows()]
+
+    conn = sqlite3.connect(fq_filename)
+    try:
+        cursor = conn.cursor()
+        cursor.execute('CREATE TABLE {} ({})'.format(table_name, columns))
+        cursor.executemany('INSERT INTO {} VALUES({})'.format(
+            table_name, ','.join('?' for name in names)), rows)
+        conn.commit()
+    finally:
+        conn.close()
+
+
 def parselog(f):
     """
     Function for parsing log output containing perf log lines.
@@ -312,6 +443,84 @@ def bench_imports(name, getpaths):
     return Benchmark([], [], [importdata(name, _importrows(getpaths))])
 
 
+# Statements used to start nodes, workers and standalone scripts.
+ENTRY_POINTS = [
+    'import sympathy.api',
+    'from sympathy.api import adaf',
+    'from sympathy.api import table',
+    'from sympathy.api import node',
+    'from sympathy.api import node_helper',
+    'from sympathy.api import importers, exporters',
+    'import sympathy.utils.run_node_standalone',
+]
+
+
+def bench_entry_points(name, pythonpaths, headless=False):
+    """
+    Return Benchmark structure with the cold start import time of each entry
+    point. Each statement is measured in a new interpreter. With headless,
+    the statements are run in the headless profile (SY_HEADLESS) and those
+    that require Qt are left out of the result.
+    """
+    env = dict(os.environ)
+    if headless:
+        env['SY_HEADLESS'] = '1'
+    else:
+        env.pop('SY_HEADLESS', None)
+
+    result = []
+    for statement in ENTRY_POINTS:
+        duration = _import_time(statement, pythonpaths, env=env)
+        if duration is not None:
+            result.append((duration, statement))
+    return Benchmark([], [], [importdata(name, result)])
+
+
+_import_command = """
+import ast
+import os
+import sys
+import time
+
+stdout = sys.stdout
+devnull = open(os.devnull, 'w')
+
+sys.stdout = devnull
+sys.stderr = devnull
+
+paths = ast.literal_eval("{PATHS}".decode('utf8'))
+sys.path.extend(paths)
+
+start = time.time()
+{IMPORT}
+
+stdout.write(str(time.time() - start))
+"""
+
+
+def _import_time(statement, pythonpaths, env=None):
+    """
+    Import the module in a new interpreter and return the time in seconds,
+    or None if the import failed.
+    """
+    process = os_support.Popen(
+        [sys.executable, '-c',
+         _import_command.format(PATHS=unicode(pythonpaths).encode('utf8'),
+                                IMPORT=statement)],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        env=env)
+
+    process_stdout = process.communicate()[0]
+
+    if process.returncode == 0:
+        try:
+            return float(process_stdout)
+        except ValueError:
+            pass
+    return None
+
+
 def _importrows(getpaths):
 
     pythonpaths = concat([getpaths.python_paths(),
@@ -339,40 +548,562 @@ def _importrows(getpaths):
 
     for i in import_lines:
         # Import the module and measure the time.
-        command = """
-import ast
+        duration = _import_time(i, pythonpaths)
+        if duration is not None:
+            result.append((duration, i))
+
+    return sorted(result, reverse=True)
+
+
+# Benchmark harness.
+#
+# Each case is a function that prepares its own synthetic data and returns the
+# time in seconds of the measured part. run_suite repeats the cases, keeps the
+# best time and records the environment so that results can be stored as json
+# and compared against a baseline from an earlier run with compare.
+
+BenchCase = namedtuple('BenchCase', ['name', 'function', 'kwargs'])
+
+# Default library root for cases that use the standard library.
+LIBRARY = os.path.abspath(os.path.join(
+    os.path.dirname(__file__), os.pardir, os.pardir, os.pardir, 'Library'))
+# Default CDE directory for the pipeline case.
+CDE = os.path.abspath(os.path.join(
+    os.path.dirname(__file__), os.pardir, os.pardir, os.pardir,
+    'CDE_Dask_Standalone'))
+# Files written to the output directory by a successful CDE run, besides
+# the .sydata files: the subset statistics and the evaluation plot.
+CDE_OUTPUTS = ['B_KatDiagnos_statistics.json',
+               'B_KatDiagnos_Dist fit_input.png']
+
+
+def generate_adaf(rasters=1, signals=10, rows=1000, seed=0):
+    """
+    Return new ADAF with one system of rasters with signals each, of rows
+    samples. The signals are float and integer, every eighth is boolean.
+    """
+    random = np.random.RandomState(seed)
+    adaf_obj = adaf.File()
+    adaf_obj.meta.create_column('VIN_Number', np.array([u'YV1BENCH000000000']))
+    adaf_obj.meta.create_column('MDF_date', np.array([u'01:02:2016']))
+    system = adaf_obj.sys.create('system0')
+    for i in range(rasters):
+        raster = system.create('raster{}'.format(i))
+        raster.create_basis(np.arange(rows, dtype=float) * 0.01,
+                            {'unit': 's', 'description': 'time'})
+        for j in range(signals):
+            name = 'signal{}_{}'.format(i, j)
+            if j % 8 == 7:
+                data = random.randint(0, 2, rows).astype(bool)
+            elif j % 2:
+                data = random.randint(-1000, 1000, rows)
+            else:
+                data = random.standard_normal(rows).cumsum()
+            raster.create_signal(name, data,
+                                 {'unit': 'V', 'description': name})
+    return adaf_obj
+
+
+def long_adaf(rows=1000000, signals=10):
+    """Return ADAF with few signals and many rows."""
+    return generate_adaf(rasters=1, signals=signals, rows=rows)
+
+
+def wide_adaf(rasters=10, signals=200, rows=1000):
+    """Return ADAF with many signals and few rows."""
+    return generate_adaf(rasters=rasters, signals=signals, rows=rows)
+
+
+def write_mdf(filename, adaf_obj, encoding='latin1'):
+    """
+    Write the rasters of adaf_obj to a MDF 3.x file, one channel group per
+    raster. Boolean signals are written as integers.
+    """
+    from sylib import mdflib
+
+    def channels(raster):
+        basis = raster.basis_column()
+        result = [(basis.value(), b's', b'time', b'time')]
+        for name, signal in raster.items():
+            data = signal.y
+            if data.dtype.kind == 'b':
+                data = data.astype(np.uint8)
+            result.append((data, signal.unit().encode(encoding),
+                           signal.description().encode(encoding),
+                           name.encode(encoding)))
+        return result
+
+    with mdflib.MdfFile(filename, 'w+b') as mdf:
+        mdf.default_init()
+        (mdf.hdblock.data_group_block,
+         mdf.hdblock.number_of_data_groups) = mdf.write_channel_groups(
+            (raster_name.encode(encoding), channels(raster), 0.0)
+            for system in adaf_obj.sys.values()
+            for raster_name, raster in system.items())
+        mdf.write()
+
+
+def generate_corpus(directory, files=8, rasters=2, signals=20, rows=10000):
+    """
+    Write files MDF 3.x files to directory and return their filenames.
+    Each file has VIN signals and the signal used by the CDE evaluation,
+    none of the bad signals, and all files belong to the same CDE subset.
+    """
+    filenames = []
+    for i in range(files):
+        adaf_obj = generate_adaf(rasters, signals, rows, seed=i)
+        raster = adaf_obj.sys['system0']['raster0']
+        for j, character in enumerate('YV1BENCH{:09d}'.format(i)):
+            raster.create_signal(
+                'UAccAppl_numTestCDVIN[{}]'.format(j),
+                np.repeat(ord(character), rows).astype(np.uint8))
+        raster.create_signal('OxiCat_facHCCnvRat',
+                             np.random.RandomState(i).random_sample(rows))
+        filename = os.path.join(
+            directory, 'bench_{:04d}_{:04d}.dat'.format(i // 100, i))
+        write_mdf(filename, adaf_obj)
+        filenames.append(filename)
+    return filenames
+
+
+def _timeit(function, *args):
+    t0 = time.time()
+    function(*args)
+    return time.time() - t0
+
+
+def _tempfile(suffix=''):
+    with tempfile.NamedTemporaryFile(suffix=suffix) as f:
+        return f.name
+
+
+def _add_common_path(library):
+    """
+    Make sylib from library, the standard library root, importable. Common
+    goes first in sys.path since Sympathy_For_Data has a sylib of its own.
+    """
+    common = os.path.join(library, 'Common')
+    if common in sys.path:
+        sys.path.remove(common)
+    sys.path.insert(0, common)
+
+
+def _set_support_dirs(library):
+    """
+    Set the directories that components, such as calculator plugins, are
+    scanned from, unless already set. Normally done by the worker.
+    """
+    attributes = state.node_state().attributes
+    attributes.setdefault('library_dirs', [])
+    attributes.setdefault('support_dirs', [os.path.join(library, 'Common')])
+
+
+def _library_module(library, *path):
+    """
+    Load node module from the standard library in library. Raises
+    ImportError if it can not be loaded, for example if it requires Qt in
+    the headless profile.
+    """
+    _add_common_path(library)
+    filename = os.path.join(library, 'Library', 'sympathy', *path)
+    if not os.path.isfile(filename):
+        raise ImportError('Library module not found: {}'.format(filename))
+    name = '_benchmark_' + os.path.splitext(path[-1])[0]
+    try:
+        return imp.load_source(name, filename)
+    except ImportError:
+        raise
+    except Exception as e:
+        raise ImportError('Could not load {}: {}'.format(filename, e))
+
+
+def bench_table_join(rows=10000, columns=1000, join='vjoin'):
+    return getattr(TableBenchTest(), join)(rows, columns)[0]
+
+
+def _remove_sydata(filename):
+    os.remove(filename)
+    if os.path.isdir(chunk_directory(filename)):
+        shutil.rmtree(chunk_directory(filename))
+
+
+def bench_adaf_write(shape='long', scheme='hdf5', **kwargs):
+    adaf_obj = long_adaf(**kwargs) if shape == 'long' else wide_adaf(**kwargs)
+    filename = _tempfile('.sydata')
+    try:
+        def write():
+            with adaf.File(filename=filename, mode='w', source=adaf_obj,
+                           scheme=scheme):
+                pass
+        return _timeit(write)
+    finally:
+        _remove_sydata(filename)
+
+
+def bench_adaf_read(shape='long', scheme='hdf5', **kwargs):
+    adaf_obj = long_adaf(**kwargs) if shape == 'long' else wide_adaf(**kwargs)
+    filename = _tempfile('.sydata')
+    with adaf.File(filename=filename, mode='w', source=adaf_obj,
+                   scheme=scheme):
+        pass
+    try:
+        def read():
+            with adaf.File(filename=filename, mode='r') as adaf_file:
+                for system in adaf_file.sys.values():
+                    for raster in system.values():
+                        raster.basis_column().value()
+                        for signal in raster.values():
+                            signal.y
+        return _timeit(read)
+    finally:
+        _remove_sydata(filename)
+
+
+def bench_adaf_passthrough(policy='copy', **kwargs):
+    """
+    Write an ADAF derived from a stored one, where only meta is changed,
+    using the hdf5 passthrough policy.
+    """
+    filename = _tempfile('.sydata')
+    output = _tempfile('.sydata')
+    with adaf.File(filename=filename, mode='w', source=wide_adaf(**kwargs)):
+        pass
+    original = hdf5_dsgroup.PASSTHROUGH
+    hdf5_dsgroup.PASSTHROUGH = policy
+    try:
+        def write():
+            with adaf.File(filename=filename, mode='r') as origin:
+                derived = adaf.File()
+                derived.source(origin)
+                derived.meta.create_column('derived', np.arange(1))
+                with adaf.File(filename=output, mode='w', source=derived):
+                    pass
+        return _timeit(write)
+    finally:
+        hdf5_dsgroup.PASSTHROUGH = original
+        _remove_sydata(filename)
+        _remove_sydata(output)
+
+
+def bench_adaf_vjoin(files=20, signals=50, rows=10000):
+    adaf_objs = [generate_adaf(1, signals, rows, seed=i) for i in range(files)]
+    return _timeit(adaf.File().vjoin, adaf_objs, '', 'VJoin-index',
+                   False, 1, True, False)
+
+
+def bench_adaf_vsplit(files=20, signals=50, rows=10000):
+    joined = adaf.File()
+    joined.vjoin([generate_adaf(1, signals, rows, seed=i)
+                  for i in range(files)],
+                 '', 'VJoin-index', False, 1, True, False)
+    return _timeit(joined.vsplit, adaf.FileList(), 'VJoin-index',
+                   False, True, True)
+
+
+def bench_mdf_import(library=LIBRARY, rasters=4, signals=100, rows=100000):
+    module = _library_module(
+        library, 'data', 'adaf', 'importers', 'plugin_mdf_importer.py')
+    filename = _tempfile('.dat')
+    write_mdf(filename, generate_adaf(rasters, signals, rows))
+    try:
+        importer = module.MdfImporter('latin1', None)
+        return _timeit(importer.run, filename, adaf.File())
+    finally:
+        os.remove(filename)
+
+
+def bench_interpolation(library=LIBRARY, signals=100, rows=100000, dt=0.005):
+    from sympathy.utils.parameter_helper import ParameterRoot
+    module = _library_module(library, 'data', 'adaf', 'node_interpolation.py')
+    parameter_root = ParameterRoot(
+        copy.deepcopy(module.SuperNode.parameters.parameter_dict))
+    parameter_root['dt'].value = dt
+    in_adaf = generate_adaf(2, signals // 2, rows)
+    return _timeit(module.resample_file, parameter_root, in_adaf,
+                   adaf.File(), lambda progress: None)
+
+
+def bench_lookup(library=LIBRARY, rows=100000, keys=1000):
+    from sympathy.utils.parameter_helper import ParameterRoot
+    _add_common_path(library)
+    from sylib import lookup
+    random = np.random.RandomState(0)
+    template = table.File()
+    template.set_column_from_array('key', np.arange(keys))
+    template.set_column_from_array('value', random.random_sample(keys))
+    lookupee = table.File()
+    lookupee.set_column_from_array('key', random.randint(0, keys, rows))
+    parameters = ParameterRoot()
+    parameters.set_boolean('perfect_match', value=True)
+    parameters.set_integer('event_column', value=-1)
+    parameters.set_list('template_columns', plist=['key'])
+    parameters.set_list('lookupee_columns', plist=['key'])
+    return _timeit(lookup.apply_index_datacolumn_and_write_to_file,
+                   parameters, template, lookupee, table.File())
+
+
+def bench_calculator(library=LIBRARY, rows=1000000, calculations=20):
+    _add_common_path(library)
+    _set_support_dirs(library)
+    from sylib.calculator import calculator_model
+    random = np.random.RandomState(0)
+    in_table = table.File()
+    in_table.set_column_from_array('a', random.random_sample(rows))
+    in_table.set_column_from_array('b', random.random_sample(rows))
+
+    def calculate():
+        for i in range(calculations):
+            calculator_model.python_calculator(
+                in_table, '${{out{0}}} = ${{a}} * {0} + np.sin(${{b}})'.format(
+                    i), {})
+    return _timeit(calculate)
+
+
+_cde_run_command = """
 import os
 import sys
 import time
 
 stdout = sys.stdout
-devnull = open(os.devnull, 'w')
+sys.stdout = open(os.devnull, 'w')
 
-sys.stdout = devnull
-sys.stderr = devnull
-
-paths = ast.literal_eval("{PATHS}".decode('utf8'))
-sys.path.extend(paths)
+import cde_dask
 
 start = time.time()
-{IMPORT}
+cde_dask.run(sys.argv[1], sys.argv[2])
 
 stdout.write(str(time.time() - start))
 """
 
+
+def bench_cde_pipeline(cde=CDE, files=8, rasters=2, signals=20, rows=10000):
+    """
+    Run cde_dask.run on a generated corpus and return the time in seconds.
+
+    The pipeline is run in a new interpreter with cde as working directory
+    since it imports its own copies of sympathy and sylib from there and
+    reads its configuration files relative to it. Raises RuntimeError if
+    the pipeline fails or if any of its output files are missing.
+    """
+    if not os.path.isdir(cde):
+        raise ImportError('CDE directory not found: {}'.format(cde))
+    input_dir = tempfile.mkdtemp()
+    output_dir = tempfile.mkdtemp()
+    try:
+        generate_corpus(input_dir, files, rasters, signals, rows)
         process = os_support.Popen(
-            [sys.executable, '-c',
-             command.format(PATHS=unicode(pythonpaths).encode('utf8'),
-                            IMPORT=i)],
+            [sys.executable, '-c', _cde_run_command, input_dir, output_dir],
             stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT)
+            stderr=subprocess.PIPE,
+            cwd=cde)
+        process_stdout, process_stderr = process.communicate()
+        if process.returncode != 0:
+            raise RuntimeError('CDE pipeline failed:\n{}'.format(
+                '\n'.join(process_stderr.splitlines()[-10:])))
+
+        written = [name for name in os.listdir(output_dir)
+                   if name.endswith('.sydata')]
+        missing = [name for name in CDE_OUTPUTS
+                   if not os.path.isfile(os.path.join(output_dir, name))]
+        if len(written) != files or missing:
+            raise RuntimeError(
+                'CDE pipeline wrote {} of {} files, missing: {}'.format(
+                    len(written), files, ', '.join(missing) or '-'))
+        return float(process_stdout)
+    finally:
+        shutil.rmtree(input_dir)
+        shutil.rmtree(output_dir)
 
-        process_stdout = process.communicate()[0]
 
-        if process.returncode == 0:
-            try:
-                result.append((float(process_stdout), i))
-            except ValueError:
-                pass
+def default_cases(library=LIBRARY, cde=CDE, scale=1.0):
+    """
+    Return list of BenchCase. The number of rows in each case is multiplied
+    by scale.
+    """
+    def rows(n):
+        return max(1, int(n * scale))
+
+    cases = [
+        BenchCase('table.vjoin', bench_table_join,
+                  {'rows': rows(10000), 'columns': 1000, 'join': 'vjoin'}),
+        BenchCase('table.hjoin', bench_table_join,
+                  {'rows': rows(10000), 'columns': 1000, 'join': 'hjoin'})]
+    for shape, kwargs in [('long', {'rows': rows(1000000), 'signals': 10}),
+                          ('wide', {'rows': rows(1000), 'rasters': 10,
+                                    'signals': 200})]:
+        kwargs['shape'] = shape
+        cases.extend([
+            BenchCase('adaf.write.{}'.format(shape), bench_adaf_write,
+                      kwargs),
+            BenchCase('adaf.read.{}'.format(shape), bench_adaf_read,
+                      kwargs)])
+    for scheme in ['chunked']:
+        kwargs = {'rows': rows(1000), 'rasters': 10, 'signals': 200,
+                  'shape': 'wide', 'scheme': scheme}
+        cases.extend([
+            BenchCase('adaf.write.wide.{}'.format(scheme), bench_adaf_write,
+                      kwargs),
+            BenchCase('adaf.read.wide.{}'.format(scheme), bench_adaf_read,
+                      kwargs)])
+    for policy in ['copy', 'none']:
+        cases.append(
+            BenchCase('adaf.passthrough.{}'.format(policy),
+                      bench_adaf_passthrough,
+                      {'rows': rows(10000), 'rasters': 10, 'signals': 200,
+                       'policy': policy}))
+    cases.extend([
+        BenchCase('adaf.vjoin', bench_adaf_vjoin,
+                  {'files': 20, 'signals': 50, 'rows': rows(10000)}),
+        BenchCase('adaf.vsplit', bench_adaf_vsplit,
+                  {'files': 20, 'signals': 50, 'rows': rows(10000)}),
+        BenchCase('mdf.import', bench_mdf_import,
+                  {'library': library, 'rasters': 4, 'signals': 100,
+                   'rows': rows(100000)}),
+        BenchCase('adaf.interpolation', bench_interpolation,
+                  {'library': library, 'signals': 100,
+                   'rows': rows(100000)}),
+        BenchCase('table.lookup', bench_lookup,
+                  {'library': library, 'rows': rows(100000), 'keys': 1000}),
+        BenchCase('table.calculator', bench_calculator,
+                  {'library': library, 'rows': rows(1000000)}),
+        BenchCase('cde.pipeline', bench_cde_pipeline,
+                  {'cde': cde, 'files': 8, 'rows': rows(10000)})])
+    return cases
+
+
+def _version(module_name):
+    try:
+        return __import__(module_name).__version__
+    except Exception:
+        return None
 
-    return sorted(result, reverse=True)
+
+def fingerprint():
+    """Return dict describing the machine, interpreter and code base."""
+    try:
+        process = os_support.Popen(
+            ['git', 'rev-parse', 'HEAD'], cwd=os.path.dirname(__file__),
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        revision = process.communicate()[0].strip() or None
+    except OSError:
+        revision = None
+    return OrderedDict([
+        ('time', datetime.datetime.now().isoformat()),
+        ('host', platform.node()),
+        ('platform', platform.platform()),
+        ('machine', platform.machine()),
+        ('processor', platform.processor()),
+        ('cpu_count', multiprocessing.cpu_count()),
+        ('python', sys.version),
+        ('packages', OrderedDict(
+            (name, _version(name))
+            for name in ['numpy', 'scipy', 'pandas', 'h5py'])),
+        ('revision', revision)])
+
+
+def run_case(case, repeat=3):
+    """
+    Run case repeat times and return dict with its result. Cases that
+    can not be loaded are skipped and exceptions are recorded as errors.
+    """
+    result = OrderedDict([('name', case.name), ('kwargs', case.kwargs)])
+    times = []
+    try:
+        for _ in range(repeat):
+            times.append(case.function(**case.kwargs))
+    except ImportError as e:
+        result['status'] = 'skipped'
+        result['message'] = unicode(e)
+    except Exception as e:
+        result['status'] = 'error'
+        result['message'] = u'{}: {}'.format(type(e).__name__, e)
+    else:
+        result['status'] = 'ok'
+    result['times'] = times
+    result['best'] = min(times) if times else None
+    return result
+
+
+def run_suite(cases=None, repeat=3, pattern='*', output=None):
+    """
+    Run the cases whose names match pattern and return dict with the
+    environment fingerprint and the results. The results are also written
+    as json to output, if given.
+    """
+    if cases is None:
+        cases = default_cases()
+    results = []
+    for case in cases:
+        if fnmatch.fnmatch(case.name, pattern):
+            print('Benchmarking {}'.format(case.name))
+            results.append(run_case(case, repeat))
+    suite = OrderedDict([('environment', fingerprint()),
+                         ('results', results)])
+    if output:
+        with open(output, 'w') as f:
+            json.dump(suite, f, indent=2)
+    return suite
+
+
+def compare(suite, baseline, threshold=0.1):
+    """
+    Compare the best times in suite with those in baseline. Return list of
+    (name, baseline seconds, seconds, ratio) for each case that is more than
+    threshold, as a fraction, slower than in the baseline.
+    """
+    baseline_times = {result['name']: result['best']
+                      for result in baseline['results']
+                      if result['status'] == 'ok'}
+    regressions = []
+    for result in suite['results']:
+        before = baseline_times.get(result['name'])
+        if result['status'] != 'ok' or not before:
+            continue
+        ratio = result['best'] / before
+        if ratio > 1 + threshold:
+            regressions.append((result['name'], before, result['best'], ratio))
+    return regressions
+
+
+def main(argv=None):
+    """
+    Run the benchmark harness and return 1 if there are regressions against
+    the baseline, otherwise 0.
+    """
+    parser = argparse.ArgumentParser(description='Run benchmarks.')
+    parser.add_argument('--output', help='Write results as json to OUTPUT')
+    parser.add_argument('--baseline', help='Compare results with BASELINE')
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='Allowed slowdown against the baseline')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--filter', default='*',
+                        help='Glob pattern for the cases to run')
+    parser.add_argument('--scale', type=float, default=1.0,
+                        help='Factor for the number of rows in each case')
+    parser.add_argument('--library', default=LIBRARY,
+                        help='Standard library root, with Library and Common')
+    parser.add_argument('--cde', default=CDE, help='CDE directory')
+    args = parser.parse_args(argv)
+
+    suite = run_suite(default_cases(args.library, args.cde, args.scale),
+                      args.repeat, args.filter, args.output)
+    for result in suite['results']:
+        if result['status'] == 'ok':
+            print('{:30}{:.4f}'.format(result['name'], result['best']))
+        else:
+            print('{:30}{} {}'.format(
+                result['name'], result['status'], result['message']))
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(suite, baseline, args.threshold)
+        for name, before, after, ratio in regressions:
+            print('Regression {}: {:.4f} -> {:.4f} ({:.0%} slower)'.format(
+                name, before, after, ratio - 1))
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
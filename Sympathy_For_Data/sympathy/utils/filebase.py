@@ -159,7 +159,7 @@ class FileManager(PPrintUnicode):
 
             self.__gen = open_file(
                 filename=filename, mode=mode, external=not import_links,
-                sytype=self.container_type, scheme='hdf5')
+                sytype=self.container_type, scheme=scheme)
             self._data = self.__gen.next()._data
         else:
             self.__gen = self.__shared_generator(
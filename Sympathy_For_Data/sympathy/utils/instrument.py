@@ -0,0 +1,374 @@
+# Copyright (c) 2016, System Engineering Software Society
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither the name of the System Engineering Software Society nor the
+#       names of its contributors may be used to endorse or promote products
+#       derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.
+# IN NO EVENT SHALL SYSTEM ENGINEERING SOFTWARE SOCIETY BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+Timing and profiling instrumentation.
+
+Code is divided into nested spans, each span records its wall time, the
+thread it ran in and counters, such as bytes read or rows written, that were
+added while it was the innermost open span::
+
+    from sympathy.utils import instrument
+
+    with instrument.span('import', filename=filename):
+        ...
+        instrument.count('bytes read', size)
+
+Spans can also sample the call stack of their thread at a fixed interval,
+which shows where the time goes without the overhead of a deterministic
+profiler. Samples are stored as collapsed stacks, the input format of
+flame graph tools.
+
+Recording is disabled by default and span and count then do next to
+nothing. It is enabled with enable() or by setting the environment variable
+SY_INSTRUMENT to a directory, where nodes write their results after each
+execution. SY_INSTRUMENT_PROFILE sets the sampling interval in milliseconds
+for the node spans.
+
+With memory recording enabled, by enable(memory=True) or by setting
+SY_INSTRUMENT_MEMORY, each span also records how RSS and peak RSS changed
+while it was open, and the json output includes a memory report, see the
+memory module. Counting the bytes held by NumPy arrays walks all objects
+known to the garbage collector, so it is slow and also needs to be enabled,
+by enable(arrays=True) or by setting SY_INSTRUMENT_ARRAYS.
+
+The recorded spans are exported as a json tree with to_json, or in the
+Chrome trace event format with to_chrome_trace, which can be loaded in
+chrome://tracing or other trace viewers.
+"""
+import os
+import sys
+import json
+import time
+import itertools
+import threading
+import functools
+import contextlib
+import collections
+
+from . import memory
+
+
+class Sampler(threading.Thread):
+    """
+    Sampling profiler for one thread. Counts the collapsed call stacks of
+    the thread every interval seconds until stopped.
+    """
+
+    def __init__(self, thread_id, interval=0.005):
+        super(Sampler, self).__init__(name='instrument sampler')
+        self.daemon = True
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = collections.Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append('{} ({}:{})'.format(
+                    code.co_name, os.path.basename(code.co_filename),
+                    code.co_firstlineno))
+                frame = frame.f_back
+            if stack:
+                self.samples[';'.join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+        return dict(self.samples)
+
+
+class Span(object):
+    """A timed, named section of code with counters and child spans."""
+
+    def __init__(self, name, category, args, parent):
+        self.name = name
+        self.category = category
+        self.args = args
+        self.parent = parent
+        self.children = []
+        self.counters = collections.Counter()
+        self.samples = None
+        self.memory = None
+        self.thread_id = threading.current_thread().ident
+        self.thread_name = threading.current_thread().name
+        self.start = time.time()
+        self.end = None
+
+    @property
+    def duration(self):
+        return (self.end or time.time()) - self.start
+
+    def to_dict(self):
+        result = collections.OrderedDict([
+            ('name', self.name),
+            ('category', self.category),
+            ('start', self.start),
+            ('duration', self.duration),
+            ('thread', self.thread_name)])
+        if self.args:
+            result['args'] = self.args
+        if self.counters:
+            result['counters'] = dict(self.counters)
+        if self.memory:
+            result['memory'] = self.memory
+        if self.samples:
+            result['samples'] = self.samples
+        if self.children:
+            result['children'] = [child.to_dict() for child in self.children]
+        return result
+
+
+class Recorder(object):
+    """
+    Records spans and counters, for all threads. Spans started in a
+    thread without an open span become new roots.
+    """
+
+    def __init__(self, enabled=False, memory=False, arrays=False):
+        self.enabled = enabled
+        self.memory = memory
+        self.arrays = arrays
+        self.roots = []
+        self.counters = collections.Counter()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _stack(self):
+        try:
+            return self._local.stack
+        except AttributeError:
+            self._local.stack = []
+            return self._local.stack
+
+    def current(self):
+        """Return the innermost open span of this thread or None."""
+        stack = self._stack()
+        return stack[-1] if stack else None
+
+    @contextlib.contextmanager
+    def span(self, name, category='', profile=None, **args):
+        """
+        Context manager recording the enclosed code as a span. With profile
+        set to an interval in seconds the thread is sampled while the span
+        is open. With memory recording enabled the span records the memory
+        deltas.
+        """
+        if not self.enabled:
+            yield None
+            return
+        stack = self._stack()
+        parent = stack[-1] if stack else None
+        span_ = Span(name, category, args, parent)
+        with self._lock:
+            (parent.children if parent else self.roots).append(span_)
+        stack.append(span_)
+        sampler = None
+        before = memory.snapshot(self.arrays) if self.memory else None
+        if profile:
+            sampler = Sampler(span_.thread_id, profile)
+            sampler.start()
+        try:
+            yield span_
+        finally:
+            if sampler is not None:
+                span_.samples = sampler.stop()
+            if before is not None:
+                span_.memory = memory.delta(
+                    before, memory.snapshot(self.arrays))
+            span_.end = time.time()
+            stack.pop()
+
+    def count(self, name, value=1):
+        """Add value to counter name of the innermost span and the total."""
+        if not self.enabled:
+            return
+        span_ = self.current()
+        with self._lock:
+            if span_ is not None:
+                span_.counters[name] += value
+            self.counters[name] += value
+
+    def timed(self, name=None, category=''):
+        """Decorator recording each call of the function as a span."""
+        def decorator(function):
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                with self.span(name or function.__name__, category):
+                    return function(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def reset(self):
+        with self._lock:
+            self.roots = []
+            self.counters = collections.Counter()
+
+    def summary(self):
+        """Return OrderedDict of total seconds per span name."""
+        result = collections.OrderedDict()
+
+        def add(span_):
+            result[span_.name] = result.get(span_.name, 0) + span_.duration
+            for child in span_.children:
+                add(child)
+        for root in self.roots:
+            add(root)
+        return result
+
+    def memory_summary(self):
+        """
+        Return OrderedDict of span name to the sums of its memory deltas.
+        """
+        result = collections.OrderedDict()
+
+        def add(span_):
+            if span_.memory:
+                totals = result.setdefault(span_.name, collections.Counter())
+                totals.update(span_.memory)
+            for child in span_.children:
+                add(child)
+        for root in self.roots:
+            add(root)
+        return result
+
+    def to_json(self):
+        """Return the recorded spans and counters as a json compatible dict."""
+        with self._lock:
+            roots = list(self.roots)
+            counters = dict(self.counters)
+        result = collections.OrderedDict([
+            ('pid', os.getpid()),
+            ('counters', counters),
+            ('spans', [root.to_dict() for root in roots])])
+        if self.memory:
+            result['memory'] = memory.report(arrays=False)
+        return result
+
+    def to_chrome_trace(self):
+        """
+        Return the recorded spans as a dict in the Chrome trace event
+        format. Spans become complete events, with their counters in args.
+        """
+        pid = os.getpid()
+        events = []
+        threads = {}
+
+        def add(span_):
+            args = dict(span_.args)
+            args.update(span_.counters)
+            args.update(span_.memory or {})
+            threads[span_.thread_id] = span_.thread_name
+            events.append({
+                'name': span_.name, 'cat': span_.category or 'span',
+                'ph': 'X', 'pid': pid, 'tid': span_.thread_id,
+                'ts': span_.start * 1e6, 'dur': span_.duration * 1e6,
+                'args': args})
+            for child in span_.children:
+                add(child)
+
+        with self._lock:
+            roots = list(self.roots)
+        for root in roots:
+            add(root)
+        for thread_id, thread_name in threads.items():
+            events.append({'name': 'thread_name', 'ph': 'M', 'pid': pid,
+                           'tid': thread_id, 'args': {'name': thread_name}})
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def write(self, filename):
+        """
+        Write the recorded spans as json to filename and as a Chrome trace
+        to filename with .trace.json instead of .json.
+        """
+        base = filename[:-5] if filename.endswith('.json') else filename
+        with open(base + '.json', 'w') as f:
+            json.dump(self.to_json(), f, default=repr)
+        with open(base + '.trace.json', 'w') as f:
+            json.dump(self.to_chrome_trace(), f, default=repr)
+
+
+# Default recorder, used by the module level functions.
+recorder = Recorder(enabled=bool(os.environ.get('SY_INSTRUMENT')),
+                    memory=bool(os.environ.get('SY_INSTRUMENT_MEMORY')),
+                    arrays=bool(os.environ.get('SY_INSTRUMENT_ARRAYS')))
+_flush_counter = itertools.count()
+
+
+def enable(enabled=True, memory=None, arrays=None):
+    """
+    Enable or disable recording. Memory recording and the counting of NumPy
+    bytes are only changed if memory and arrays, respectively, are not None.
+    """
+    recorder.enabled = enabled
+    if memory is not None:
+        recorder.memory = memory
+    if arrays is not None:
+        recorder.arrays = arrays
+
+
+def span(name, category='', profile=None, **args):
+    return recorder.span(name, category, profile, **args)
+
+
+def count(name, value=1):
+    recorder.count(name, value)
+
+
+def timed(name=None, category=''):
+    return recorder.timed(name, category)
+
+
+def profile_interval():
+    """
+    Return the sampling interval in seconds from SY_INSTRUMENT_PROFILE or
+    None if sampling is not requested.
+    """
+    try:
+        return float(os.environ['SY_INSTRUMENT_PROFILE']) / 1000.0 or None
+    except (KeyError, ValueError):
+        return None
+
+
+def flush(prefix):
+    """
+    Write what has been recorded to the SY_INSTRUMENT directory, with
+    filenames starting with prefix, and reset the recorder.
+    """
+    directory = os.environ.get('SY_INSTRUMENT')
+    if not (recorder.enabled and directory and recorder.roots):
+        return
+    try:
+        os.makedirs(directory)
+    except OSError:
+        # Already exists, possibly created by another worker.
+        pass
+    recorder.write(os.path.join(directory, '{}-{}-{}.json'.format(
+        prefix, os.getpid(), next(_flush_counter))))
+    recorder.reset()
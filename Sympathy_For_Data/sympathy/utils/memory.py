@@ -0,0 +1,308 @@
+# Copyright (c) 2016, System Engineering Software Society
+# All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#     * Redistributions of source code must retain the above copyright
+#       notice, this list of conditions and the following disclaimer.
+#     * Redistributions in binary form must reproduce the above copyright
+#       notice, this list of conditions and the following disclaimer in the
+#       documentation and/or other materials provided with the distribution.
+#     * Neither the name of the System Engineering Software Society nor the
+#       names of its contributors may be used to endorse or promote products
+#       derived from this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE
+# ARE DISCLAIMED.
+# IN NO EVENT SHALL SYSTEM ENGINEERING SOFTWARE SOCIETY BE LIABLE FOR ANY
+# DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES
+# (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND
+# ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+Memory accounting.
+
+snapshot() measures the resident set size (RSS) of the process, the peak
+RSS so far and the bytes held by live NumPy arrays. The NumPy total is the
+size of all reachable arrays that own their data, found by walking the
+objects known to the garbage collector, so it is much slower than reading
+RSS and is meant for accounting per stage or node, not per row.
+
+With memory recording enabled in instrument, every span records the
+difference between the snapshots taken when it is opened and closed, the
+NumPy total only if that is enabled too::
+
+    from sympathy.utils import instrument
+
+    instrument.enable(memory=True, arrays=True)
+    with instrument.span('interpolate'):
+        ...
+
+report() describes the current state: RSS, NumPy bytes, the in-memory and
+stored sizes of the sycache and the sizes of the files held open by
+hdf5_state.
+
+A soft budget, set with set_budget or the environment variable
+SY_MEMORY_BUDGET in MiB, is checked with check_budget, at most once every
+CHECK_INTERVAL seconds. When RSS goes above the budget the sycache is
+spilled to its HDF5 file, HDF5 files that are not in use are closed and
+further handlers, added with SoftBudget.add_handler, are run.
+SoftBudget.batch_size halves batch sizes each time the budget is exceeded
+and doubles them again, up to their full size, while RSS is below it.
+"""
+import os
+import sys
+import gc
+import time
+import collections
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows.
+    resource = None
+
+# Minimum time in seconds between two measurements of RSS by SoftBudget.
+CHECK_INTERVAL = 0.5
+
+
+Snapshot = collections.namedtuple(
+    'Snapshot', ['time', 'rss', 'peak_rss', 'numpy_bytes'])
+
+
+def _psutil_memory_info():
+    try:
+        import psutil
+    except ImportError:
+        return None
+    process = psutil.Process(os.getpid())
+    try:
+        return process.memory_info()
+    except AttributeError:
+        # Older versions of psutil.
+        return process.get_memory_info()
+
+
+def rss():
+    """Return the resident set size of the process in bytes or None."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (IOError, OSError, ValueError, IndexError, AttributeError):
+        pass
+    info = _psutil_memory_info()
+    return info.rss if info is not None else None
+
+
+def peak_rss():
+    """Return the peak resident set size of the process in bytes or None."""
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Bytes on Darwin and KiB on other systems.
+        return peak if sys.platform == 'darwin' else peak * 1024
+    info = _psutil_memory_info()
+    # Only available on Windows.
+    return getattr(info, 'peak_wset', None)
+
+
+def numpy_bytes():
+    """
+    Return the number of bytes owned by reachable NumPy arrays. Views count
+    towards the array that owns the data.
+    """
+    seen = set()
+    total = 0
+
+    def add(array):
+        while isinstance(array.base, np.ndarray):
+            array = array.base
+        if array.base is None and id(array) not in seen:
+            seen.add(id(array))
+            return array.nbytes
+        return 0
+
+    # Arrays are not tracked by the garbage collector themselves, they are
+    # found through the tracked objects that refer to them.
+    for obj in gc.get_objects():
+        for ref in gc.get_referents(obj):
+            if isinstance(ref, np.ndarray):
+                total += add(ref)
+    return total
+
+
+def snapshot(arrays=True):
+    """
+    Return Snapshot of the current memory use, with numpy_bytes None unless
+    arrays is True.
+    """
+    return Snapshot(time.time(), rss(), peak_rss(),
+                    numpy_bytes() if arrays else None)
+
+
+def delta(before, after):
+    """
+    Return OrderedDict of the differences from Snapshot before to after,
+    fields that are unknown in either are left out.
+    """
+    result = collections.OrderedDict()
+    for field in Snapshot._fields[1:]:
+        start = getattr(before, field)
+        end = getattr(after, field)
+        if start is not None and end is not None:
+            result[field] = end - start
+    return result
+
+
+def cache_stats():
+    """Return the stats of the sycache of the current state, {} if none."""
+    from .. platform.state import cache_state
+    cache = cache_state().get()
+    if cache is None:
+        return {}
+    return cache.stats()
+
+
+def hdf5_stats():
+    """Return dict of filename to size for the files open in hdf5_state."""
+    from .. platform.state import hdf5_state
+    return hdf5_state().stats()
+
+
+def spill_caches(budget=None):
+    """
+    Move the data held in memory by the sycache to its backend, collect
+    garbage and close the HDF5 files in hdf5_state that are not in use.
+    """
+    from .. platform.state import cache_state, hdf5_state
+    cache = cache_state().get()
+    if cache is not None:
+        cache.spill()
+    gc.collect()
+    hdf5_state().evict()
+
+
+class SoftBudget(object):
+    """
+    Soft limit on RSS. Exceeding it is not an error, it runs the handlers
+    that can release memory, by default spill_caches, and halves the scale
+    used by batch_size. RSS is measured at most once every interval seconds
+    and the handlers run once each time RSS goes above the limit, not again
+    while it stays there.
+    """
+
+    def __init__(self, limit, handlers=None, interval=CHECK_INTERVAL,
+                 clock=time.time):
+        self.limit = limit
+        self.handlers = [spill_caches] if handlers is None else list(handlers)
+        self.interval = interval
+        self.exceeded = 0
+        self.scale = 1.0
+        self.above = False
+        self._clock = clock
+        self._check_time = None
+
+    def add_handler(self, handler):
+        """Add handler, called with the budget when it is exceeded."""
+        self.handlers.append(handler)
+
+    def check(self):
+        """
+        Measure RSS, unless it was measured less than interval seconds ago.
+        When RSS has gone above the limit the scale is halved and the
+        handlers are run. While it is below the limit the scale is doubled,
+        up to 1.
+        :return: True if RSS was above the limit when last measured.
+        """
+        now = self._clock()
+        if (self._check_time is not None and
+                now - self._check_time < self.interval):
+            return self.above
+        self._check_time = now
+        current = rss()
+        if current is None or current <= self.limit:
+            self.above = False
+            self.scale = min(1.0, self.scale * 2.0)
+            return False
+        if not self.above:
+            self.above = True
+            self.exceeded += 1
+            self.scale /= 2.0
+            for handler in self.handlers:
+                handler(self)
+        return True
+
+    def batch_size(self, size, minimum=1):
+        """
+        Check the budget and return size multiplied by the current scale,
+        but not less than minimum.
+        """
+        self.check()
+        return max(minimum, int(size * self.scale))
+
+    def to_dict(self):
+        return collections.OrderedDict([
+            ('limit', self.limit),
+            ('exceeded', self.exceeded),
+            ('above', self.above),
+            ('scale', self.scale)])
+
+
+def _budget_from_environ():
+    try:
+        return SoftBudget(
+            float(os.environ['SY_MEMORY_BUDGET']) * 1024 * 1024)
+    except (KeyError, ValueError):
+        return None
+
+
+_budget = _budget_from_environ()
+
+
+def budget():
+    """Return the current SoftBudget or None."""
+    return _budget
+
+
+def set_budget(limit, handlers=None):
+    """
+    Set a soft budget of limit bytes, None removes the budget.
+    :return: the new SoftBudget or None.
+    """
+    global _budget
+    _budget = None if limit is None else SoftBudget(limit, handlers)
+    return _budget
+
+
+def check_budget():
+    """
+    Check the current budget, if any.
+    :return: True if the budget was exceeded.
+    """
+    return _budget is not None and _budget.check()
+
+
+def batch_size(size, minimum=1):
+    """Return size scaled by the current budget, size if there is none."""
+    if _budget is None:
+        return size
+    return _budget.batch_size(size, minimum)
+
+
+def report(arrays=True):
+    """Return a json compatible OrderedDict describing the memory use."""
+    current = snapshot(arrays)
+    hdf5_files = hdf5_stats()
+    return collections.OrderedDict([
+        ('rss', current.rss),
+        ('peak_rss', current.peak_rss),
+        ('numpy_bytes', current.numpy_bytes),
+        ('cache', cache_stats()),
+        ('hdf5_files', hdf5_files),
+        ('hdf5_bytes', sum(hdf5_files.values())),
+        ('budget', _budget.to_dict() if _budget is not None else None)])
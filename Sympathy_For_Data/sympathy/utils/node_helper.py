@@ -27,27 +27,78 @@
 from .. platform import gennode
 from . parameter_helper_visitors import WidgetBuildingVisitor
 from . port import Port, Ports
+from . import memory
 from .. typeutils import table, adaf
 from sympathy.api.exceptions import NoDataError
 
 from .. api import qt as qt_compat
 QtGui = qt_compat.import_module('QtGui')
 import collections
+from multiprocessing.pool import ThreadPool
 import numpy as np
 
 CHILD_GROUP = 'Child'
 ADAF_GROUP = 'ADAF Selection'
 
 
+def ordered_map(function, arguments, workers=None, window=None):
+    """
+    Apply function to each argument tuple in arguments and yield the results
+    in input order.
+
+    When workers is larger than one the calls are made concurrently in a pool
+    of worker threads. Arguments are consumed lazily in the calling thread and
+    at most window (default: two per worker) calls are in flight at once.
+    Results are streamed back as soon as the next one in order is available.
+    The window shrinks while the memory budget, if any, is exceeded.
+
+    Only producing the argument tuples happens in the calling thread.
+    Whatever function reads, for example the columns of tables, which are
+    loaded lazily, is read in the worker threads.
+
+    An exception raised by function is re-raised in the calling thread when
+    the corresponding result is reached, after which no further results are
+    produced.
+    """
+    if not workers or workers <= 1:
+        for args in arguments:
+            yield function(*args)
+        return
+
+    window = max(window or 2 * workers, 1)
+    pool = ThreadPool(workers)
+    pending = collections.deque()
+    try:
+        for args in arguments:
+            pending.append(pool.apply_async(function, args))
+            while len(pending) >= memory.batch_size(window):
+                yield pending.popleft().get()
+        while pending:
+            yield pending.popleft().get()
+    finally:
+        pool.terminate()
+        pool.join()
+
+
 class TableOperation(object):
     """Base class for operations that can be wrapped into both ADAF and
     Table operations. To add parameters:
     class MyOperation(TableOperation)
         parameter_group = TableOperation.parameter_group
         parameter_group.set_boolean(...)
+
+    Operations that are independent between list items and safe to run from
+    several threads can set parallel_workers to process the items of the
+    Tables and ADAFs variants concurrently. The input data of each item is
+    then read in the worker threads too.
+
+    Operations that can work on ADAF rasters directly can implement
+    execute_raster to avoid converting each raster to and from a table in the
+    ADAFs variant.
     """
     update_using = None  # Set to False if a new table should be created.
     has_custom_widget = False
+    parallel_workers = None  # Number of worker threads for list items.
     inputs = ['Input']
     outputs = ['Output']
 
@@ -67,6 +118,20 @@ class TableOperation(object):
     def execute_table(self, in_table, out_table, parameters):
         raise NotImplementedError('Must supply execute_table!')
 
+    def execute_raster(self, in_raster, out_raster, parameters):
+        """
+        Optional version of execute_table operating on dictionaries of
+        adaf.RasterN instead of tables. Only used by the ADAFs variant when
+        writing back to the input raster.
+        """
+        raise NotImplementedError('Must supply execute_raster!')
+
+    def _has_execute_raster(self):
+        def func(method):
+            return getattr(method, '__func__', method)
+        return (func(type(self).execute_raster) is not
+                func(TableOperation.execute_raster))
+
     def custom_widget(self, in_table, parameters):
         """
         Must return a QWidget that takes __init__(in_table, parameters).
@@ -145,33 +210,40 @@ class TablesCalculation(gennode.Node):
 
     def execute(self, node_context):
         number_of_tables = len(node_context.input[0])
-        in_table = {}
 
         try:
             factor = 100.0 / number_of_tables
         except ArithmeticError:
             factor = 1
 
-        for idx in range(number_of_tables):
-            for port_idx, port in enumerate(self._input_ports):
-                if len(node_context.input[port_idx]):
-                    in_table[port] = node_context.input[port_idx][idx]
-                else:
-                    in_table[port] = table.File()
+        def items():
+            for idx in range(number_of_tables):
+                in_table = {}
+                for port_idx, port in enumerate(self._input_ports):
+                    if len(node_context.input[port_idx]):
+                        in_table[port] = node_context.input[port_idx][idx]
+                    else:
+                        in_table[port] = table.File()
 
-            if self.update_using is not None:
-                out_table = table.File(source=in_table[self.update_using])
-            else:
-                out_table = table.File()
+                if self.update_using is not None:
+                    out_table = table.File(source=in_table[self.update_using])
+                else:
+                    out_table = table.File()
 
-            out_table = {port: out_table for port in self._output_ports}
+                out_table = {port: out_table for port in self._output_ports}
+                yield in_table, out_table, node_context.parameters
 
-            self.execute_table(
-                in_table, out_table, node_context.parameters)
+        results = ordered_map(
+            self._execute_item, items(), self.parallel_workers)
+        for idx, out_table in enumerate(results):
             for port_idx, port in enumerate(self._output_ports):
                 node_context.output[port_idx].append(out_table[port])
             self.set_progress(factor * idx)
 
+    def _execute_item(self, in_table, out_table, parameters):
+        self.execute_table(in_table, out_table, parameters)
+        return out_table
+
 
 class ADAFSelection(QtGui.QWidget):
     def __init__(self, node_context, table_class, parent=None):
@@ -299,6 +371,7 @@ class ADAFsCalculation(gennode.Node):
         parameter_group = parameters[CHILD_GROUP]
         system = parameters[ADAF_GROUP]['system'].selected
         raster = parameters[ADAF_GROUP]['raster'].selected
+        output = None
         if self.output_location == 'Time series':
             output = parameters[ADAF_GROUP]['output'].value
         number_of_tables = len(node_context.input[0])
@@ -306,63 +379,98 @@ class ADAFsCalculation(gennode.Node):
             factor = 100.0 / number_of_tables
         except ArithmeticError:
             factor = 1
-        in_table = {}
 
-        for idx in range(number_of_tables):
-            for port in self._input_ports:
-                if (len(node_context.input[port]) and
-                        raster is not None and system is not None):
-                    in_table[port] = (
-                        node_context.input[port][idx]
-                        .sys[system][raster].to_table(raster))
-                else:
-                    in_table[port] = table.File()
+        has_raster = raster is not None and system is not None
+        # Operate directly on the rasters, without going through tables,
+        # when the operation supports it and the result replaces the input
+        # raster.
+        direct = (self.output_location == 'Time series' and output == '' and
+                  has_raster and self._has_execute_raster() and
+                  all(len(node_context.input[port])
+                      for port in self._input_ports))
+
+        def items():
+            for idx in range(number_of_tables):
+                if direct:
+                    out_adaf = adaf.File(
+                        source=node_context.input[self.update_using][idx])
+                    in_raster = {
+                        port: node_context.input[port][idx].sys[system][
+                            raster]
+                        for port in self._input_ports}
+                    out_raster = {port: out_adaf.sys[system][raster]
+                                  for port in self._output_ports}
+                    yield idx, in_raster, out_raster, out_adaf
+                    continue
+
+                in_table = {}
+                for port in self._input_ports:
+                    if len(node_context.input[port]) and has_raster:
+                        in_table[port] = (
+                            node_context.input[port][idx]
+                            .sys[system][raster].to_table(raster))
+                    else:
+                        in_table[port] = table.File()
 
-            if self.output_location == 'Time series':
-                if output == '':
-                    out_table_ = table.File(source=in_table[self.update_using])
-                else:
-                    out_table_ = table.File()
-
-            elif self.output_location == 'Meta':
-                out_table_ = table.File(
-                    source=node_context.input[
-                        self.update_using][idx].meta.to_table())
-            elif self.output_location == 'Result':
-                out_table_ = table.File(
-                    source=node_context.input[
-                        self.update_using][idx].res.to_table())
-
-            out_table = {port: out_table_ for port in self._output_ports}
-            self.execute_table(in_table, out_table, parameter_group)
-
-            if len(node_context.input[self.update_using]):
-                out_adaf = adaf.File(
-                    source=node_context.input[self.update_using][idx])
-
-                if (self.output_location == 'Time series' and
-                        raster is not None and system is not None):
+                if self.output_location == 'Time series':
                     if output == '':
-                        out_adaf.sys[system][raster].from_table(
-                            out_table[self._output_ports[0]], raster)
+                        out_table_ = table.File(
+                            source=in_table[self.update_using])
                     else:
-                        out_raster = out_adaf.sys[system].create(output)
-                        out_raster.from_table(out_table[self._output_ports[0]])
-                        out_raster.create_basis(np.arange(
-                            out_table[self._output_ports[0]].number_of_rows()))
+                        out_table_ = table.File()
 
                 elif self.output_location == 'Meta':
-                    out_adaf.meta.from_table(out_table[self._output_ports[0]])
+                    out_table_ = table.File(
+                        source=node_context.input[
+                            self.update_using][idx].meta.to_table())
                 elif self.output_location == 'Result':
-                    out_adaf.res.from_table(out_table[self._output_ports[0]])
+                    out_table_ = table.File(
+                        source=node_context.input[
+                            self.update_using][idx].res.to_table())
 
-            else:
-                out_adaf = adaf.File(
-                    source=node_context.input[self.update_using])
+                out_table = {port: out_table_ for port in self._output_ports}
+                yield idx, in_table, out_table, None
 
+        def execute_item(idx, in_data, out_data, out_adaf):
+            if direct:
+                self.execute_raster(in_data, out_data, parameter_group)
+            else:
+                self.execute_table(in_data, out_data, parameter_group)
+            return idx, out_data, out_adaf
+
+        results = ordered_map(execute_item, items(), self.parallel_workers)
+        for idx, out_table, out_adaf in results:
+            if out_adaf is None:
+                out_adaf = self._adaf_from_table(
+                    node_context, idx, out_table, system, raster, output)
             node_context.output[0].append(out_adaf)
             self.set_progress(factor * idx)
 
+    def _adaf_from_table(self, node_context, idx, out_table, system, raster,
+                         output):
+        if not len(node_context.input[self.update_using]):
+            return adaf.File(source=node_context.input[self.update_using])
+
+        out_adaf = adaf.File(
+            source=node_context.input[self.update_using][idx])
+
+        if (self.output_location == 'Time series' and
+                raster is not None and system is not None):
+            if output == '':
+                out_adaf.sys[system][raster].from_table(
+                    out_table[self._output_ports[0]], raster)
+            else:
+                out_raster = out_adaf.sys[system].create(output)
+                out_raster.from_table(out_table[self._output_ports[0]])
+                out_raster.create_basis(np.arange(
+                    out_table[self._output_ports[0]].number_of_rows()))
+
+        elif self.output_location == 'Meta':
+            out_adaf.meta.from_table(out_table[self._output_ports[0]])
+        elif self.output_location == 'Result':
+            out_adaf.res.from_table(out_table[self._output_ports[0]])
+        return out_adaf
+
 
 def table_node_factory(class_name, table_operation, node_name, node_id):
     parameters = gennode.parameters()
@@ -26,12 +26,18 @@
 import operator
 from collections import OrderedDict
 
-from . import parameter_helper_gui as gui
-
-# Import * to ensure that the API is backwards compatible with older versions
-# of the parameter helper API where everything was in a single module.
-from .parameter_helper_gui import *  # noqa
-from .parameter_helper_visitors import *  # noqa
+from ..platform.os_support import headless
+
+# The widgets and visitors require Qt, in the headless profile parameters can
+# be used but not shown.
+if not headless():
+    from . import parameter_helper_gui as gui
+
+    # Import * to ensure that the API is backwards compatible with older
+    # versions of the parameter helper API where everything was in a single
+    # module.
+    from .parameter_helper_gui import *  # noqa
+    from .parameter_helper_visitors import *  # noqa
 
 
 class ParameterEntity(object):
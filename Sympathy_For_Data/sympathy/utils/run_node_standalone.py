@@ -29,9 +29,6 @@ import glob
 import json
 import tempfile
 
-#import qt_compat
-import PySide.QtGui as QtGui
-
 
 def load_json_type_aliases(typealias_path):
     json_type_aliases_filenames = glob.glob1(typealias_path, "*.json")
@@ -58,13 +55,19 @@ def load_json_definition(fq_json_definition_filename):
 
 def inject_definition_files(json_definition, definition_filenames,
                             use_temp_output_files=True):
+    """
+    Set the files of the ports in json_definition, a node definition with
+    lists of input and output ports. Input files are looked up in
+    definition_filenames by port name, or index for ports without a name,
+    and each output is written to a new temporary file.
+    """
     injected_json_definition = json.loads(json_definition)
-    input_ports = injected_json_definition['definition']['inputs']
-    for port_name in input_ports.iterkeys():
-        input_ports[port_name]['file'] = definition_filenames[port_name]
+    ports = injected_json_definition['ports']
+    for index, input_port in enumerate(ports.get('inputs', [])):
+        input_port['file'] = definition_filenames[
+            input_port.get('name', index)]
 
-    output_ports = injected_json_definition['definition']['outputs']
-    for output_port in output_ports.itervalues():
+    for output_port in ports.get('outputs', []):
         with tempfile.NamedTemporaryFile(
                 prefix='run_node_', suffix='.sydata', delete=False) as fq:
             output_port['file'] = fq.name
@@ -85,24 +88,19 @@ def run_node(sy_app_path, app_relative_support_path,
 
     json_definition = load_json_definition(fq_json_definition_filename)
     typealias_path = os.path.join(sy_app_path, "Library/typealias")
-    json_type_aliases = load_json_type_aliases(typealias_path)
+    type_aliases = json.loads(load_json_type_aliases(typealias_path))
 
     json_definition = inject_definition_files(
         json_definition, definition_filenames)
 
     definition = json.loads(json_definition)
-    try:
-        definition['parameters']
-    except KeyError:
-        definition['parameters'] = {'type': 'group'}
+    parameters = definition.setdefault('parameters', {'type': 'json'})
+    parameter_data = parameters.setdefault('data', {'type': 'group'})
     if use_parameter_helper:
         from sympathy.utils.parameter_helper import ParameterRoot
-        parameters = ParameterRoot(definition['parameters'])
-    else:
-        parameters = definition['parameters']
+        parameter_data = ParameterRoot(parameter_data)
     # Initialize parameters
-    parameter_initializer_fn(parameters)
-    json_definition = json.dumps(definition)
+    parameter_initializer_fn(parameter_data)
 
     fq_source_filename = os.path.join(node_path, source_filename)
     source_code = None
@@ -113,19 +111,24 @@ def run_node(sy_app_path, app_relative_support_path,
     eval(compiled_code, context, context)
     node = context[class_name]()
 
-    app = QtGui.QApplication(sys.argv)
-    adjusted_json_definition = (
-        node._sys_adjust_parameters(json_definition, json_type_aliases))
+    from sympathy import api
+    if api.headless():
+        # There is no GUI for configuring the node.
+        configure_node = False
+    else:
+        QtGui = api.qt.import_module('QtGui')
+        app = QtGui.QApplication(sys.argv)  # NOQA
+    adjusted_definition = node._sys_adjust_parameters(
+        definition, type_aliases)
     if configure_node:
-        configured_json_definition = node._sys_exec_parameter_view(
-            adjusted_json_definition, json_type_aliases)
+        configured_definition = node._sys_exec_parameter_view(
+            adjusted_definition, type_aliases)
     else:
-        configured_json_definition = adjusted_json_definition
+        configured_definition = adjusted_definition
     if execute_node:
-        node._sys_execute(configured_json_definition, json_type_aliases)
+        node._sys_execute(configured_definition, type_aliases)
         print "Data is written to file(s):"
-        output_ports = definition['definition']['outputs']
-        for port in output_ports.values():
+        for port in definition['ports'].get('outputs', []):
             print port['file']
 
 